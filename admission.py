@@ -0,0 +1,166 @@
+"""
+Admission control and load shedding for the web routes.
+
+Under a burst, a server that accepts every request queues it behind slow model
+calls until the client gives up, and then pays for an answer nobody receives.
+An AdmissionController caps the requests of a route group running at once and
+the requests waiting for a slot. A request it cannot take in time is refused
+at once, with a Retry-After estimated from recent service times:
+
+- 503 when the queue is full, or a queued request waited queue_timeout
+  seconds without getting a slot
+- 429 when one tenant already has max_per_tenant requests running or queued,
+  so one noisy client cannot fill the queue for everyone
+
+Requests answered from the response cache never take a slot. The counters
+(running, queued, peak queue depth, admitted and shed requests by reason) are
+served by the web app's /stats route.
+
+web_app.py has one controller for /match and /explain and one for the parse
+routes. Configure them with MATCHER_MATCH_MAX_CONCURRENT,
+MATCHER_MATCH_MAX_QUEUE, MATCHER_PARSE_MAX_CONCURRENT and
+MATCHER_PARSE_MAX_QUEUE (0 means unlimited), and MATCHER_QUEUE_TIMEOUT and
+MATCHER_TENANT_MAX_REQUESTS for both. Under serve.py the default limits follow
+the worker's --threads instead of DEFAULT_LIMITS (see serve.size_admission).
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+# Defaults per route group: (max_concurrent, max_queue)
+DEFAULT_LIMITS = {"match": (16, 32), "parse": (32, 64)}
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised instead of running a request that was shed."""
+
+    def __init__(self, message: str, status: int, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, name: str, max_concurrent: Optional[int] = None, max_queue: Optional[int] = None,
+                 queue_timeout: float = 10.0, max_per_tenant: Optional[int] = None):
+        """
+        Initialize the controller.
+
+        Args:
+            name (str): Route group, used in messages and statistics
+            max_concurrent (int, optional): Requests running at once (None: unlimited)
+            max_queue (int, optional): Requests waiting for a slot; more are shed (None: unlimited)
+            queue_timeout (float): Seconds a request may wait for a slot before it is shed
+            max_per_tenant (int, optional): Requests one tenant may have running or queued
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_per_tenant = max_per_tenant
+        self._cond = threading.Condition()
+        self._running = 0
+        self._queued = 0
+        self._tenants: Dict[str, int] = {}
+        self._service_time = None
+        self._stats = {"admitted": 0, "queued": 0, "peak_queued": 0,
+                       "shed": {"queue_full": 0, "timeout": 0, "tenant": 0}}
+
+    @classmethod
+    def from_env(cls, name: str, defaults: Optional[Tuple[int, int]] = None) -> "AdmissionController":
+        """
+        Build the controller of a route group ("match" or "parse") from MATCHER_<NAME>_MAX_CONCURRENT,
+        MATCHER_<NAME>_MAX_QUEUE, MATCHER_QUEUE_TIMEOUT and MATCHER_TENANT_MAX_REQUESTS.
+
+        Args:
+            name (str): Route group
+            defaults (Tuple[int, int], optional): (max_concurrent, max_queue) where the environment sets
+                                                  no limit; DEFAULT_LIMITS if None
+        """
+        default_concurrent, default_queue = defaults or DEFAULT_LIMITS.get(name, (None, None))
+        prefix = f"MATCHER_{name.upper()}_"
+        max_concurrent = int(os.environ.get(prefix + "MAX_CONCURRENT", default_concurrent or 0))
+        max_queue = int(os.environ.get(prefix + "MAX_QUEUE", default_queue or 0))
+        per_tenant = os.environ.get("MATCHER_TENANT_MAX_REQUESTS")
+        return cls(name, max_concurrent=max_concurrent or None, max_queue=max_queue or None,
+                   queue_timeout=float(os.environ.get("MATCHER_QUEUE_TIMEOUT", "10")),
+                   max_per_tenant=int(per_tenant) if per_tenant else None)
+
+    @property
+    def capacity(self) -> Optional[int]:
+        """Requests the controller holds at once, running or queued; None if either limit is unlimited."""
+        if self.max_concurrent is None or self.max_queue is None:
+            return None
+        return self.max_concurrent + self.max_queue
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely free: the queue ahead, served at the recent pace."""
+        service_time = self._service_time or 1.0
+        slots = self.max_concurrent or 1
+        return max(1, math.ceil(service_time * (self._queued + 1) / slots))
+
+    def _release_tenant(self, tenant: str) -> None:
+        self._tenants[tenant] -= 1
+        if not self._tenants[tenant]:
+            del self._tenants[tenant]
+
+    def _shed(self, reason: str, status: int, message: str) -> AdmissionRejected:
+        self._stats["shed"][reason] += 1
+        return AdmissionRejected(f"{self.name}: {message}", status, self._retry_after())
+
+    @contextmanager
+    def admit(self, tenant: str = "default") -> Iterator[None]:
+        """
+        Run the enclosed request in a slot, waiting in the queue if all slots are taken.
+
+        Raises:
+            AdmissionRejected: If the request is shed (status 429 or 503, with retry_after seconds)
+        """
+        with self._cond:
+            if self.max_per_tenant is not None and self._tenants.get(tenant, 0) >= self.max_per_tenant:
+                raise self._shed("tenant", 429, f"tenant {tenant} has {self.max_per_tenant} requests in progress")
+            if self.max_concurrent is not None and (self._running >= self.max_concurrent or self._queued):
+                if self.max_queue is not None and self._queued >= self.max_queue:
+                    raise self._shed("queue_full", 503, f"{self._queued} requests already queued")
+                self._queued += 1
+                self._tenants[tenant] = self._tenants.get(tenant, 0) + 1
+                self._stats["queued"] += 1
+                self._stats["peak_queued"] = max(self._stats["peak_queued"], self._queued)
+                try:
+                    admitted = self._cond.wait_for(lambda: self._running < self.max_concurrent, self.queue_timeout)
+                finally:
+                    self._queued -= 1
+                    self._release_tenant(tenant)
+                if not admitted:
+                    raise self._shed("timeout", 503, f"no free slot within {self.queue_timeout:g}s")
+            self._running += 1
+            self._tenants[tenant] = self._tenants.get(tenant, 0) + 1
+            self._stats["admitted"] += 1
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self._running -= 1
+                self._release_tenant(tenant)
+                # Moving average of the service time, for Retry-After
+                self._service_time = elapsed if self._service_time is None else 0.8 * self._service_time + 0.2 * elapsed
+                self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the limits, current queue depth and running requests, and admitted and shed counts."""
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._queued,
+                **self._stats,
+                "shed": dict(self._stats["shed"]),
+                "avg_service_s": round(self._service_time, 3) if self._service_time is not None else None
+            }
@@ -0,0 +1,379 @@
+"""
+Directory-scale batch matching for the Resume-JD Matcher.
+
+Matches every resume against every job description with a pool of worker
+threads, appending one record per pair to a single result file as results
+complete (JSONL, gzip- or zstd-compressed JSONL or MessagePack, by extension;
+see result_sinks.py). Each resume and each job description is parsed once per run and
+shared by all of its pairs, so R resumes x J job descriptions cost R + J + R*J
+model calls instead of 3*R*J.
+
+Completed pairs are recorded in a checkpoint file next to the output once their
+records are flushed. Re-running the same command skips them, so a crash at item
+4,000 does not redo the first 3,999. Delivery is at-least-once: a crash between
+flushing results and checkpointing them can repeat those records, which readers
+can drop by pair_id.
+
+Documents may be .txt, .docx or .pdf. Their text is extracted in a process pool
+that runs just ahead of the matching threads (see ingestion.py).
+
+Used by `python cli.py batch ...`.
+"""
+import glob
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+
+from dedup import NearDuplicateIndex
+from ingestion import SUPPORTED_EXTENSIONS, iter_documents
+from manifest import file_hash
+from result_sinks import open_sink
+from resume_jd_matcher import PROMPT_VERSION
+from scheduler import request_context
+
+logger = logging.getLogger(__name__)
+
+INPUT_EXTENSIONS = SUPPORTED_EXTENSIONS
+
+
+def expand_inputs(spec: str, extensions=INPUT_EXTENSIONS) -> List[str]:
+    """
+    Expand a directory, glob pattern or single file into a sorted list of paths.
+
+    Args:
+        spec (str): Directory (all files with a supported extension), glob pattern, or file path
+        extensions (tuple): File extensions accepted when expanding a directory
+
+    Returns:
+        List[str]: Sorted file paths
+    """
+    if os.path.isdir(spec):
+        paths = [os.path.join(spec, name) for name in os.listdir(spec)
+                 if name.lower().endswith(extensions)]
+    elif any(char in spec for char in "*?["):
+        paths = [path for path in glob.glob(spec, recursive=True) if os.path.isfile(path)]
+    elif os.path.isfile(spec):
+        paths = [spec]
+    else:
+        paths = []
+    return sorted(paths)
+
+
+def pair_id(resume_hash: str, jd_hash: str, version: str = "") -> str:
+    """
+    Stable identifier for a resume/JD pair, derived from both documents' content
+    and the prompt/model version, so edited files or prompts are redone.
+    """
+    return hashlib.sha256(f"{resume_hash}:{jd_hash}:{version}".encode("utf-8")).hexdigest()[:24]
+
+
+class BatchCheckpoint:
+    def __init__(self, path: str):
+        """
+        Append-only record of completed pair ids.
+
+        Args:
+            path (str): Checkpoint file path
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.completed: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                # A torn last line from a crash is simply not counted as complete
+                self.completed = {line.strip() for line in f if line.endswith("\n") and line.strip()}
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def mark_done(self, pid: str) -> None:
+        """Record a pair as completed and flush to disk."""
+        with self._lock:
+            self.completed.add(pid)
+            self._file.write(pid + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParseCache:
+    """Per-run cache so each document is parsed once, however many pairs use it."""
+
+    def __init__(self, parse: Callable[[str], Dict[str, Any]]):
+        self._parse = parse
+        self._futures: Dict[str, Future] = {}
+        self._remaining: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def expect(self, key: str, uses: int) -> None:
+        """Declare how many pairs will use a document, so it can be evicted afterwards."""
+        self._remaining[key] = self._remaining.get(key, 0) + uses
+
+    def get(self, key: str, text_loader: Callable[[], str]) -> Dict[str, Any]:
+        """Return the parsed document, parsing it on first use and sharing the result."""
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._futures[key] = future
+        if owner:
+            try:
+                future.set_result(self._parse(text_loader()))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def release(self, key: str) -> None:
+        """Drop a parsed document once all of its pairs are done."""
+        with self._lock:
+            self._remaining[key] -= 1
+            if self._remaining[key] <= 0:
+                self._futures.pop(key, None)
+
+
+class BatchRunner:
+    def __init__(self, matcher, workers: int = 4, extract_workers: Optional[int] = None, prefetch: int = 8,
+                 dedup_threshold: Optional[float] = None, priority: str = "batch", tenant: str = "batch"):
+        """
+        Initialize the batch runner.
+
+        Args:
+            matcher (ResumeJDMatcher): Matcher used for parsing and matching
+            workers (int): Number of pairs processed concurrently
+            extract_workers (int, optional): Processes extracting document text (default: number of CPUs)
+            prefetch (int): Resumes extracted ahead of the pairs currently being matched
+            dedup_threshold (float, optional): Skip model calls for resumes whose estimated similarity
+                to a resume already seen in this run is at least this value (0-1); None disables it
+            priority (str): Scheduling class of the run's model calls ("batch" or "background"), so a
+                matcher shared with interactive traffic serves that first (see scheduler.py)
+            tenant (str): Tenant the run's model calls are queued under
+        """
+        self.matcher = matcher
+        self.workers = max(1, workers)
+        self.extract_workers = extract_workers
+        self.prefetch = max(1, prefetch)
+        self.dedup_threshold = dedup_threshold
+        self.priority = priority
+        self.tenant = tenant
+
+    def run(self, resume_paths: List[str], jd_paths: List[str], output_path: str,
+            checkpoint_path: Optional[str] = None, restart: bool = False) -> Dict[str, Any]:
+        """
+        Match every resume against every job description, streaming results as JSON lines.
+
+        Text is extracted from resumes in a process pool while earlier resumes are
+        being matched; at most `prefetch` extracted resumes and 2 * workers pairs
+        are held in memory at a time.
+
+        With dedup_threshold set, a resume that is a near-duplicate of one already
+        seen in this run is not sent to the model. Its pairs are written with
+        status "duplicate" and a duplicate_of reference to the pair_id holding the
+        result, once that pair has succeeded.
+
+        Pairs matched by the local heuristic scorer while the matcher's circuit
+        breaker was open are written with status "degraded" and, like failed
+        pairs, retried on the next run.
+
+        Args:
+            resume_paths (List[str]): Resume files (.txt, .docx or .pdf)
+            jd_paths (List[str]): Job description files (.txt, .docx or .pdf)
+            output_path (str): Result file (.jsonl, .jsonl.gz, .jsonl.zst or .msgpack); results are appended
+            checkpoint_path (str, optional): Checkpoint file (default: <output_path>.checkpoint)
+            restart (bool): Ignore and overwrite any existing output and checkpoint
+
+        Returns:
+            Dict[str, Any]: Run summary with counts of processed, skipped and failed pairs
+        """
+        checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+        if restart:
+            for path in (output_path, checkpoint_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        checkpoint = BatchCheckpoint(checkpoint_path)
+        # Hash files up front: the pair id depends on content, prompts, models and scoring settings
+        version = f"{PROMPT_VERSION}:{self.matcher.model_signature}"
+        resume_hashes = {path: file_hash(path) for path in resume_paths}
+        jd_hashes = {path: file_hash(path) for path in jd_paths}
+
+        # Pending pairs grouped by resume, so each resume is extracted once
+        pending: Dict[str, List[Tuple[str, str]]] = {}
+        for resume_path in resume_paths:
+            for jd_path in jd_paths:
+                pid = pair_id(resume_hashes[resume_path], jd_hashes[jd_path], version)
+                if pid not in checkpoint.completed:
+                    pending.setdefault(resume_path, []).append((pid, jd_path))
+        pending_count = sum(len(pairs) for pairs in pending.values())
+
+        total = len(resume_paths) * len(jd_paths)
+        summary = {"total_pairs": total, "skipped": total - pending_count, "processed": 0, "failed": 0,
+                   "duplicates": 0, "degraded": 0}
+        if summary["skipped"]:
+            print(f"Resuming from checkpoint: {summary['skipped']} of {total} pairs already done")
+
+        resume_cache = _ParseCache(self.matcher.parse_resume)
+        jd_cache = _ParseCache(self.matcher.parse_job_description)
+        for resume_path, pairs in pending.items():
+            resume_cache.expect(resume_path, len(pairs))
+            for _, jd_path in pairs:
+                jd_cache.expect(jd_path, 1)
+
+        start = time.time()
+
+        # Job descriptions are few and shared by every resume: extract them all first
+        pending_jds = sorted({jd_path for pairs in pending.values() for _, jd_path in pairs})
+        jd_docs = {doc["path"]: doc for doc in iter_documents(pending_jds, workers=self.extract_workers)}
+
+        def process(pid: str, resume_path: str, resume_text: str, jd_path: str) -> Dict[str, Any]:
+            pair_start = time.time()
+            jd_text = jd_docs[jd_path]["text"]
+            # Model calls of this pair are queued behind interactive work of a shared matcher
+            with request_context(self.priority, self.tenant):
+                try:
+                    result = None
+                    if getattr(self.matcher, "skills_prefilter_threshold", None) is not None:
+                        result = self.matcher.skills_prefilter(resume_text, jd_text)
+                    if result is None:
+                        parsed_resume = resume_cache.get(resume_path, lambda: resume_text)
+                        parsed_jd = jd_cache.get(jd_path, lambda: jd_text)
+                        result = {
+                            "parsed_resume": parsed_resume,
+                            "parsed_job_description": parsed_jd,
+                            "matching_result": self.matcher.match_resume_to_jd(parsed_resume, parsed_jd)
+                        }
+                    failed = any("error" in result[key]
+                                 for key in ("parsed_resume", "parsed_job_description", "matching_result"))
+                    # Heuristic estimates made while the circuit breaker was open are written but retried later
+                    degraded = result["matching_result"].get("degraded", False)
+                    record = {
+                        "pair_id": pid,
+                        "resume": resume_path,
+                        "jd": jd_path,
+                        "status": "degraded" if degraded else "error" if failed else "ok",
+                        "result": result
+                    }
+                except Exception as e:
+                    logger.error(f"Error processing {resume_path} vs {jd_path}: {e}")
+                    record = {"pair_id": pid, "resume": resume_path, "jd": jd_path, "status": "error", "error": str(e)}
+                finally:
+                    resume_cache.release(resume_path)
+                    jd_cache.release(jd_path)
+            record["elapsed_s"] = round(time.time() - pair_start, 3)
+            return record
+
+        completed = queue.Queue()
+        state = {"in_flight": 0, "done": 0}
+        max_in_flight = self.workers * 2
+
+        dedup = NearDuplicateIndex(self.dedup_threshold) if self.dedup_threshold else None
+        # Status of every written pair, and duplicates waiting for their original pair to finish
+        statuses: Dict[str, str] = {}
+        waiting_duplicates: Dict[str, List[Dict[str, Any]]] = {}
+
+        # Pairs whose records are still in the sink's buffer; they are checkpointed once it is flushed
+        unflushed: List[str] = []
+
+        def checkpoint_flushed() -> None:
+            for flushed_pid in unflushed:
+                checkpoint.mark_done(flushed_pid)
+            unflushed.clear()
+
+        def write(record: Dict[str, Any]) -> None:
+            out.write(record)
+            # Failed pairs are not checkpointed, so the next run retries them
+            if record["status"] == "ok":
+                unflushed.append(record["pair_id"])
+                summary["processed"] += 1
+            elif record["status"] == "duplicate":
+                unflushed.append(record["pair_id"])
+                summary["duplicates"] += 1
+            elif record["status"] == "degraded":
+                summary["degraded"] += 1
+            else:
+                summary["failed"] += 1
+            if not out.pending:
+                checkpoint_flushed()
+            state["done"] += 1
+            done = state["done"]
+            if done % 10 == 0 or done == pending_count:
+                rate = done / (time.time() - start)
+                print(f"[{done}/{pending_count}] {rate:.2f} pairs/s")
+
+            if dedup is not None:
+                statuses[record["pair_id"]] = record["status"]
+                for duplicate in waiting_duplicates.pop(record["pair_id"], []):
+                    write_duplicate(duplicate, record["status"])
+
+        def write_duplicate(record: Dict[str, Any], original_status: str) -> None:
+            if original_status != "ok":
+                # Retried with its original on the next run
+                record["status"] = "error"
+                record["error"] = f"Near-duplicate of {record['duplicate_of']['resume']}, whose pair failed"
+            write(record)
+
+        def duplicate_found(pid: str, resume_path: str, jd_path: str, original: str, similarity: float) -> None:
+            resume_cache.release(resume_path)
+            jd_cache.release(jd_path)
+            original_pid = pair_id(resume_hashes[original], jd_hashes[jd_path], version)
+            record = {"pair_id": pid, "resume": resume_path, "jd": jd_path, "status": "duplicate",
+                      "duplicate_of": {"resume": original, "pair_id": original_pid},
+                      "similarity": round(similarity, 3), "elapsed_s": 0.0}
+            if original_pid in statuses:
+                write_duplicate(record, statuses[original_pid])
+            elif original_pid in checkpoint.completed:
+                write_duplicate(record, "ok")
+            else:
+                waiting_duplicates.setdefault(original_pid, []).append(record)
+
+        def collect() -> None:
+            state["in_flight"] -= 1
+            write(completed.get().result())
+
+        def extraction_failed(pid: str, resume_path: str, jd_path: str, error: str) -> None:
+            logger.error(f"Could not extract text for {resume_path} vs {jd_path}: {error}")
+            resume_cache.release(resume_path)
+            jd_cache.release(jd_path)
+            write({"pair_id": pid, "resume": resume_path, "jd": jd_path, "status": "error",
+                   "error": f"Text extraction failed: {error}", "elapsed_s": 0.0})
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        documents = iter_documents(list(pending), workers=self.extract_workers, queue_size=self.prefetch)
+        out = open_sink(output_path)
+        try:
+            with out:
+                # Pulling the next resume only when a pair slot is free keeps extraction
+                # just ahead of matching instead of reading the whole corpus into memory
+                for doc in documents:
+                    duplicate = None
+                    if dedup is not None and not doc["error"]:
+                        duplicate = dedup.add(doc["path"], doc["text"])
+                    for pid, jd_path in pending[doc["path"]]:
+                        error = doc["error"] or jd_docs[jd_path]["error"]
+                        if error:
+                            extraction_failed(pid, doc["path"], jd_path, error)
+                            continue
+                        if duplicate is not None:
+                            duplicate_found(pid, doc["path"], jd_path, *duplicate)
+                            continue
+                        while state["in_flight"] >= max_in_flight:
+                            collect()
+                        future = executor.submit(process, pid, doc["path"], doc["text"], jd_path)
+                        future.add_done_callback(completed.put)
+                        state["in_flight"] += 1
+                while state["in_flight"]:
+                    collect()
+        finally:
+            # On interruption, drop queued pairs; the checkpoint lets the next run pick them up
+            documents.close()
+            executor.shutdown(wait=True, cancel_futures=True)
+            if not out.pending:
+                checkpoint_flushed()
+            checkpoint.close()
+
+        summary["elapsed_s"] = round(time.time() - start, 3)
+        return summary
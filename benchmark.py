@@ -0,0 +1,522 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmark suite for the Resume-JD Matcher.
+
+Drives parse_resume, parse_job_description, match_resume_to_jd,
+process_resume_and_jd and the JSON repair helpers against a local fake
+OpenAI-compatible server (see fake_openai_server.py), so the numbers measure
+our own code and concurrency behaviour rather than the real API.
+
+Reports p50/p95/p99 latency per stage, pairs per second at several concurrency
+levels, and CPU time spent locally. Results are written as JSON so runs from
+different commits can be compared:
+
+    python benchmark.py --output bench_before.json
+    git checkout my-branch
+    python benchmark.py --output bench_after.json --compare bench_before.json
+
+`python benchmark.py --dedup-docs 100000` instead measures near-duplicate
+detection (dedup.py) on a synthetic resume corpus, and
+`python benchmark.py --retrieval-docs 100000` measures job description
+retrieval (jd_index.py) on a synthetic posting corpus; neither needs a server.
+"""
+import argparse
+import heapq
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import mul
+from typing import Dict, Any, Callable, List, Optional
+
+from dedup import NearDuplicateIndex
+from fake_openai_server import FakeOpenAIServer, CANNED_MATCH
+from hedging import Hedger
+from jd_index import JDIndex, vectorize
+from resume_jd_matcher import ResumeJDMatcher
+
+# Malformed model outputs that exercise each branch of the JSON helpers
+_CANNED_MATCH_JSON = json.dumps(CANNED_MATCH)
+JSON_REPAIR_CORPUS = {
+    "valid": _CANNED_MATCH_JSON,
+    "markdown_fenced": f"```json\n{_CANNED_MATCH_JSON}\n```",
+    "leading_text": f"Here is the evaluation you asked for:\n{_CANNED_MATCH_JSON}\nLet me know if you need more.",
+    "trailing_comma": _CANNED_MATCH_JSON[:-1] + ",}",
+    "unquoted_keys": _CANNED_MATCH_JSON.replace('"match_level"', 'match_level'),
+    "truncated": _CANNED_MATCH_JSON[:len(_CANNED_MATCH_JSON) * 2 // 3],
+    "python_literals": _CANNED_MATCH_JSON.replace('"reasoning": "', '"flag": True, "reasoning": "', 1),
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Compute a percentile with linear interpolation between closest ranks.
+
+    Args:
+        values (List[float]): Samples
+        pct (float): Percentile in the range 0-100
+
+    Returns:
+        float: The percentile value, or 0.0 for an empty sample
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(latencies: List[float], cpu_times: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Summarize latency (and optionally CPU) samples in milliseconds.
+
+    Args:
+        latencies (List[float]): Wall-clock samples in seconds
+        cpu_times (List[float], optional): CPU time samples in seconds
+
+    Returns:
+        Dict[str, Any]: Count, mean, p50, p95, p99 and max, all in milliseconds
+    """
+    summary = {
+        "count": len(latencies),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(1000 * percentile(latencies, 50), 3),
+        "p95_ms": round(1000 * percentile(latencies, 95), 3),
+        "p99_ms": round(1000 * percentile(latencies, 99), 3),
+        "max_ms": round(1000 * max(latencies), 3) if latencies else 0.0,
+    }
+    if cpu_times is not None:
+        summary["cpu_mean_ms"] = round(1000 * sum(cpu_times) / len(cpu_times), 3) if cpu_times else 0.0
+        summary["cpu_p95_ms"] = round(1000 * percentile(cpu_times, 95), 3)
+    return summary
+
+
+def _timed(fn: Callable[[], Any]):
+    """Run fn and return (result, wall seconds, CPU seconds of this thread)."""
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    result = fn()
+    return result, time.perf_counter() - wall_start, time.thread_time() - cpu_start
+
+
+def bench_stages(matcher: ResumeJDMatcher, resume_text: str, jd_text: str, iterations: int) -> Dict[str, Any]:
+    """
+    Measure each pipeline stage sequentially.
+
+    Wall time includes the simulated network latency; CPU time is the thread's
+    own work (request building, HTTP client, JSON cleanup), which is what
+    local optimizations can change.
+    """
+    parsed_resume = matcher.parse_resume(resume_text)
+    parsed_jd = matcher.parse_job_description(jd_text)
+
+    stages = {
+        "parse_resume": lambda: matcher.parse_resume(resume_text),
+        "parse_job_description": lambda: matcher.parse_job_description(jd_text),
+        "match_resume_to_jd": lambda: matcher.match_resume_to_jd(parsed_resume, parsed_jd),
+        "process_resume_and_jd": lambda: matcher.process_resume_and_jd(resume_text, jd_text),
+    }
+
+    results = {}
+    for name, fn in stages.items():
+        latencies, cpu_times = [], []
+        for _ in range(iterations):
+            _, wall, cpu = _timed(fn)
+            latencies.append(wall)
+            cpu_times.append(cpu)
+        results[name] = summarize(latencies, cpu_times)
+        print(f"  {name:<24} p50 {results[name]['p50_ms']:>9.1f} ms  p95 {results[name]['p95_ms']:>9.1f} ms  "
+              f"p99 {results[name]['p99_ms']:>9.1f} ms  cpu {results[name]['cpu_mean_ms']:>7.2f} ms")
+    return results
+
+
+def bench_json_helpers(matcher: ResumeJDMatcher, iterations: int) -> Dict[str, Any]:
+    """Measure the local JSON cleanup and repair helpers on each kind of malformed output."""
+    helpers = {
+        "_clean_json_string": matcher._clean_json_string,
+        "_attempt_json_repair": matcher._attempt_json_repair,
+        "_extract_json_with_regex": matcher._extract_json_with_regex,
+        "_extract_json_from_text": matcher._extract_json_from_text,
+        "validate_json_output": matcher.validate_json_output,
+    }
+
+    # The helpers log every classified error; keep the benchmark output readable
+    matcher_logger = logging.getLogger("resume_jd_matcher")
+    previous_level = matcher_logger.level
+    matcher_logger.setLevel(logging.CRITICAL)
+    try:
+        results = {}
+        for helper_name, helper in helpers.items():
+            results[helper_name] = {}
+            for case, text in JSON_REPAIR_CORPUS.items():
+                samples = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    helper(text)
+                    samples.append(time.perf_counter() - start)
+                summary = summarize(samples)
+                results[helper_name][case] = {
+                    "mean_us": round(summary["mean_ms"] * 1000, 2),
+                    "p50_us": round(summary["p50_ms"] * 1000, 2),
+                    "p99_us": round(summary["p99_ms"] * 1000, 2),
+                }
+            slowest = max(results[helper_name].items(), key=lambda item: item[1]["mean_us"])
+            print(f"  {helper_name:<26} slowest case '{slowest[0]}' {slowest[1]['mean_us']:.1f} us/call")
+    finally:
+        matcher_logger.setLevel(previous_level)
+    return results
+
+
+def bench_throughput(matcher: ResumeJDMatcher, resume_text: str, jd_text: str,
+                     concurrency_levels: List[int], pairs: int) -> Dict[str, Any]:
+    """Run process_resume_and_jd for a number of pairs at each concurrency level."""
+    results = {}
+    for workers in concurrency_levels:
+        latencies, cpu_times = [], []
+
+        def run_pair(_):
+            _, wall, cpu = _timed(lambda: matcher.process_resume_and_jd(resume_text, jd_text))
+            return wall, cpu
+
+        process_cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for wall, cpu in executor.map(run_pair, range(pairs)):
+                latencies.append(wall)
+                cpu_times.append(cpu)
+        elapsed = time.perf_counter() - wall_start
+        process_cpu = time.process_time() - process_cpu_start
+
+        results[str(workers)] = {
+            "pairs": pairs,
+            "elapsed_s": round(elapsed, 3),
+            "pairs_per_second": round(pairs / elapsed, 3) if elapsed else 0.0,
+            "process_cpu_s": round(process_cpu, 3),
+            "cpu_ms_per_pair": round(1000 * process_cpu / pairs, 3),
+            "latency": summarize(latencies, cpu_times),
+        }
+        print(f"  concurrency {workers:>3}: {results[str(workers)]['pairs_per_second']:>8.2f} pairs/s  "
+              f"p95 {results[str(workers)]['latency']['p95_ms']:>9.1f} ms  "
+              f"cpu/pair {results[str(workers)]['cpu_ms_per_pair']:>7.2f} ms")
+    return results
+
+
+def bench_dedup(documents: int, threshold: float = 0.9, duplicate_rate: float = 0.1,
+                words: int = 300, seed: int = 42) -> Dict[str, Any]:
+    """
+    Measure near-duplicate detection throughput and accuracy on synthetic resumes.
+
+    A share of the documents are copies of earlier ones with one or two words
+    edited (a light re-application); the rest are independent. Corpus
+    generation is not timed.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(20000)]
+    index = NearDuplicateIndex(threshold)
+    recent: List[List[str]] = []
+    true_positives = false_positives = false_negatives = 0
+    cpu_total = wall_total = 0.0
+
+    for doc_id in range(documents):
+        is_duplicate = bool(recent) and rng.random() < duplicate_rate
+        if is_duplicate:
+            tokens = list(rng.choice(recent))
+            for _ in range(rng.randint(1, 2)):
+                tokens[rng.randrange(words)] = rng.choice(vocabulary)
+        else:
+            tokens = [rng.choice(vocabulary) for _ in range(words)]
+            recent.append(tokens)
+            if len(recent) > 1000:
+                recent.pop(rng.randrange(len(recent)))
+        text = " ".join(tokens)
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        match = index.add(doc_id, text)
+        wall_total += time.perf_counter() - wall_start
+        cpu_total += time.process_time() - cpu_start
+
+        if match is not None and is_duplicate:
+            true_positives += 1
+        elif match is not None:
+            false_positives += 1
+        elif is_duplicate:
+            false_negatives += 1
+
+    results = {
+        "documents": documents,
+        "threshold": threshold,
+        "bands": index.bands,
+        "rows": index.rows,
+        "elapsed_s": round(wall_total, 3),
+        "documents_per_second": round(documents / wall_total, 1) if wall_total else 0.0,
+        "cpu_us_per_document": round(1e6 * cpu_total / documents, 1),
+        "duplicates_found": index.stats["duplicates"],
+        "precision": round(true_positives / (true_positives + false_positives), 4) if true_positives + false_positives else 1.0,
+        "recall": round(true_positives / (true_positives + false_negatives), 4) if true_positives + false_negatives else 1.0,
+        "candidates_checked": index.stats["candidates_checked"],
+    }
+    print(f"  {documents} documents in {results['elapsed_s']} s: {results['documents_per_second']:.0f} docs/s, "
+          f"{results['cpu_us_per_document']:.0f} us CPU/doc")
+    print(f"  {results['duplicates_found']} duplicates found, precision {results['precision']:.4f}, "
+          f"recall {results['recall']:.4f} (bands {index.bands} x rows {index.rows})")
+    return results
+
+
+def bench_retrieval(documents: int, queries: int = 20, top_n: int = 10, words: int = 180,
+                    seed: int = 42) -> Dict[str, Any]:
+    """
+    Measure job description index build time, query latency and accuracy on synthetic postings.
+
+    Every posting belongs to one of documents // 100 roles: a third of its words
+    come from the role's vocabulary, the rest from a shared one. Queries are
+    resumes written for a random role. Recall is the overlap with exact search
+    over all vectors; precision is the share of retrieved postings of the
+    resume's role, for the index and for exact search.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(20000)]
+    roles = [rng.sample(vocabulary, 40) for _ in range(max(1, documents // 100))]
+
+    def text(role: int) -> str:
+        tokens = [rng.choice(roles[role]) for _ in range(words // 3)]
+        tokens += [rng.choice(vocabulary) for _ in range(words - len(tokens))]
+        return " ".join(tokens)
+
+    labels = [rng.randrange(len(roles)) for _ in range(documents)]
+    corpus = [(f"jd{doc_id}", text(role)) for doc_id, role in enumerate(labels)]
+    start = time.perf_counter()
+    index = JDIndex.build(corpus)
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "jds.idx")
+        index.save(path)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        index = JDIndex.load(path)
+        load_s = time.perf_counter() - start
+
+        vectors = [vectorize(document) for _, document in corpus]
+        latencies: List[float] = []
+        recall = precision = exact_precision = 0.0
+        for _ in range(queries):
+            role = rng.randrange(len(roles))
+            resume = text(role)
+            start = time.perf_counter()
+            hits = index.query(resume, top_n)
+            latencies.append(time.perf_counter() - start)
+
+            query = vectorize(resume)
+            exact = heapq.nlargest(top_n, range(documents), key=lambda doc_id: sum(map(mul, query, vectors[doc_id])))
+            found = [int(key[2:]) for key, _ in hits]
+            recall += len(set(found) & set(exact)) / top_n
+            precision += sum(labels[doc_id] == role for doc_id in found) / top_n
+            exact_precision += sum(labels[doc_id] == role for doc_id in exact) / top_n
+        index.close()
+
+    results = {
+        "documents": documents,
+        "queries": queries,
+        "top_n": top_n,
+        "build_s": round(build_s, 2),
+        "index_mb": round(size / 2**20, 1),
+        "load_ms": round(1000 * load_s, 1),
+        "query": summarize(latencies),
+        "recall": round(recall / queries, 4),
+        "precision": round(precision / queries, 4),
+        "exact_precision": round(exact_precision / queries, 4),
+    }
+    print(f"  {documents} postings indexed in {results['build_s']} s ({results['index_mb']} MB, "
+          f"loaded in {results['load_ms']} ms)")
+    print(f"  query p50 {results['query']['p50_ms']:.1f} ms  p95 {results['query']['p95_ms']:.1f} ms  "
+          f"recall@{top_n} {results['recall']:.3f}  precision {results['precision']:.3f} "
+          f"(exact search {results['exact_precision']:.3f})")
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    """Return the current git commit, if available."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print the relative change of the headline numbers between two benchmark runs."""
+    def change(old, new):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nComparison against {baseline.get('metadata', {}).get('git_commit', 'baseline')}:")
+    for stage, summary in current.get("stages", {}).items():
+        old = baseline.get("stages", {}).get(stage)
+        if old:
+            print(f"  {stage:<24} p50 {change(old['p50_ms'], summary['p50_ms']):>8}  "
+                  f"p95 {change(old['p95_ms'], summary['p95_ms']):>8}  "
+                  f"cpu {change(old['cpu_mean_ms'], summary['cpu_mean_ms']):>8}")
+    for workers, summary in current.get("throughput", {}).items():
+        old = baseline.get("throughput", {}).get(workers)
+        if old:
+            print(f"  concurrency {workers:>3}: pairs/s {change(old['pairs_per_second'], summary['pairs_per_second']):>8}  "
+                  f"cpu/pair {change(old['cpu_ms_per_pair'], summary['cpu_ms_per_pair']):>8}")
+
+
+def run_benchmark(latency: str = "lognormal:0.05,0.5", iterations: int = 20,
+                  concurrency_levels: Optional[List[int]] = None, pairs: int = 40,
+                  json_iterations: int = 200, malformed_rate: float = 0.0,
+                  resume_file: Optional[str] = None, jd_file: Optional[str] = None,
+                  seed: int = 42, hedge_percentile: Optional[float] = None,
+                  hedge_max_rate: float = 0.1) -> Dict[str, Any]:
+    """
+    Run the full benchmark suite against a fresh fake server.
+
+    Args:
+        latency (str): Fake server latency distribution, see fake_openai_server.parse_latency_distribution
+        iterations (int): Sequential calls per stage
+        concurrency_levels (List[int], optional): Worker counts for the throughput test
+        pairs (int): Pairs processed at each concurrency level
+        json_iterations (int): Calls per JSON helper and malformed-output case
+        malformed_rate (float): Share of fake responses with damaged JSON
+        resume_file (str, optional): Resume text file (default: the bundled sample)
+        jd_file (str, optional): Job description text file (default: the bundled sample)
+        seed (int): Seed for the fake server's latency and malformed responses
+        hedge_percentile (float, optional): Hedge calls slower than this latency percentile
+        hedge_max_rate (float): Maximum share of hedged calls
+
+    Returns:
+        Dict[str, Any]: Machine-readable benchmark results
+    """
+    concurrency_levels = concurrency_levels or [1, 4, 16]
+    samples_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "comparison_of_the_samples")
+    with open(resume_file or os.path.join(samples_dir, "sample_resume.txt"), 'r', encoding='utf-8') as f:
+        resume_text = f.read()
+    with open(jd_file or os.path.join(samples_dir, "sample_jd_google.txt"), 'r', encoding='utf-8') as f:
+        jd_text = f.read()
+
+    # Per-call INFO logs (ours and the HTTP client's) would dominate the CPU numbers
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("resume_jd_matcher").setLevel(logging.WARNING)
+
+    results = {
+        "metadata": {
+            "git_commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "config": {
+                "latency": latency, "iterations": iterations, "concurrency_levels": concurrency_levels,
+                "pairs": pairs, "json_iterations": json_iterations, "malformed_rate": malformed_rate,
+                "seed": seed, "hedge_percentile": hedge_percentile, "hedge_max_rate": hedge_max_rate
+            }
+        }
+    }
+
+    with FakeOpenAIServer(latency=latency, malformed_rate=malformed_rate, seed=seed) as server:
+        hedger = Hedger(percentile=hedge_percentile, max_hedge_rate=hedge_max_rate) if hedge_percentile else None
+        # Every worker sends the same texts; measure model calls, not requests merged into one call
+        matcher = ResumeJDMatcher(api_key="benchmark", base_url=server.base_url, hedger=hedger, coalesce=False)
+
+        print(f"Stage latency ({iterations} sequential calls each, latency {latency}):")
+        results["stages"] = bench_stages(matcher, resume_text, jd_text, iterations)
+
+        print(f"\nThroughput ({pairs} pairs per level):")
+        results["throughput"] = bench_throughput(matcher, resume_text, jd_text, concurrency_levels, pairs)
+
+        print(f"\nJSON helpers ({json_iterations} calls per case):")
+        results["json_helpers"] = bench_json_helpers(matcher, json_iterations)
+
+        results["metadata"]["fake_server_requests"] = server.requests
+        if hedger is not None:
+            hedger.close()
+            results["hedging"] = hedger.stats()
+            print(f"\nHedging: {results['hedging']['hedges_fired']} of {results['hedging']['calls']} calls hedged "
+                  f"({results['hedging']['hedge_rate']:.1%}), hedge won {results['hedging']['hedges_won']} times")
+
+    return results
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark the Resume-JD Matcher against a local fake OpenAI server')
+    parser.add_argument('--latency', type=str, default='lognormal:0.05,0.5',
+                        help='Fake server latency distribution (default: lognormal:0.05,0.5)')
+    parser.add_argument('--iterations', type=int, default=20, help='Sequential calls per stage (default: 20)')
+    parser.add_argument('--concurrency', type=str, default='1,4,16',
+                        help='Comma-separated concurrency levels (default: 1,4,16)')
+    parser.add_argument('--pairs', type=int, default=40, help='Pairs per concurrency level (default: 40)')
+    parser.add_argument('--json-iterations', type=int, default=200,
+                        help='Calls per JSON helper and case (default: 200)')
+    parser.add_argument('--malformed-rate', type=float, default=0.0,
+                        help='Share of fake responses with damaged JSON (default: 0)')
+    parser.add_argument('--resume', type=str, help='Resume text file (default: bundled sample)')
+    parser.add_argument('--jd', type=str, help='Job description text file (default: bundled sample)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--output', type=str, default='bench_results.json',
+                        help='Where to save the JSON results (default: bench_results.json)')
+    parser.add_argument('--compare', type=str, help='Previous results JSON to compare against')
+    parser.add_argument('--hedge', type=float, metavar='PERCENTILE',
+                        help='Hedge model calls slower than this latency percentile (e.g. 95)')
+    parser.add_argument('--hedge-max-rate', type=float, default=0.1,
+                        help='Maximum share of calls that may be hedged (default: 0.1)')
+    parser.add_argument('--dedup-docs', type=int, metavar='N',
+                        help='Only benchmark near-duplicate detection on N synthetic resumes')
+    parser.add_argument('--dedup-threshold', type=float, default=0.9,
+                        help='Similarity threshold for --dedup-docs (default: 0.9)')
+    parser.add_argument('--retrieval-docs', type=int, metavar='N',
+                        help='Only benchmark job description retrieval on N synthetic postings')
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmark suite from the command line."""
+    args = parse_args()
+    if args.dedup_docs or args.retrieval_docs:
+        results = {
+            "metadata": {"git_commit": _git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                         "python": sys.version.split()[0], "platform": platform.platform()}
+        }
+        if args.dedup_docs:
+            print(f"Near-duplicate detection ({args.dedup_docs} synthetic resumes):")
+            results["dedup"] = bench_dedup(args.dedup_docs, threshold=args.dedup_threshold, seed=args.seed)
+        if args.retrieval_docs:
+            print(f"Job description retrieval ({args.retrieval_docs} synthetic postings):")
+            results["retrieval"] = bench_retrieval(args.retrieval_docs, seed=args.seed)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBenchmark results saved to {args.output}")
+        return
+
+    results = run_benchmark(
+        latency=args.latency,
+        iterations=args.iterations,
+        concurrency_levels=[int(level) for level in args.concurrency.split(',') if level],
+        pairs=args.pairs,
+        json_iterations=args.json_iterations,
+        malformed_rate=args.malformed_rate,
+        resume_file=args.resume,
+        jd_file=args.jd,
+        seed=args.seed,
+        hedge_percentile=args.hedge,
+        hedge_max_rate=args.hedge_max_rate
+    )
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nBenchmark results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_results(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Circuit breaker for model calls.
+
+When the API degrades, every call waits for the full client timeout before
+failing, so the web app and batch jobs grind through slow failures. The breaker
+counts consecutive failures and latency breaches (calls slower than a
+threshold); once there are enough of them it opens, and calls are refused
+immediately with CircuitOpenError. The matcher then answers from the local
+heuristic scorer (heuristic_scorer.py) and marks the result as degraded.
+
+After reset_timeout seconds the breaker lets a single probe call through
+(half-open). A successful, fast probe closes it again; anything else reopens it
+for another reset_timeout.
+
+Enabled by default for every matcher; configure it with MATCHER_BREAKER_FAILURES
+(0 disables it), MATCHER_BREAKER_LATENCY and MATCHER_BREAKER_RESET.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the model while the circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, latency_threshold: Optional[float] = None,
+                 reset_timeout: float = 30.0, clock=time.monotonic):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures or latency breaches that open the circuit
+            latency_threshold (float, optional): Seconds after which a successful call still counts
+                                                 as a breach; None only counts errors
+            reset_timeout (float): Seconds the circuit stays open before a probe call is let through
+            clock (Callable[[], float]): Monotonic time source
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._stats = {"calls": 0, "failures": 0, "latency_breaches": 0, "rejected": 0, "opened": 0, "probes": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["CircuitBreaker"]:
+        """
+        Build a circuit breaker from MATCHER_BREAKER_FAILURES, MATCHER_BREAKER_LATENCY and
+        MATCHER_BREAKER_RESET.
+
+        Returns:
+            Optional[CircuitBreaker]: A breaker (with defaults for unset variables), or None if
+                                      MATCHER_BREAKER_FAILURES is 0
+        """
+        failures = int(os.environ.get("MATCHER_BREAKER_FAILURES", "5"))
+        if failures <= 0:
+            return None
+        latency = os.environ.get("MATCHER_BREAKER_LATENCY")
+        return cls(failure_threshold=failures,
+                   latency_threshold=float(latency) if latency else None,
+                   reset_timeout=float(os.environ.get("MATCHER_BREAKER_RESET", "30")))
+
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half_open" (open with the reset timeout elapsed)."""
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Decide whether a call may go to the model, reserving the probe slot when half-open.
+
+        Every allowed call must be followed by record_success or record_failure.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                self._stats["calls"] += 1
+                return True
+            if self._clock() - self._opened_at >= self.reset_timeout and not self._probe_in_flight:
+                self._state = HALF_OPEN
+                self._probe_in_flight = True
+                self._stats["calls"] += 1
+                self._stats["probes"] += 1
+                logger.info("Circuit half-open: sending a probe call")
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self, latency: float) -> None:
+        """Record a call that returned; a call slower than latency_threshold counts as a breach."""
+        if self.latency_threshold is not None and latency > self.latency_threshold:
+            with self._lock:
+                self._stats["latency_breaches"] += 1
+            self._record_breach(f"call took {latency:.1f}s, over the {self.latency_threshold:.1f}s threshold")
+            return
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit closed: probe call succeeded")
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """Record a call that raised."""
+        with self._lock:
+            self._stats["failures"] += 1
+        self._record_breach(f"call failed: {error}" if error is not None else "call failed")
+
+    def _record_breach(self, reason: str) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == CLOSED and self._consecutive_failures < self.failure_threshold:
+                return
+            # Threshold reached, or a failure while not closed (e.g. the probe): (re)open for another reset_timeout
+            if self._state == CLOSED:
+                logger.warning(f"Circuit opened after {self._consecutive_failures} consecutive failures; last {reason}")
+            else:
+                logger.warning(f"Circuit reopened: {reason}")
+            self._state = OPEN
+            self._opened_at = self._clock()
+            self._probe_in_flight = False
+            self._stats["opened"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the breaker's state and counters."""
+        state = self.state
+        with self._lock:
+            stats = dict(self._stats)
+            stats["consecutive_failures"] = self._consecutive_failures
+        stats["state"] = state
+        return stats
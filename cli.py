@@ -1,29 +1,62 @@
 #!/usr/bin/env python
 import argparse
 import json
-import os
-from dotenv import load_dotenv
-from resume_jd_matcher import ResumeJDMatcher
 
-# Load environment variables from .env file if it exists
-load_dotenv()
+# Heavy modules (dotenv, openai via resume_jd_matcher) are imported inside main()
+# once the command is known, so --help and argument errors return immediately.
 
 def read_file_content(file_path):
-    """Read content from a file."""
+    """Read the text of a resume or job description (.txt, .docx or .pdf)."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        from ingestion import extract_text
+        return extract_text(file_path)
     except Exception as e:
         print(f"Error reading file {file_path}: {e}")
         return None
 
+def score_band(value):
+    """Read a LOW,HIGH band of percent scores for --escalation-band."""
+    try:
+        low, high = (float(part) for part in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected LOW,HIGH percent scores such as 50,75, got '{value}'")
+    if not 0 <= low <= high <= 100:
+        raise argparse.ArgumentTypeError(f"expected 0 <= LOW <= HIGH <= 100, got '{value}'")
+    return low, high
+
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description='Resume-Job Description Matching Tool')
-    parser.add_argument('--resume', type=str, help='Path to resume text file')
-    parser.add_argument('--jd', type=str, help='Path to job description text file')
-    parser.add_argument('--output', type=str, help='Path to save output JSON (optional)')
+    parser.add_argument('--resume', type=str, help='Path to resume file (.txt, .docx or .pdf)')
+    parser.add_argument('--jd', type=str, help='Path to job description file (.txt, .docx or .pdf)')
+    parser.add_argument('--output', type=str,
+                        help='Save the full results: .json writes one indented file; .jsonl, .jsonl.gz, .jsonl.zst '
+                             'or .msgpack appends records to a result file (optional)')
     parser.add_argument('--api-key', type=str, help='OpenAI API key (optional, can use OPENAI_API_KEY env var)')
+    parser.add_argument('--local-skills', action='store_true',
+                        help='Low-cost mode: score the skills category locally instead of with the model')
+    parser.add_argument('--skills-prefilter', type=int, metavar='SCORE',
+                        help='Skip model calls when the local skills score (0-100) is below SCORE')
+    parser.add_argument('--parse-model', type=str, help='Model for parsing resumes and job descriptions')
+    parser.add_argument('--match-model', type=str, help='Model for the (first-pass) match')
+    parser.add_argument('--escalation-model', type=str,
+                        help='Stronger model that re-matches pairs with a borderline first-pass score')
+    parser.add_argument('--max-concurrent-calls', type=int, metavar='N',
+                        help='Cap model calls in flight; waiting calls are served interactive first, then batch, '
+                             'then background, taking turns between tenants')
+    parser.add_argument('--escalation-band', type=score_band, default='50,75', metavar='LOW,HIGH',
+                        help='Final_match scores (percent) that are escalated (default: 50,75)')
+    parser.add_argument('--scores-only', action='store_true',
+                        help='Match without the reasoning paragraphs (levels and scores only); '
+                             'explain single pairs later with the explain command')
+    parser.add_argument('--max-reasks', type=int, default=1, metavar='N',
+                        help='Ask a stage again up to N times when its reply is not usable JSON (default: 1)')
+    parser.add_argument('--trace', type=str, metavar='PATH',
+                        help='Record tracing spans of every stage: PATH.json is a Chrome trace '
+                             '(chrome://tracing, ui.perfetto.dev), any other PATH JSON lines')
+    parser.add_argument('--profile', type=str, metavar='PATH',
+                        help='Run under cProfile and write the stats to PATH (e.g. profile.prof, for snakeviz or '
+                             'flameprof); profiles the main thread')
     
     subparsers = parser.add_subparsers(dest='command', help='Commands')
     
@@ -32,14 +65,308 @@ def parse_args():
     test_parser.add_argument('--position', type=int, choices=[0, 1, 2, 3], 
                             default=3, help='Job position to test (0-3, default: 3)')
     
+    # Command for matching directories of resumes against directories of job descriptions
+    batch_parser = subparsers.add_parser('batch', help='Match many resumes against many job descriptions')
+    batch_parser.add_argument('--resumes', type=str, required=True,
+                              help='Resume directory, glob pattern (quote it) or file')
+    batch_parser.add_argument('--jds', type=str, required=True,
+                              help='Job description directory, glob pattern (quote it) or file')
+    batch_parser.add_argument('--output', type=str, required=True,
+                              help='Result file that results are appended to (.jsonl, .jsonl.gz, .jsonl.zst or .msgpack)')
+    batch_parser.add_argument('--workers', type=int, default=4,
+                              help='Number of pairs processed concurrently (default: 4)')
+    batch_parser.add_argument('--checkpoint', type=str,
+                              help='Checkpoint file (default: <output>.checkpoint)')
+    batch_parser.add_argument('--restart', action='store_true',
+                              help='Ignore the checkpoint and overwrite the output')
+    batch_parser.add_argument('--extract-workers', type=int,
+                              help='Processes extracting text from PDF/DOCX/TXT files (default: number of CPUs)')
+    batch_parser.add_argument('--priority', choices=['batch', 'background'], default='batch',
+                              help='Scheduling class of the batch model calls (default: batch)')
+    batch_parser.add_argument('--dedup-threshold', type=float, metavar='SIMILARITY',
+                              help='Skip model calls for resumes at least this similar (0-1, e.g. 0.9) '
+                                   'to one already matched in the run')
+    
+    # Commands for retrieving the best job descriptions for a resume from a large corpus
+    index_parser = subparsers.add_parser('index', help='Build a retrieval index of job descriptions')
+    index_parser.add_argument('--jds', type=str, required=True,
+                              help='Job description directory, glob pattern (quote it) or file')
+    index_parser.add_argument('--output', type=str, required=True, help='Index file to write')
+    index_parser.add_argument('--extract-workers', type=int,
+                              help='Processes extracting text from PDF/DOCX/TXT files (default: number of CPUs)')
+    retrieve_parser = subparsers.add_parser('retrieve',
+                                            help='Match a resume against the closest job descriptions of an index')
+    retrieve_parser.add_argument('--resume', type=str, required=True, help='Path to resume file (.txt, .docx or .pdf)')
+    retrieve_parser.add_argument('--index', type=str, required=True, help='Index file built with the index command')
+    retrieve_parser.add_argument('--top', type=int, default=5,
+                                 help='Job descriptions to retrieve and match (default: 5)')
+    retrieve_parser.add_argument('--no-match', action='store_true',
+                                 help='Only list the retrieved job descriptions; make no model calls')
+    
+    # Command for streaming a large JSONL/CSV export through the matcher
+    stream_parser = subparsers.add_parser('stream', help='Match the rows of a large JSONL or CSV export')
+    stream_parser.add_argument('--input', type=str, required=True,
+                               help='JSONL or CSV file (optionally .gz), or - for JSONL on stdin')
+    stream_parser.add_argument('--output', type=str, required=True,
+                               help='Result file that results are appended to (.jsonl, .jsonl.gz, .jsonl.zst or .msgpack)')
+    stream_parser.add_argument('--jd', type=str,
+                               help='Job description file every row is matched against (default: each row\'s --jd-field)')
+    stream_parser.add_argument('--resume-field', type=str, default='resume', help='Field with the resume text (default: resume)')
+    stream_parser.add_argument('--jd-field', type=str, default='jd', help='Field with the job description text (default: jd)')
+    stream_parser.add_argument('--id-field', type=str, default='id', help='Field identifying each row (default: id)')
+    stream_parser.add_argument('--workers', type=int, default=4, help='Number of rows processed concurrently (default: 4)')
+    stream_parser.add_argument('--max-in-flight', type=int,
+                               help='Rows read but not yet written; reading pauses at this limit (default: 2 x workers)')
+    stream_parser.add_argument('--priority', choices=['batch', 'background'], default='batch',
+                               help='Scheduling class of the model calls (default: batch)')
+    
+    # Command for writing the reasoning of a scores-only pair on demand
+    explain_parser = subparsers.add_parser('explain', help='Write the reasoning of a pair matched with --scores-only')
+    explain_parser.add_argument('--pair-id', type=str, required=True, help='Pair to explain (pair_id of a batch result)')
+    explain_parser.add_argument('--results', type=str,
+                                help='Batch result file to load pairs from into the pair store first')
+    explain_parser.add_argument('--store', type=str, default='pair_store.db',
+                                help='Pair store holding matched pairs and cached explanations (default: pair_store.db)')
+    
+    # Command for converting JSON outputs to a memory-mapped corpus file
+    corpus_parser = subparsers.add_parser('corpus', help='Convert parsed resumes or JDs in JSON outputs to a corpus file')
+    corpus_parser.add_argument('--inputs', type=str, required=True,
+                               help='Directory, glob pattern (quote it) or file of .json outputs or result files')
+    corpus_parser.add_argument('--kind', choices=['resume', 'jd'], default='resume',
+                               help='Convert the parsed resumes or the parsed job descriptions (default: resume)')
+    corpus_parser.add_argument('--output', type=str, required=True, help='Corpus file to write')
+    
     return parser.parse_args()
 
+def save_results(path, results):
+    """Save a result (or list of results) to an indented .json file, or append it to a result file."""
+    try:
+        if path.lower().endswith('.json'):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+        else:
+            from result_sinks import open_sink
+            with open_sink(path) as sink:
+                for record in (results if isinstance(results, list) else [results]):
+                    sink.write(record)
+        print(f"\nFull results saved to {path}")
+    except Exception as e:
+        print(f"Error saving output: {e}")
+
+def build_matcher(args, matcher_class):
+    """Create the matcher from the global command line options."""
+    stage_models = {}
+    if args.parse_model:
+        stage_models.update(parse_resume=args.parse_model, parse_job_description=args.parse_model)
+    if args.match_model:
+        stage_models['match_resume_to_jd'] = args.match_model
+    scheduler = None
+    if args.max_concurrent_calls:
+        from scheduler import FairScheduler
+        scheduler = FairScheduler(args.max_concurrent_calls)
+    return matcher_class(api_key=args.api_key,
+                         local_skills=args.local_skills,
+                         skills_prefilter_threshold=args.skills_prefilter,
+                         stage_models=stage_models,
+                         escalation_model=args.escalation_model,
+                         escalation_band=args.escalation_band,
+                         scheduler=scheduler,
+                         max_reasks=args.max_reasks,
+                         scores_only=args.scores_only)
+
+def print_cascade_report(matcher):
+    """Print per-stage models and the escalation rate when a cascade is configured."""
+    if not matcher.escalation_model:
+        return
+    report = matcher.cascade_report()
+    models = ", ".join(f"{stage}: {model}" for stage, model in report['stage_models'].items())
+    print(f"Models: {models}; escalation: {report['escalation_model']} "
+          f"for scores {report['escalation_band'][0]:g}-{report['escalation_band'][1]:g}%")
+    print(f"Escalated {report['escalated']} of {report['matches']} matches ({report['escalation_rate']:.1%})")
+
+def print_json_resolution_report(matcher):
+    """Print how replies were decoded into JSON when any needed more than a plain parse."""
+    report = matcher.json_resolution_report()
+    for stage, stats in report.items():
+        if stats['paths']['clean_parse'] == stats['responses'] and not stats['reasks']:
+            continue
+        paths = ", ".join(f"{path} {count} ({stats['cpu_ms'][path]:.1f} ms)"
+                          for path, count in stats['paths'].items() if count)
+        reasks = f"; {stats['reasks_resolved']} of {stats['reasks']} re-asks resolved" if stats['reasks'] else ""
+        print(f"JSON {stage}: {paths}{reasks}")
+
+def run_batch(args, matcher_class):
+    """Run the batch subcommand."""
+    from batch_runner import BatchRunner, expand_inputs
+    
+    resume_paths = expand_inputs(args.resumes)
+    jd_paths = expand_inputs(args.jds)
+    if not resume_paths or not jd_paths:
+        print(f"Error: found {len(resume_paths)} resume(s) and {len(jd_paths)} job description(s).")
+        print("Check the --resumes and --jds directories or glob patterns.")
+        return
+    
+    print(f"Matching {len(resume_paths)} resume(s) against {len(jd_paths)} job description(s) "
+          f"with {args.workers} worker(s)...")
+    matcher = build_matcher(args, matcher_class)
+    runner = BatchRunner(matcher, workers=args.workers, extract_workers=args.extract_workers,
+                         dedup_threshold=args.dedup_threshold, priority=args.priority)
+    summary = runner.run(resume_paths, jd_paths, args.output,
+                         checkpoint_path=args.checkpoint, restart=args.restart)
+    
+    print(f"\nDone: {summary['processed']} processed, {summary['skipped']} skipped (checkpoint), "
+          f"{summary['duplicates']} near-duplicates, {summary['degraded']} degraded, {summary['failed']} failed "
+          f"in {summary['elapsed_s']}s")
+    print(f"Results streamed to {args.output}")
+    print_cascade_report(matcher)
+    print_json_resolution_report(matcher)
+
+def run_stream(args, matcher_class):
+    """Run the stream subcommand."""
+    from result_sinks import open_sink
+    from stream_runner import StreamRunner, iter_records
+    
+    jd_content = None
+    if args.jd:
+        jd_content = read_file_content(args.jd)
+        if not jd_content:
+            return
+    
+    matcher = build_matcher(args, matcher_class)
+    runner = StreamRunner(matcher, workers=args.workers, max_in_flight=args.max_in_flight,
+                          resume_field=args.resume_field, jd_field=args.jd_field, id_field=args.id_field,
+                          priority=args.priority)
+    print(f"Streaming {args.input} with {runner.workers} worker(s), at most {runner.max_in_flight} row(s) in flight...")
+    with open_sink(args.output) as sink:
+        summary = runner.run(iter_records(args.input), sink, jd_text=jd_content)
+    
+    print(f"\nDone: {summary['processed']} processed, {summary['degraded']} degraded, {summary['failed']} failed "
+          f"of {summary['read']} rows in {summary['elapsed_s']}s")
+    print(f"Results appended to {args.output}")
+    print_cascade_report(matcher)
+    print_json_resolution_report(matcher)
+
+def run_index(args):
+    """Run the index subcommand."""
+    import time
+    from batch_runner import expand_inputs
+    from ingestion import iter_documents
+    from jd_index import JDIndex
+    
+    jd_paths = expand_inputs(args.jds)
+    if not jd_paths:
+        print("Error: no job descriptions found. Check the --jds directory or glob pattern.")
+        return
+    
+    print(f"Indexing {len(jd_paths)} job description(s)...")
+    start = time.perf_counter()
+    documents = []
+    for document in iter_documents(jd_paths, workers=args.extract_workers):
+        if document["error"]:
+            print(f"Skipping {document['path']}: {document['error']}")
+        else:
+            documents.append((document["path"], document["text"]))
+    # Extraction finishes in completion order; sort so the same inputs give the same index
+    index = JDIndex.build(sorted(documents))
+    index.save(args.output)
+    print(f"Indexed {len(index)} job description(s) in {time.perf_counter() - start:.1f}s; saved to {args.output}")
+
+def run_corpus(args):
+    """Run the corpus subcommand."""
+    from batch_runner import expand_inputs
+    from corpus import convert_json_outputs
+    
+    paths = expand_inputs(args.inputs, extensions=('.json', '.jsonl', '.jsonl.gz', '.jsonl.zst', '.msgpack'))
+    if not paths:
+        print("Error: no .json or result files found. Check the --inputs directory or glob pattern.")
+        return
+    count = convert_json_outputs(paths, args.output, kind=args.kind)
+    print(f"Wrote {count} parsed {'resume' if args.kind == 'resume' else 'job description'}(s) "
+          f"from {len(paths)} file(s) to {args.output}")
+
+def run_retrieve(args, matcher_class):
+    """Run the retrieve subcommand."""
+    from jd_index import JDIndex
+    
+    resume_content = read_file_content(args.resume)
+    if not resume_content:
+        return
+    
+    index = JDIndex.load(args.index)
+    try:
+        if args.no_match:
+            for key, similarity in index.query(resume_content, args.top):
+                print(f"{similarity:.4f}  {key}")
+            return
+        
+        matcher = build_matcher(args, matcher_class)
+        print(f"Matching the resume against the {args.top} closest of {len(index)} job description(s)...")
+        results = matcher.match_top_jds(resume_content, index, top_n=args.top)
+    finally:
+        index.close()
+    
+    for result in results:
+        final = result["matching_result"].get("Final_match", {})
+        note = " (degraded)" if result.get("degraded") else ""
+        print(f"{final.get('Final_match_score', 'n/a'):>5}  similarity {result['similarity']:.4f}  {result['jd']}{note}")
+    print_cascade_report(matcher)
+    
+    if args.output:
+        save_results(args.output, results)
+
+def run_explain(args, matcher_class):
+    """Run the explain subcommand."""
+    from pair_store import PairStore
+    
+    with PairStore(args.store) as store:
+        if args.results:
+            print(f"Loaded {store.import_results(args.results)} pair(s) from {args.results} into {args.store}")
+        if store.get(args.pair_id) is None:
+            print(f"Error: pair {args.pair_id} is not in {args.store}. Load its batch results with --results.")
+            return
+        matcher = build_matcher(args, matcher_class)
+        result = store.explain(matcher, args.pair_id)
+    
+    print(json.dumps(result, indent=2))
+    if args.output:
+        save_results(args.output, {"pair_id": args.pair_id, "matching_result": result})
+
 def main():
     """Main function to run the resume-job description matcher."""
     args = parse_args()
+    if args.trace:
+        from tracing import configure_tracing
+        configure_tracing(args.trace)
+    if not args.profile:
+        run_command(args)
+        return
     
-    # Initialize the matcher with API key
-    matcher = ResumeJDMatcher(api_key=args.api_key)
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run_command, args)
+    finally:
+        profiler.dump_stats(args.profile)
+        print(f"\nProfile saved to {args.profile}; top functions by cumulative time:")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+
+def run_command(args):
+    """Run the selected command (or the single-pair match)."""
+    # Local only: no model, no API key
+    if args.command == 'index':
+        run_index(args)
+        return
+    if args.command == 'corpus':
+        run_corpus(args)
+        return
+    
+    # Load environment variables from .env file if it exists
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    from resume_jd_matcher import ResumeJDMatcher, configure_logging
+    configure_logging()
     
     if args.command == 'test':
         # Import the test function and run it
@@ -49,6 +376,22 @@ def main():
         test_with_sample_data(position_index=position)
         return
     
+    if args.command == 'batch':
+        run_batch(args, ResumeJDMatcher)
+        return
+    
+    if args.command == 'retrieve':
+        run_retrieve(args, ResumeJDMatcher)
+        return
+    
+    if args.command == 'stream':
+        run_stream(args, ResumeJDMatcher)
+        return
+    
+    if args.command == 'explain':
+        run_explain(args, ResumeJDMatcher)
+        return
+    
     # Check if resume and job description files are provided
     if not args.resume or not args.jd:
         print("Error: Both resume and job description files must be provided.")
@@ -66,6 +409,9 @@ def main():
     if not jd_content:
         return
     
+    # Initialize the matcher with API key
+    matcher = build_matcher(args, ResumeJDMatcher)
+    
     print("Processing resume and job description...")
     result = matcher.process_resume_and_jd(resume_content, jd_content)
     
@@ -73,15 +419,13 @@ def main():
     if "matching_result" in result and "error" not in result["matching_result"]:
         print("\nMatching Result:")
         print(json.dumps(result["matching_result"], indent=2))
+        if result.get("degraded"):
+            print("\nNote: the model was unavailable; this is a local heuristic estimate (degraded).")
+        print_cascade_report(matcher)
         
         # Save output to file if requested
         if args.output:
-            try:
-                with open(args.output, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, indent=2)
-                print(f"\nFull results saved to {args.output}")
-            except Exception as e:
-                print(f"Error saving output: {e}")
+            save_results(args.output, result)
     else:
         print("Error in matching:", result.get("matching_result", {}).get("error", "Unknown error"))
 
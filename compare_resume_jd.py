@@ -1,13 +1,16 @@
 import os
-from resume_jd_matcher import ResumeJDMatcher
+from resume_jd_matcher import ResumeJDMatcher, configure_logging
+from ingestion import extract_text
+from result_sinks import open_sink
 
-def compare_files(resume_file, jd_file):
+def compare_files(resume_file, jd_file, output=os.path.join("comparison_of_the_samples", "comparison_results.jsonl")):
     """
     Compare a resume file with a job description file using ResumeJDMatcher.
     
     Args:
         resume_file (str): Path to the resume file
         jd_file (str): Path to the job description file
+        output (str): Result file the matching result is appended to (see result_sinks.py)
     """
     print(f"\n{'='*80}")
     print(f"Comparing resume: {resume_file}")
@@ -23,12 +26,9 @@ def compare_files(resume_file, jd_file):
         print(f"Error: Job description file '{jd_file}' not found.")
         return
     
-    # Read file contents
-    with open(resume_file, 'r', encoding='utf-8') as f:
-        resume_text = f.read()
-    
-    with open(jd_file, 'r', encoding='utf-8') as f:
-        jd_text = f.read()
+    # Extract text (.txt, .docx or .pdf)
+    resume_text = extract_text(resume_file)
+    jd_text = extract_text(jd_file)
     
     # Initialize matcher
     matcher = ResumeJDMatcher()
@@ -63,17 +63,16 @@ def compare_files(resume_file, jd_file):
         
         print(f"\n{'='*80}")
         
-        # Save the JSON to a file for easy access
-        output_file = os.path.join("comparison_of_the_samples", "updated_comparison_result.json")
-        import json
-        with open(output_file, "w") as f:
-            json.dump(matching_json, f, indent=2)
-        print(f"The JSON result has been saved to '{output_file}'")
+        # Append the JSON to the result file for easy access
+        with open_sink(output) as sink:
+            sink.write({"resume": resume_file, "jd": jd_file, "matching_result": matching_json})
+        print(f"The JSON result has been appended to '{output}'")
     else:
         print("Error in matching:", result.get("matching_result", {}).get("error", "Unknown error"))
 
 # Compare the sample resume with the sample job description
 if __name__ == "__main__":
+    configure_logging()
     resume_file = os.path.join("comparison_of_the_samples", "sample_resume.txt")
     jd_file = os.path.join("comparison_of_the_samples", "sample_jd_google.txt")
     compare_files(resume_file, jd_file) 
\ No newline at end of file
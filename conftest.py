@@ -0,0 +1,17 @@
+"""
+Fixtures shared by the pytest suites of the concurrency helpers.
+"""
+import time
+
+import pytest
+
+
+@pytest.fixture
+def wait_until():
+    """Return a function that polls a predicate until it holds, failing the test after a timeout."""
+    def wait(predicate, timeout: float = 2.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            assert time.monotonic() < deadline, "timed out waiting for the condition"
+            time.sleep(0.005)
+    return wait
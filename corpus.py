@@ -0,0 +1,369 @@
+"""
+Compact, memory-mapped corpus files for parsed resumes and job descriptions.
+
+Loading thousands of parsed documents from pretty-printed JSON files means a
+json.load per file and every dict held in memory, even when a job only needs
+to filter on years of experience or skills. A corpus file stores the same
+parse results (the dicts returned by parse_resume and parse_job_description)
+in one file:
+
+- String tables (document keys, compact JSON of each parse result, skill names):
+  a blob plus an array of offsets, so document i is the bytes between offsets
+  i and i + 1 and is decoded only when it is asked for.
+- Fixed-width columns, one value per document: years of experience (claimed by
+  a resume, or required by a job description; NaN if unknown), degree level
+  (0 none to 4 doctorate) and skill ids (an offset-indexed id list into the
+  skill name table, from the local skills engine).
+
+Corpus.load() memory-maps the file and exposes the columns as memoryviews, so
+opening a corpus costs the same for ten documents as for a million, and
+Corpus.select() filters on the columns without decoding any JSON.
+
+Files are written with write_corpus(), or converted from the JSON outputs of
+cli.py --output, test runs and cli.py batch with convert_json_outputs()
+(`python cli.py corpus ...`).
+"""
+import json
+import math
+import mmap
+import re
+import struct
+import sys
+from array import array
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from heuristic_scorer import degree_level, document_text, years_of_experience, years_required
+from result_sinks import read_results
+from skills_engine import SkillsEngine
+
+_MAGIC = b"RJCP"
+_FORMAT_VERSION = 1
+KINDS = ("resume", "jd")
+# magic, format version, byte order (0 little, 1 big), kind, documents, skills, skill references,
+# document table bytes, key table bytes, skill name table bytes
+_HEADER = struct.Struct("<4sIIIIIIQQQ")
+
+# Parse result field of each kind in the JSON outputs, and the source path field of batch records
+_RESULT_FIELDS = {"resume": ("parsed_resume", "resume"), "jd": ("parsed_job_description", "jd")}
+# Fields of pipeline outputs that are not parse results themselves
+_PIPELINE_FIELDS = frozenset({"parsed_resume", "parsed_job_description", "matching_result", "Final_match"})
+# More years than this in a years-of-experience field is a calendar year (e.g. a graduation year)
+MAX_YEARS = 60
+
+
+def _pad(f, alignment: int = 8) -> None:
+    """Pad the file to the next multiple of `alignment` so the following column is aligned."""
+    f.write(bytes(-f.tell() % alignment))
+
+
+def _years_value(value: Any) -> Optional[float]:
+    """Return the number of years in a field value (8, "8", "8+ years"), or None for calendar years like 2019."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    match = re.search(r"\d+(?:\.\d+)?", str(value))
+    if match is None:
+        return None
+    years = float(match.group())
+    return years if years <= MAX_YEARS else None
+
+
+def _years_field(document: Any) -> Optional[float]:
+    """
+    Return a numeric years-of-experience field of a parse result (e.g. "Total Years of Experience": 8), if any.
+
+    Fields closer to the top level win, so "Total Years of Experience" is preferred over a
+    nested per-job field, and fields like Education[].Graduation Year are never used.
+    """
+    level = [document]
+    while level:
+        nested = []
+        for value in level:
+            if isinstance(value, dict):
+                for name, field in value.items():
+                    name = str(name).lower()
+                    if "year" in name and "experience" in name:
+                        years = _years_value(field)
+                        if years is not None:
+                            return years
+                    nested.append(field)
+            elif isinstance(value, list):
+                nested.extend(value)
+        level = nested
+    return None
+
+
+def write_corpus(path: str, documents: Iterable[Tuple[str, Dict[str, Any]]], kind: str = "resume",
+                 skills_engine: Optional[SkillsEngine] = None) -> int:
+    """
+    Write parse results to a corpus file.
+
+    Documents are streamed to the file; only the keys and columns are kept in memory.
+
+    Args:
+        path (str): Corpus file to write
+        documents (Iterable[Tuple[str, Dict[str, Any]]]): (key, parse result) pairs, e.g. (file path, parsed resume)
+        kind (str): "resume" or "jd"; decides whether the years column holds claimed or required years
+        skills_engine (SkillsEngine, optional): Skills engine for the skill id column
+
+    Returns:
+        int: Number of documents written
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown corpus kind {kind!r}; expected one of {', '.join(KINDS)}")
+    skills_engine = skills_engine or SkillsEngine()
+    document_offsets, key_offsets = array("Q", [0]), array("Q", [0])
+    years, degrees = array("f"), array("B")
+    skill_offsets, skill_refs = array("I", [0]), array("I")
+    skill_ids: Dict[str, int] = {}
+    keys = bytearray()
+
+    with open(path, "wb") as f:
+        f.write(bytes(_HEADER.size))
+        for key, document in documents:
+            encoded = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            f.write(encoded)
+            document_offsets.append(document_offsets[-1] + len(encoded))
+            keys += key.encode("utf-8")
+            key_offsets.append(len(keys))
+
+            text = document_text(document)
+            value = _years_field(document)
+            if value is None:
+                value = years_of_experience(text) if kind == "resume" else years_required(text)
+            years.append(math.nan if value is None else value)
+            degrees.append(degree_level(text)[0])
+            for skill in skills_engine.extract_skills(document):
+                skill_refs.append(skill_ids.setdefault(skill, len(skill_ids)))
+            skill_offsets.append(len(skill_refs))
+        document_bytes = document_offsets[-1]
+
+        skill_names = bytearray()
+        skill_name_offsets = array("Q", [0])
+        for skill in skill_ids:
+            skill_names += skill.encode("utf-8")
+            skill_name_offsets.append(len(skill_names))
+
+        # Columns are written in native byte order so load() can use them in place
+        for column in (document_offsets, key_offsets, skill_name_offsets, years, skill_offsets, skill_refs, degrees):
+            _pad(f)
+            f.write(column.tobytes())
+        f.write(keys)
+        f.write(skill_names)
+
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, 0 if sys.byteorder == "little" else 1, KINDS.index(kind),
+                             len(years), len(skill_ids), len(skill_refs), document_bytes, len(keys), len(skill_names)))
+    return len(years)
+
+
+def iter_json_outputs(paths: Iterable[str], kind: str = "resume") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Read parse results from JSON output files.
+
+    Accepts .json files with one result or a bare parse result (cli.py --output), and result
+    files of any sink format (cli.py batch, test runs; see result_sinks.py). Each document is
+    yielded once, keyed by its source path in result files and by the file path otherwise;
+    failed parses are skipped.
+
+    Args:
+        paths (Iterable[str]): .json files and result files
+        kind (str): "resume" or "jd"
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: (key, parse result) pairs
+    """
+    result_field, source_field = _RESULT_FIELDS[kind]
+    seen = set()
+    for path in paths:
+        if path.lower().endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                records = [(path, json.load(f))]
+        else:
+            # Batch records nest the pipeline output under "result"; test runs store it inline
+            records = ((record.get(source_field) or path, record.get("result", record))
+                       for record in read_results(path))
+        for key, record in records:
+            if not isinstance(record, dict) or key in seen:
+                continue
+            if result_field in record:
+                document = record[result_field]
+            elif _PIPELINE_FIELDS.isdisjoint(record):
+                # A bare parse result
+                document = record
+            else:
+                continue
+            if isinstance(document, dict) and document and "error" not in document:
+                seen.add(key)
+                yield key, document
+
+
+def convert_json_outputs(paths: Iterable[str], output: str, kind: str = "resume",
+                         skills_engine: Optional[SkillsEngine] = None) -> int:
+    """
+    Convert JSON outputs (see iter_json_outputs) to a corpus file.
+
+    Returns:
+        int: Number of documents written
+    """
+    return write_corpus(output, iter_json_outputs(paths, kind), kind, skills_engine)
+
+
+class Corpus:
+    def __init__(self, path: str):
+        """
+        Open a corpus file; use Corpus.load(path) or `with Corpus.load(path) as corpus:`.
+
+        Raises:
+            ValueError: If the file is not a corpus or was written on a machine with another byte order
+        """
+        with open(path, "rb") as f:
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, byte_order, kind, documents, skills, skill_refs,
+         document_bytes, key_bytes, skill_name_bytes) = _HEADER.unpack_from(self._mapped, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            self._mapped.close()
+            raise ValueError(f"{path} is not a corpus file (format {_FORMAT_VERSION})")
+        if byte_order != (0 if sys.byteorder == "little" else 1):
+            self._mapped.close()
+            raise ValueError(f"{path} was written with another byte order; convert it again on this machine")
+        self.path = path
+        self.kind = KINDS[kind]
+
+        view = memoryview(self._mapped)
+        position = _HEADER.size
+
+        def take(size: int, aligned: bool = True) -> memoryview:
+            nonlocal position
+            if aligned:
+                position += -position % 8
+            section = view[position:position + size]
+            position += size
+            return section
+
+        self._documents = take(document_bytes, aligned=False)
+        self._document_offsets = take(8 * (documents + 1)).cast("Q")
+        self._key_offsets = take(8 * (documents + 1)).cast("Q")
+        self._skill_name_offsets = take(8 * (skills + 1)).cast("Q")
+        # Years of experience (NaN if unknown) and degree level (0-4) of each document
+        self.years = take(4 * documents).cast("f")
+        self._skill_offsets = take(4 * (documents + 1)).cast("I")
+        self._skill_refs = take(4 * skill_refs).cast("I")
+        self.degree_levels = take(documents).cast("B")
+        self._keys = take(key_bytes, aligned=False)
+        self._skill_names = take(skill_name_bytes, aligned=False)
+        self._views = [self._documents, self._document_offsets, self._key_offsets, self._skill_name_offsets,
+                       self.years, self._skill_offsets, self._skill_refs, self.degree_levels, self._keys,
+                       self._skill_names, view]
+        self._positions: Optional[Dict[str, int]] = None
+        self._skill_name_list: Optional[List[str]] = None
+
+    @classmethod
+    def load(cls, path: str) -> "Corpus":
+        """Memory-map a corpus file; nothing but the header is read until documents are accessed."""
+        return cls(path)
+
+    def __len__(self) -> int:
+        return len(self.years)
+
+    def __getitem__(self, number: int) -> Dict[str, Any]:
+        """Decode the parse result of document `number`."""
+        offsets = self._document_offsets
+        return json.loads(bytes(self._documents[offsets[number]:offsets[number + 1]]).decode("utf-8"))
+
+    def key(self, number: int) -> str:
+        """Return the key (e.g. source path) of document `number`."""
+        offsets = self._key_offsets
+        return bytes(self._keys[offsets[number]:offsets[number + 1]]).decode("utf-8")
+
+    def keys(self) -> List[str]:
+        """Return every document key, by document number."""
+        return [self.key(number) for number in range(len(self))]
+
+    def number(self, key: str) -> int:
+        """
+        Return the document number of a key (the lookup table is built on first use).
+
+        Raises:
+            KeyError: If no document has the key
+        """
+        if self._positions is None:
+            self._positions = {key: number for number, key in enumerate(self.keys())}
+        return self._positions[key]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the parse result stored under a key, or None."""
+        try:
+            return self[self.number(key)]
+        except KeyError:
+            return None
+
+    @property
+    def skill_names(self) -> List[str]:
+        """Skill name of every skill id (decoded on first use)."""
+        if self._skill_name_list is None:
+            offsets, names = self._skill_name_offsets, self._skill_names
+            self._skill_name_list = [bytes(names[offsets[i]:offsets[i + 1]]).decode("utf-8")
+                                     for i in range(len(offsets) - 1)]
+        return self._skill_name_list
+
+    def skill_ids(self, number: int) -> List[int]:
+        """Return the skill ids of document `number`."""
+        return self._skill_refs[self._skill_offsets[number]:self._skill_offsets[number + 1]].tolist()
+
+    def skills(self, number: int) -> List[str]:
+        """Return the skill names of document `number`."""
+        names = self.skill_names
+        return [names[skill_id] for skill_id in self.skill_ids(number)]
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (key, parse result) pairs, decoding one document at a time."""
+        for number in range(len(self)):
+            yield self.key(number), self[number]
+
+    def select(self, min_years: Optional[float] = None, max_years: Optional[float] = None,
+               min_degree: Optional[int] = None, skills: Iterable[str] = ()) -> List[int]:
+        """
+        Find documents by their columns without decoding them.
+
+        Args:
+            min_years (float, optional): Minimum years of experience (documents with unknown years are excluded)
+            max_years (float, optional): Maximum years of experience
+            min_degree (int, optional): Minimum degree level (1 associate, 2 bachelor's, 3 master's, 4 doctorate)
+            skills (Iterable[str]): Skills every selected document must have
+
+        Returns:
+            List[int]: Matching document numbers, in order
+        """
+        names = self.skill_names
+        wanted = {names.index(skill) if skill in names else -1 for skill in skills}
+        if -1 in wanted:
+            return []
+        numbers = range(len(self))
+        if min_years is not None or max_years is not None:
+            low = -math.inf if min_years is None else min_years
+            high = math.inf if max_years is None else max_years
+            years = self.years
+            # NaN (unknown) fails every comparison
+            numbers = [number for number in numbers if low <= years[number] <= high]
+        if min_degree is not None:
+            levels = self.degree_levels
+            numbers = [number for number in numbers if levels[number] >= min_degree]
+        if wanted:
+            numbers = [number for number in numbers if wanted.issubset(self.skill_ids(number))]
+        return list(numbers)
+
+    def close(self) -> None:
+        """Release the file mapping."""
+        if self._mapped is not None:
+            # The mapping can only be closed once no view of it remains
+            for view in self._views:
+                view.release()
+            self._views = []
+            self._mapped.close()
+            self._mapped = None
+
+    def __enter__(self) -> "Corpus":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,199 @@
+"""
+Near-duplicate resume detection with MinHash and locality-sensitive hashing.
+
+Candidates re-apply with lightly edited resumes and agencies submit the same
+resume several times. Each copy would otherwise cost a full parse and match, so
+the batch runner checks every resume against the ones already seen in the run
+and skips the model calls for near-duplicates.
+
+Documents are reduced to word shingles over normalized text (lowercased words,
+punctuation and layout dropped). Signatures use
+one-permutation MinHash: each shingle is hashed once and assigned to one of
+num_perm bins, so signing costs one hash per shingle instead of num_perm.
+Empty bins are filled by rotation densification. Signatures are split into
+bands; documents sharing any band are candidates, and candidates are confirmed
+by the estimated Jaccard similarity.
+
+Run `python benchmark.py --dedup-docs 100000` to measure throughput.
+"""
+import re
+import zlib
+from array import array
+from itertools import repeat
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_MASK = 0xFFFFFFFF
+_EMPTY = _MASK
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a document and split it into word tokens, dropping punctuation and layout."""
+    return _TOKEN.findall(text.lower())
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Choose the number of bands and rows per band for a similarity threshold.
+
+    Two documents with Jaccard similarity s become candidates with probability
+    1 - (1 - s^rows)^bands; the curve's midpoint (1/bands)^(1/rows) is placed
+    as close to the threshold as possible, biased slightly below it so that
+    true duplicates are rarely missed.
+
+    Args:
+        threshold (float): Similarity threshold between 0 and 1
+        num_perm (int): Signature length
+
+    Returns:
+        Tuple[int, int]: (bands, rows)
+    """
+    best, best_error = (1, num_perm), float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        error = abs(midpoint - threshold * 0.95)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 5):
+        """
+        Initialize the index.
+
+        Args:
+            threshold (float): Minimum estimated Jaccard similarity of word shingles for a near-duplicate
+            num_perm (int): MinHash signature length; longer signatures estimate similarity more precisely
+            shingle_size (int): Words per shingle
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be between 0 and 1")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+        self._offset = (1 << 32) // num_perm
+        self._keys: List[Any] = []
+        self._signatures = array("I")
+        self._buckets: List[Dict[int, Union[int, List[int]]]] = [{} for _ in range(self.bands)]
+        self.stats = {"documents": 0, "duplicates": 0, "candidates_checked": 0}
+
+    def signature(self, text: str) -> Optional[array]:
+        """
+        Compute the one-permutation MinHash signature of a document.
+
+        Returns:
+            Optional[array]: num_perm unsigned ints, or None for a document without words
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        k = min(self.shingle_size, len(tokens))
+        # A shingle's hash is the hash of its k token hashes; hashing a tuple of ints
+        # is deterministic and runs in C, unlike joining k words into a string
+        token_hashes = list(map(zlib.crc32, map(str.encode, tokens)))
+        shingle_hashes = map(_MASK.__and__, map(hash, zip(*(token_hashes[i:] for i in range(k)))))
+
+        # Each shingle hash picks a bin and a value; keep the smallest value per bin.
+        # Assigning in descending order leaves each bin holding its minimum.
+        n = self.num_perm
+        bins = {h % n: h // n for h in sorted(shingle_hashes, reverse=True)}
+        sig = array("I", map(bins.get, range(n), repeat(_EMPTY)))
+
+        # Rotation densification: an empty bin takes the next filled bin's value,
+        # shifted by the distance so that copies from different bins stay distinct
+        if _EMPTY in sig:
+            filled = [value for value in sig]
+            for i in range(n):
+                if filled[i] != _EMPTY:
+                    continue
+                for distance in range(1, n):
+                    source = filled[(i + distance) % n]
+                    if source != _EMPTY:
+                        sig[i] = source + distance * self._offset
+                        break
+        return sig
+
+    def similarity(self, sig_a: array, sig_b: array) -> float:
+        """Estimate the Jaccard similarity of two documents from their signatures."""
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / self.num_perm
+
+    def _band_keys(self, sig: array) -> List[int]:
+        rows = self.rows
+        return [hash(sig[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def _query(self, sig: array, band_keys: List[int]) -> Optional[Tuple[Any, float]]:
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, band_keys):
+            entry = bucket.get(band_key)
+            if entry is None:
+                continue
+            if isinstance(entry, int):
+                candidates.add(entry)
+            else:
+                candidates.update(entry)
+
+        best = None
+        n = self.num_perm
+        for doc in candidates:
+            self.stats["candidates_checked"] += 1
+            score = self.similarity(sig, self._signatures[doc * n:(doc + 1) * n])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (self._keys[doc], score)
+        return best
+
+    def query(self, text: str) -> Optional[Tuple[Any, float]]:
+        """
+        Find the most similar indexed document above the threshold.
+
+        Args:
+            text (str): Document text
+
+        Returns:
+            Optional[Tuple[Any, float]]: (key, estimated similarity) of the best match, or None
+        """
+        sig = self.signature(text)
+        if sig is None:
+            return None
+        return self._query(sig, self._band_keys(sig))
+
+    def add(self, key: Any, text: str) -> Optional[Tuple[Any, float]]:
+        """
+        Check a document against the index and index it if it is not a near-duplicate.
+
+        Only distinct documents are indexed, so every duplicate points at the
+        first document of its group rather than at another duplicate.
+
+        Args:
+            key: Identifier returned for this document by later matches (e.g. its path)
+            text (str): Document text
+
+        Returns:
+            Optional[Tuple[Any, float]]: (key, similarity) of the document this one duplicates, or None
+        """
+        self.stats["documents"] += 1
+        sig = self.signature(text)
+        if sig is None:
+            return None
+        band_keys = self._band_keys(sig)
+        match = self._query(sig, band_keys)
+        if match is not None:
+            self.stats["duplicates"] += 1
+            return match
+
+        doc = len(self._keys)
+        self._keys.append(key)
+        self._signatures.extend(sig)
+        for bucket, band_key in zip(self._buckets, band_keys):
+            entry = bucket.get(band_key)
+            if entry is None:
+                bucket[band_key] = doc
+            elif isinstance(entry, int):
+                bucket[band_key] = [entry, doc]
+            else:
+                entry.append(doc)
+        return None
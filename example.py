@@ -5,7 +5,7 @@ Example script demonstrating how to use the ResumeJDMatcher API directly.
 import json
 import os
 from dotenv import load_dotenv
-from resume_jd_matcher import ResumeJDMatcher
+from resume_jd_matcher import ResumeJDMatcher, configure_logging
 
 # Load environment variables from .env file
 load_dotenv()
@@ -83,4 +83,5 @@ def main():
 
 
 if __name__ == "__main__":
+    configure_logging()
     main() 
\ No newline at end of file
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+"""
+Local fake OpenAI-compatible server for benchmarks and load tests.
+
+Serves POST /v1/chat/completions with canned resume, job description and match
+responses, after sleeping for a latency drawn from a configurable distribution.
+Point ResumeJDMatcher at it with base_url=server.base_url.
+
+Run standalone with:
+    python fake_openai_server.py --port 8900 --latency lognormal:0.8,0.4
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CANNED_RESUME = {
+    "education": [
+        {"degree": "Master of Science in Robotics", "institution": "Carnegie Mellon University"},
+        {"degree": "Bachelor of Science in Industrial Engineering", "institution": "Peking University"}
+    ],
+    "work_experience": [
+        {"title": "Senior Technical Program Manager", "company": "Google", "years": "2019-2023",
+         "highlights": ["Established the on-device Google Assistant program", "Led a local Smart Home framework"]},
+        {"title": "Technical Product Manager", "company": "TuSimple", "years": "2018-2019",
+         "highlights": ["Optimized the data pipeline, reducing data idle time by over 30%"]}
+    ],
+    "projects": ["Marketing Articles Repurposing Tool", "Landing Page Builder using AIGC Tools"],
+    "skills": ["Product Management", "Machine Learning", "Python", "MySQL", "Data Analysis"],
+    "total_years_of_experience": 8
+}
+
+CANNED_JD = {
+    "required_qualifications": ["7+ years of software engineering experience",
+                                "MS or PhD in Computer Science or related field"],
+    "skills": ["Python", "C++", "TensorFlow", "PyTorch"],
+    "experience": "3+ years of experience with machine learning frameworks",
+    "preferred_qualifications": ["Published research in ML/AI"]
+}
+
+CANNED_MATCH = {
+    "education": {"match_level": 6, "match_score": "80%",
+                  "reasoning": "MS in Robotics is highly relevant to the AI/ML role."},
+    "work_and_project_experience": {"match_level": 5, "match_score": "72%",
+                                    "reasoning": "Strong AI program management, limited hands-on ML engineering."},
+    "skills": {"match_level": 4, "match_score": "65%",
+               "reasoning": "Has Python and ML exposure but lacks TensorFlow, PyTorch and C++."},
+    "experience_year": {"match_level": 4, "match_score": "60%",
+                        "reasoning": "About 8 years of experience, few of them as a software engineer."},
+    "Final_match": {"match_level": 5, "Final_match_score": "70%",
+                    "reasoning": "Good AI product background with gaps in hands-on ML engineering."}
+}
+
+
+def parse_latency_distribution(spec: str, rng: Optional[random.Random] = None) -> Callable[[], float]:
+    """
+    Build a latency sampler from a distribution spec.
+
+    Supported specs (all values in seconds):
+        fixed:0.5             always 0.5s
+        uniform:0.2,1.0       uniform between 0.2s and 1.0s
+        normal:0.8,0.2        normal with mean 0.8s and std dev 0.2s (clipped at 0)
+        lognormal:0.8,0.5     lognormal with median 0.8s and shape 0.5 (long tail)
+        0.5                   shorthand for fixed:0.5
+
+    Args:
+        spec (str): Distribution spec
+        rng (random.Random, optional): Random generator to draw from
+
+    Returns:
+        Callable[[], float]: Function returning one latency sample
+    """
+    rng = rng or random.Random()
+    kind, _, params = spec.partition(":")
+    if not params:
+        kind, params = "fixed", kind
+    values = [float(v) for v in params.split(",") if v]
+
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        mu = math.log(values[0]) if values[0] > 0 else 0.0
+        return lambda: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution '{kind}'")
+
+
+def _malform(content: str, rng: random.Random) -> str:
+    """Damage a JSON response the way models sometimes do, to exercise the repair path."""
+    variant = rng.randrange(3)
+    if variant == 0:
+        return f"Here is the result:\n```json\n{content}\n```"
+    if variant == 1:
+        return content[:-1] + ",}"
+    return content.replace('"match_level"', 'match_level')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        fake = self.server.fake
+        fake.record_request()
+
+        time.sleep(fake.sample_latency())
+
+        if fake.should_fail():
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return
+
+        content = fake.respond(request)
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{fake.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(json.dumps(request)) // 4,
+                      "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(json.dumps(request)) + len(content)) // 4}
+        })
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FakeOpenAIServer:
+    def __init__(self, latency: str = "fixed:0.0", host: str = "127.0.0.1", port: int = 0,
+                 error_rate: float = 0.0, malformed_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialize the fake server.
+
+        Args:
+            latency (str): Latency distribution spec, see parse_latency_distribution
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+            error_rate (float): Probability (0-1) of answering with HTTP 500
+            malformed_rate (float): Probability (0-1) of returning damaged JSON content
+            seed (int, optional): Seed for latency, errors and malformed responses
+        """
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.sample_latency = self._locked(parse_latency_distribution(latency, self._rng))
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.requests = 0
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI-compatible base URL, for ResumeJDMatcher(base_url=...)."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _locked(self, fn: Callable[[], float]) -> Callable[[], float]:
+        def wrapper():
+            with self._lock:
+                return fn()
+        return wrapper
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def respond(self, request: Dict[str, Any]) -> str:
+        """Pick the canned response matching the stage of the request."""
+        messages = request.get("messages", [])
+        system_prompt = messages[0].get("content", "") if messages else ""
+
+        if request.get("response_format") or "Compare the candidate" in system_prompt:
+            content = json.dumps(CANNED_MATCH)
+        elif "resume" in system_prompt.lower():
+            content = json.dumps(CANNED_RESUME)
+        else:
+            content = json.dumps(CANNED_JD)
+
+        with self._lock:
+            malformed = self.malformed_rate > 0 and self._rng.random() < self.malformed_rate
+            if malformed:
+                content = _malform(content, self._rng)
+        return content
+
+    def start(self) -> "FakeOpenAIServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fake OpenAI-compatible server for benchmarks')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8900, help='Port to bind (default: 8900)')
+    parser.add_argument('--latency', type=str, default='lognormal:0.8,0.4',
+                        help='Latency distribution, e.g. fixed:0.5, uniform:0.2,1.0, lognormal:0.8,0.4')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of HTTP 500 responses')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Probability of damaged JSON content')
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency=args.latency, host=args.host, port=args.port,
+                              error_rate=args.error_rate, malformed_rate=args.malformed_rate)
+    print(f"Fake OpenAI server listening at {server.base_url}")
+    print(f"Use it with: OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=fake python cli.py ...")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
@@ -0,0 +1,251 @@
+"""
+Hedged requests for model calls.
+
+A small share of completions take many times longer than the rest, and a
+pair's three serial calls compound that tail. With hedging, a call that has not
+returned after an adaptive percentile of its stage's recent latencies is issued
+a second time; whichever response arrives first is used and the other is
+abandoned.
+
+The hedge rate is capped (by default at 10% of calls) so the extra cost stays
+bounded, and counters show how often hedges fired and how often the hedge won.
+A running HTTP request cannot be interrupted from another thread, so the
+abandoned call finishes in the background (bounded by the client's timeout)
+and its response is discarded.
+
+Hedges never add load to a saturated system. Each hedge needs a free hedge
+thread and, when the matcher has a FairScheduler, a free model-call slot taken
+without waiting. The slot is held until both attempts have finished.
+Otherwise the call is not hedged, which the "hedges_skipped" counter shows.
+A call is only timed once it has started, so time spent waiting for a thread
+never triggers a hedge.
+
+Enable it with ResumeJDMatcher(hedger=Hedger()), or for every matcher in the
+process with MATCHER_HEDGE_PERCENTILE (and optionally MATCHER_HEDGE_MAX_RATE).
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        """
+        Recent call latencies per stage.
+
+        Args:
+            window (int): Number of recent latencies kept per stage
+        """
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, latency: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(stage, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, stage: str, pct: float, min_samples: int = 1) -> Optional[float]:
+        """Return the pct-th percentile of the stage's recent latencies, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._latencies.get(stage, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class Hedger:
+    def __init__(self, percentile: float = 95.0, max_hedge_rate: float = 0.1, min_samples: int = 20,
+                 min_delay: float = 0.05, window: int = 200, max_workers: int = 64):
+        """
+        Initialize the hedger.
+
+        Args:
+            percentile (float): A call is hedged once it has run longer than this percentile
+                                of the stage's recent latencies
+            max_hedge_rate (float): Maximum share of calls that may be hedged
+            min_samples (int): Latencies needed for a stage before its calls are hedged
+            min_delay (float): Never hedge sooner than this many seconds
+            window (int): Recent latencies kept per stage
+            max_workers (int): Hedges that may run at once; further calls are not hedged
+        """
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+        self.latencies = LatencyTracker(window)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_threads = threading.BoundedSemaphore(max_workers)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "hedges_fired": 0, "hedges_won": 0, "hedges_capped": 0, "hedges_skipped": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["Hedger"]:
+        """
+        Build a hedger from MATCHER_HEDGE_PERCENTILE and MATCHER_HEDGE_MAX_RATE.
+
+        Returns:
+            Optional[Hedger]: A hedger, or None if MATCHER_HEDGE_PERCENTILE is not set
+        """
+        percentile = os.environ.get("MATCHER_HEDGE_PERCENTILE")
+        if not percentile:
+            return None
+        return cls(percentile=float(percentile),
+                   max_hedge_rate=float(os.environ.get("MATCHER_HEDGE_MAX_RATE", "0.1")))
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """Seconds to wait before hedging a call of this stage, or None while there is too little history."""
+        delay = self.latencies.percentile(stage, self.percentile, self.min_samples)
+        return None if delay is None else max(delay, self.min_delay)
+
+    def _may_hedge(self, scheduler=None) -> bool:
+        """Reserve a hedge if the hedge rate cap allows it and a hedge thread and scheduler slot are free."""
+        with self._lock:
+            if self._closed:
+                return False
+            if self._stats["hedges_fired"] + 1 > self.max_hedge_rate * self._stats["calls"]:
+                self._stats["hedges_capped"] += 1
+                return False
+            if not self._hedge_threads.acquire(blocking=False):
+                self._stats["hedges_skipped"] += 1
+                return False
+            if scheduler is not None and not scheduler.try_acquire():
+                self._hedge_threads.release()
+                self._stats["hedges_skipped"] += 1
+                return False
+            self._stats["hedges_fired"] += 1
+            return True
+
+    def _release_capacity(self, scheduler) -> None:
+        if scheduler is not None:
+            scheduler.release()
+        self._hedge_threads.release()
+
+    def _submit_hedge(self, fn: Callable[[], Any]) -> Future:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Hedger is closed")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hedge")
+            return self._executor.submit(fn)
+
+    @staticmethod
+    def _start_primary(fn: Callable[[], Any]) -> Future:
+        """Run the primary attempt on a thread of its own, started at once."""
+        future: Future = Future()
+
+        def run():
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="hedge-primary", daemon=True).start()
+        return future
+
+    def call(self, stage: str, fn: Callable[[], Any], scheduler=None) -> Any:
+        """
+        Run a call, issuing a hedge if it is slower than the stage's latency percentile.
+
+        Until a stage has latency history, calls run on the caller's thread. After that, the
+        primary attempt runs on a thread of its own, so the caller can return the hedge's
+        response without waiting for the primary.
+
+        Args:
+            stage (str): Pipeline stage, used to keep latency history per kind of call
+            fn (Callable[[], Any]): The call; it is run up to twice, so it must be safe to repeat
+            scheduler (scheduler.FairScheduler, optional): Scheduler whose slot the caller holds
+                                                           for the primary; a hedge needs a
+                                                           slot of its own
+
+        Returns:
+            Any: The result of whichever attempt finished first without raising
+
+        Raises:
+            Exception: The primary's error if no attempt succeeded
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+
+        def timed():
+            start = time.perf_counter()
+            result = fn()
+            return result, time.perf_counter() - start
+
+        delay = self.hedge_delay(stage)
+        if delay is None or self._closed:
+            result, latency = timed()
+            self.latencies.record(stage, latency)
+            return result
+
+        primary = self._start_primary(timed)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._may_hedge(scheduler):
+            result, latency = primary.result()
+            self.latencies.record(stage, latency)
+            return result
+
+        logger.info(f"{stage}: no response after {delay:.2f}s, sending a hedged request")
+        try:
+            hedge = self._submit_hedge(timed)
+        except RuntimeError:
+            # Closed while this call was waiting
+            self._release_capacity(scheduler)
+            result, latency = primary.result()
+            self.latencies.record(stage, latency)
+            return result
+
+        # The hedge's slot stays taken until both attempts are done, since the loser keeps running
+        remaining = [2]
+
+        def finished(_):
+            with self._lock:
+                remaining[0] -= 1
+                last = not remaining[0]
+            if last:
+                self._release_capacity(scheduler)
+
+        primary.add_done_callback(finished)
+        hedge.add_done_callback(finished)
+
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                result, latency = future.result()
+                if future is hedge:
+                    with self._lock:
+                        self._stats["hedges_won"] += 1
+                    # The primary's latency is at least the delay plus the hedge's
+                    latency += delay
+                self.latencies.record(stage, latency)
+                return result
+        raise primary.exception() or error
+
+    def close(self) -> None:
+        """Stop hedging and shut down the hedge threads; hedges in flight finish in the background."""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the hedging counters with the resulting hedge and win rates."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hedge_rate"] = round(stats["hedges_fired"] / stats["calls"], 4) if stats["calls"] else 0.0
+        stats["win_rate"] = round(stats["hedges_won"] / stats["hedges_fired"], 4) if stats["hedges_fired"] else 0.0
+        return stats
@@ -0,0 +1,191 @@
+"""
+Local heuristic scorer, used while the model is unavailable.
+
+When the circuit breaker (circuit_breaker.py) is open, the matcher cannot ask
+the model for a match. Rather than returning all-zero "API Error" results, it
+estimates every category locally in well under a millisecond:
+
+- Education: the highest degree named in the resume against the degree the job
+  description asks for
+- Work and Project Experience: how many of the job description's distinctive
+  terms appear in the resume
+- Skills: the local skills engine (skills_engine.py)
+- Experience Years: years claimed in (or dated in) the resume against the
+  "N+ years" the job description asks for
+
+The result has the usual shape, with "degraded": True and "source":
+"heuristic_fallback", so callers can tell it from a model result. The estimate
+is coarse; it keeps pages and batch jobs answering quickly, not ranking finely.
+"""
+import re
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from skills_engine import SkillsEngine, _score_to_level
+
+# Degree patterns by rank; the highest rank found wins
+_DEGREES = [
+    (4, "doctorate", re.compile(r"\b(ph\.?\s?d|doctorate|doctoral)(?!\w)", re.I)),
+    (3, "master's degree", re.compile(r"\b(master'?s?|m\.s\.|m\.?sc|m\.?eng|mba|ms (in|degree))(?!\w)", re.I)),
+    (2, "bachelor's degree", re.compile(r"\b(bachelor'?s?|b\.s\.|b\.?sc|b\.?eng|b\.?tech|b\.a\.|bs (in|degree)|undergraduate degree)(?!\w)", re.I)),
+    (1, "associate degree", re.compile(r"\b(associate'?s? degree|diploma)(?!\w)", re.I)),
+]
+
+_YEARS_REQUIRED = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years?|yrs?)\b", re.I)
+_YEARS_CLAIMED = re.compile(r"(\d{1,2}(?:\.\d)?)\s*\+?\s*(?:years?|yrs?)\b", re.I)
+_DATE_RANGE = re.compile(r"\b((?:19|20)\d{2})\s*(?:-|\u2013|\u2014|to)\s*((?:19|20)\d{2}|present|current|now)\b", re.I)
+_WORD = re.compile(r"[a-z][a-z+#.-]{2,}")
+
+# Frequent words that say nothing about the role
+STOPWORDS = frozenset("""
+about above across after also among and any are based been being both but can candidate company could
+deliver drive ensure etc every experience for from have help high including into its job join more
+most must new not our over own per plus preferred qualifications required requirements responsibilities
+role should skills such team teams than that the their them then there these they this those through
+using various via was were what when where which while who will with within work working years you your
+""".split())
+
+# Category weights of the overall estimate
+_WEIGHTS = {"education": 0.15, "work_and_project_experience": 0.35, "skills": 0.3, "experience_year": 0.2}
+
+DEGRADED_NOTE = "Heuristic estimate; the model was unavailable."
+
+
+def document_text(source: Union[str, Dict[str, Any], List[Any], None]) -> str:
+    """Join the string values of a parse result (or return text unchanged)."""
+    if isinstance(source, str):
+        return source
+    if isinstance(source, dict):
+        return "\n".join(document_text(value) for value in source.values())
+    if isinstance(source, list):
+        return "\n".join(document_text(value) for value in source)
+    return "" if source is None else str(source)
+
+
+def degree_level(text: str) -> Tuple[int, Optional[str]]:
+    """
+    Find the highest degree named in a text.
+
+    Returns:
+        Tuple[int, Optional[str]]: Rank (0 none, 1 associate, 2 bachelor's, 3 master's, 4 doctorate)
+                                   and degree name
+    """
+    for rank, name, pattern in _DEGREES:
+        if pattern.search(text):
+            return rank, name
+    return 0, None
+
+
+def years_of_experience(resume_text: str) -> Optional[float]:
+    """Return the years of experience a resume claims or spans with dated roles, if any."""
+    claimed = [float(value) for value in _YEARS_CLAIMED.findall(resume_text) if float(value) <= 50]
+    if claimed:
+        return max(claimed)
+    # Otherwise span the dated roles, from the earliest start to the latest end
+    this_year = date.today().year
+    starts, ends = [], []
+    for start, end in _DATE_RANGE.findall(resume_text):
+        starts.append(int(start))
+        ends.append(this_year if not end[:1].isdigit() else int(end))
+    if not starts:
+        return None
+    return float(max(0, max(ends) - min(starts)))
+
+
+def years_required(jd_text: str) -> Optional[int]:
+    """Return the largest "N+ years" a job description asks for, if any."""
+    required = [int(value) for value in _YEARS_REQUIRED.findall(jd_text) if int(value) <= 30]
+    return max(required) if required else None
+
+
+def _category(score: int, reasoning: str) -> Dict[str, Any]:
+    return {"match_level": _score_to_level(score), "match_score": f"{score}%", "reasoning": f"{DEGRADED_NOTE} {reasoning}"}
+
+
+class HeuristicScorer:
+    def __init__(self, skills_engine: Optional[SkillsEngine] = None):
+        """
+        Initialize the heuristic scorer.
+
+        Args:
+            skills_engine (SkillsEngine, optional): Skills engine for the skills category
+        """
+        self.skills_engine = skills_engine or SkillsEngine()
+
+    def education(self, resume_text: str, jd_text: str) -> Dict[str, Any]:
+        have, have_name = degree_level(resume_text)
+        need, need_name = degree_level(jd_text)
+        if not need:
+            score = 70 if have else 50
+            reasoning = (f"The job description names no degree; the resume lists a {have_name}." if have
+                         else "Neither document names a degree.")
+        elif have >= need:
+            score = 80
+            reasoning = f"The resume lists a {have_name}, meeting the {need_name} asked for."
+        elif have:
+            score = 55
+            reasoning = f"The resume lists a {have_name}, below the {need_name} asked for."
+        else:
+            score = 30
+            reasoning = f"No degree found in the resume; the job description asks for a {need_name}."
+        return _category(score, reasoning)
+
+    @staticmethod
+    def _terms(text: str) -> List[str]:
+        return [word.strip(".-") for word in _WORD.findall(text.lower()) if word.strip(".-") not in STOPWORDS]
+
+    def work_experience(self, resume_text: str, jd_text: str) -> Dict[str, Any]:
+        jd_terms = set(self._terms(jd_text))
+        if not jd_terms:
+            return _category(50, "The job description has too little text to compare.")
+        resume_terms = set(self._terms(resume_text))
+        covered = jd_terms & resume_terms
+        ratio = len(covered) / len(jd_terms)
+        # Even a close match covers only part of a posting's vocabulary; half the terms is a strong match
+        score = int(round(min(1.0, ratio / 0.5) * 90))
+        examples = ", ".join(sorted(covered, key=len, reverse=True)[:5])
+        reasoning = (f"The resume covers {len(covered)} of {len(jd_terms)} distinctive job description terms"
+                     + (f" (e.g. {examples})." if examples else "."))
+        return _category(score, reasoning)
+
+    def experience_years(self, resume_text: str, jd_text: str) -> Dict[str, Any]:
+        have = years_of_experience(resume_text)
+        need = years_required(jd_text)
+        if have is None:
+            return _category(40, "No years of experience found in the resume.")
+        if need is None:
+            return _category(70, f"About {have:g} years of experience; the job description asks for no specific amount.")
+        score = int(round(min(1.0, have / need) * 85)) if need else 85
+        return _category(score, f"About {have:g} years of experience against {need}+ years asked for.")
+
+    def match(self, resume: Union[str, Dict[str, Any]], jd: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Estimate a match without the model.
+
+        Args:
+            resume (Union[str, Dict[str, Any]]): Resume text or parsed resume data
+            jd (Union[str, Dict[str, Any]]): Job description text or parsed job description data
+
+        Returns:
+            Dict[str, Any]: A matching result in the model's format, marked "degraded"
+        """
+        resume_text, jd_text = document_text(resume), document_text(jd)
+        skills = self.skills_engine.match(resume, jd)
+        skills["reasoning"] = f"{DEGRADED_NOTE} {skills['reasoning']}"
+        result = {
+            "education": self.education(resume_text, jd_text),
+            "work_and_project_experience": self.work_experience(resume_text, jd_text),
+            "skills": skills,
+            "experience_year": self.experience_years(resume_text, jd_text),
+        }
+        final = int(round(sum(weight * float(result[key]["match_score"].rstrip("%"))
+                              for key, weight in _WEIGHTS.items())))
+        result["Final_match"] = {
+            "match_level": _score_to_level(final),
+            "Final_match_score": f"{final}%",
+            "reasoning": f"{DEGRADED_NOTE} Weighted average of the local category estimates; "
+                         "re-run the match once the model is available for a full assessment."
+        }
+        result["degraded"] = True
+        result["source"] = "heuristic_fallback"
+        return result
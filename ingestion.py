@@ -0,0 +1,208 @@
+"""
+Document ingestion for the Resume-JD Matcher.
+
+Extracts text from TXT, DOCX and PDF files and normalizes whitespace, so every
+entry point hands the matcher the same clean text regardless of file format.
+
+Extraction is CPU-bound, so iter_documents runs it in a process pool and hands
+results over through a bounded queue: extraction of the next documents overlaps
+with model calls for the current ones, and stops running ahead when the
+consumer falls behind.
+
+DOCX is read with the standard library. PDF support needs the optional pypdf
+package (pip install pypdf).
+"""
+import logging
+import os
+import queue
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".txt", ".pdf", ".docx")
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_SPACES = re.compile(r"[ \t\f\v\u00a0\u1680\u2000-\u200b\u202f\u205f\u3000]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Normalize whitespace in extracted text.
+
+    Unifies line endings, turns non-breaking and other exotic spaces into plain
+    spaces, collapses runs of spaces, strips trailing spaces on each line and
+    keeps at most one blank line between paragraphs.
+
+    Args:
+        text (str): Raw extracted text
+
+    Returns:
+        str: Normalized text
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\x00", "")
+    lines = [_SPACES.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _extract_txt(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def _extract_docx(path: str) -> str:
+    """Read paragraph text from word/document.xml, keeping tabs and line breaks."""
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+
+    paragraphs = []
+    for paragraph in root.iter(f"{_WORD_NS}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_WORD_NS}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{_WORD_NS}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_WORD_NS}br", f"{_WORD_NS}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _extract_pdf(path: str) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("PDF ingestion requires the pypdf package. Install it with: pip install pypdf")
+
+    reader = PdfReader(path)
+    return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+_EXTRACTORS = {
+    ".txt": _extract_txt,
+    ".docx": _extract_docx,
+    ".pdf": _extract_pdf,
+}
+
+
+def extract_text(path: str, normalize: bool = True) -> str:
+    """
+    Extract text from a TXT, DOCX or PDF file.
+
+    Args:
+        path (str): Path to the document
+        normalize (bool): Normalize whitespace in the extracted text
+
+    Returns:
+        str: Extracted text
+
+    Raises:
+        ValueError: If the file extension is not supported
+        ImportError: For PDFs when pypdf is not installed
+    """
+    extension = os.path.splitext(path)[1].lower()
+    extractor = _EXTRACTORS.get(extension)
+    if extractor is None:
+        raise ValueError(f"Unsupported document type '{extension}' for {path}. "
+                         f"Supported: {', '.join(SUPPORTED_EXTENSIONS)}")
+    text = extractor(path)
+    return normalize_whitespace(text) if normalize else text
+
+
+def _extract_document(path: str) -> Dict[str, Any]:
+    """Process-pool task: extract one document, reporting errors instead of raising."""
+    try:
+        return {"path": path, "text": extract_text(path), "error": None}
+    except Exception as e:
+        return {"path": path, "text": None, "error": f"{type(e).__name__}: {e}"}
+
+
+_DONE = object()
+
+
+def iter_documents(paths: List[str], workers: Optional[int] = None, queue_size: int = 16) -> Iterator[Dict[str, Any]]:
+    """
+    Extract documents in a process pool and yield them as they become ready.
+
+    At most queue_size documents are being extracted or waiting to be consumed
+    at any time, so a slow consumer applies backpressure to extraction.
+
+    Args:
+        paths (List[str]): Documents to extract
+        workers (int, optional): Extraction processes (default: number of CPUs)
+        queue_size (int): Bound on extracted-but-unconsumed plus in-progress documents
+
+    Yields:
+        Dict[str, Any]: {"path", "text", "error"} for each document, in completion order
+    """
+    if not paths:
+        return
+
+    ready = queue.Queue()
+    slots = threading.BoundedSemaphore(max(1, queue_size))
+    stop = threading.Event()
+    executor = ProcessPoolExecutor(max_workers=workers)
+
+    def on_done(future):
+        try:
+            ready.put(future.result())
+        except Exception as e:
+            # The pool itself failed (e.g. a worker was killed)
+            ready.put({"path": future.path, "text": None, "error": f"{type(e).__name__}: {e}"})
+
+    submitted = 0
+
+    def produce():
+        nonlocal submitted
+        try:
+            for index, path in enumerate(paths):
+                # Wait for a free slot, waking up regularly to notice a closed consumer
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                try:
+                    future = executor.submit(_extract_document, path)
+                except Exception as e:
+                    # The pool is broken (e.g. a worker process died), so nothing more can be submitted
+                    slots.release()
+                    error = f"{type(e).__name__}: {e}"
+                    ready.put([{"path": p, "text": None, "error": error} for p in paths[index:]])
+                    return
+                submitted += 1
+                future.path = path
+                future.add_done_callback(on_done)
+        finally:
+            ready.put(_DONE)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    yielded = 0
+    producer_done = False
+    try:
+        # submitted is final once _DONE has arrived
+        while not producer_done or yielded < submitted:
+            item = ready.get()
+            if item is _DONE:
+                producer_done = True
+                continue
+            if isinstance(item, list):
+                # Error records for the paths the producer could not submit
+                yield from item
+                continue
+            yielded += 1
+            slots.release()
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+        executor.shutdown(wait=True, cancel_futures=True)
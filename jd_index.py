@@ -0,0 +1,307 @@
+"""
+Approximate-nearest-neighbor retrieval of job descriptions for a resume.
+
+Matching is pairwise, so finding the best roles for one candidate across a
+large posting corpus would take one model call per posting. This module narrows
+the corpus down first: the postings closest to the resume are found locally in
+milliseconds, and only those are sent to match_resume_to_jd.
+
+Documents (raw text or parse results) are turned into dense vectors by feature
+hashing: each word and word pair (stopwords dropped, log-scaled counts) adds
+to one of `dim` signed buckets, and the vector is L2-normalized, so the dot
+product of two vectors is their cosine similarity. No model or download is
+needed.
+
+Each vector also gets a random-projection sketch: the signs of its projections
+onto `bits` random hyperplanes, packed into one integer. The Hamming distance
+between two sketches estimates the angle between the vectors, and XOR plus
+popcount runs at C speed. Postings are grouped into inverted lists (IVF) around
+a sample of posting sketches; a query computes its distance to those centroids,
+ranks the postings of the `probes` nearest lists by sketch distance, then
+re-ranks the closest candidates by exact cosine similarity.
+
+Projections are computed with all hyperplanes at once: each vector bucket is a
+packed integer of 32-bit lanes (one lane per hyperplane, +1 or -1), so a sketch
+costs one big-integer multiply-add per non-zero bucket instead of bits * dim
+float operations.
+
+Indexes are saved to a single file that load() memory-maps: vectors and lists
+stay on disk and are paged in as queries touch them; only keys and sketches are
+read up front.
+
+Run `python benchmark.py --retrieval-docs 100000` to measure build time, query
+latency and recall against exact search.
+"""
+import heapq
+import json
+import math
+import mmap
+import random
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter
+from operator import mul
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
+
+from dedup import tokenize
+from heuristic_scorer import STOPWORDS, document_text
+
+_MAGIC = b"JDIX"
+_FORMAT_VERSION = 1
+# magic, format version, byte order (0 little, 1 big), dim, sketch bits, projection seed, postings,
+# inverted lists, key table bytes
+_HEADER = struct.Struct("<4sIIIIIIII")
+
+_LANE_BITS = 32
+# Vector components are scaled to integers for the lane arithmetic; a lane sums at most
+# dim components of at most this size, which stays far below 2**31
+_QUANTUM = 1 << 20
+# Lane byte that holds a lane's sign bit -> "1" for non-negative lanes, "0" for negative ones
+_SIGN_DIGIT = bytes(ord("1") if byte >= 128 else ord("0") for byte in range(256))
+
+
+def vectorize(document: Union[str, Dict[str, Any]], dim: int = 512) -> array:
+    """
+    Turn a document into a normalized hashed-feature vector.
+
+    Args:
+        document (Union[str, Dict[str, Any]]): Raw text or a parse result
+        dim (int): Vector length
+
+    Returns:
+        array: dim float32 values with unit length (all zeros for a document without words)
+    """
+    words = [word for word in tokenize(document_text(document)) if len(word) > 2 and word not in STOPWORDS]
+    features = Counter(map(zlib.crc32, map(str.encode, words)))
+    # Word pairs capture phrases such as "machine learning"; they count half as much as words
+    pairs = Counter(map(zlib.crc32, map(str.encode, map(" ".join, zip(words, words[1:])))))
+
+    vector = [0.0] * dim
+    for counts, scale in ((features, 1.0), (pairs, 0.5)):
+        for feature, count in counts.items():
+            weight = scale * (1.0 + math.log(count))
+            # The low bits pick the bucket and the top bit the sign, so collisions tend to cancel out
+            vector[feature % dim] += weight if feature & 0x80000000 else -weight
+    norm = math.sqrt(sum(map(mul, vector, vector)))
+    return array("f", [value / norm for value in vector] if norm else vector)
+
+
+class RandomProjection:
+    def __init__(self, dim: int, bits: int = 256, seed: int = 0):
+        """
+        Sign random projection of dim-dimensional vectors onto `bits` hyperplanes with +1/-1 entries.
+
+        Args:
+            dim (int): Vector length
+            bits (int): Hyperplanes, i.e. sketch length in bits
+            seed (int): Seed for the hyperplanes
+        """
+        self.dim = dim
+        self.bits = bits
+        self.seed = seed
+        ones = int.from_bytes(b"\x01\x00\x00\x00" * bits, "little")
+        self._bias = ones << (_LANE_BITS - 1)
+        rng = random.Random(seed)
+        # Row j holds component j's entry in every hyperplane, one lane each: 2 * positives - ones
+        self._rows = []
+        for _ in range(dim):
+            pattern = rng.getrandbits(bits)
+            positives = int.from_bytes(b"".join(b"\x01\x00\x00\x00" if pattern >> lane & 1 else bytes(4)
+                                                for lane in range(bits)), "little")
+            self._rows.append(2 * positives - ones)
+
+    def sketch(self, vector) -> int:
+        """Return the sign bits of a vector's projections, packed into an int."""
+        total = self._bias
+        rows = self._rows
+        for j, value in enumerate(vector):
+            if value:
+                total += round(value * _QUANTUM) * rows[j]
+        # The bias moves every lane into [0, 2**32), so each lane's top bit is its sign
+        lanes = total.to_bytes(self.bits * _LANE_BITS // 8, "little")
+        return int(lanes[_LANE_BITS // 8 - 1::_LANE_BITS // 8].translate(_SIGN_DIGIT), 2)
+
+
+class JDIndex:
+    def __init__(self, keys: List[str], projection: RandomProjection, vectors, sketches: List[int],
+                 centroids: List[int], list_offsets, list_members, mapped: Optional[mmap.mmap] = None):
+        """
+        Use build() or load() rather than constructing an index directly.
+
+        Args:
+            keys (List[str]): Posting identifiers (e.g. file paths), by document number
+            projection (RandomProjection): Projection the sketches were made with
+            vectors: len(keys) * dim float32 values
+            sketches (List[int]): Sketch of each posting
+            centroids (List[int]): Sketch of each inverted list's centroid
+            list_offsets: len(centroids) + 1 offsets into list_members
+            list_members: Posting numbers grouped by inverted list
+            mapped (mmap.mmap, optional): File mapping backing the arrays, closed by close()
+        """
+        self.keys = keys
+        self.projection = projection
+        self.dim = projection.dim
+        self._vectors = vectors
+        self._sketches = sketches
+        self._centroids = centroids
+        self._list_offsets = list_offsets
+        self._list_members = list_members
+        self._mapped = mapped
+        self._views: List[memoryview] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, Union[str, Dict[str, Any]]]], dim: int = 512,
+              bits: int = 1024, lists: Optional[int] = None, seed: int = 0) -> "JDIndex":
+        """
+        Build an index in memory.
+
+        Args:
+            documents (Iterable[Tuple[str, Union[str, Dict[str, Any]]]]): (key, raw text or parse result) pairs
+            dim (int): Vector length; longer vectors have fewer hash collisions but re-rank more slowly
+            bits (int): Sketch length (a multiple of 8); longer sketches pick candidates more accurately
+            lists (int, optional): Inverted lists (default: about the square root of the number of postings)
+            seed (int): Seed for the random hyperplanes and list centroids
+
+        Returns:
+            JDIndex: The index; call save() to persist it
+        """
+        if bits % 8:
+            raise ValueError("bits must be a multiple of 8")
+        projection = RandomProjection(dim, bits, seed)
+        keys: List[str] = []
+        vectors = array("f")
+        sketches: List[int] = []
+        for key, document in documents:
+            vector = vectorize(document, dim)
+            keys.append(key)
+            vectors.extend(vector)
+            sketches.append(projection.sketch(vector))
+
+        # Inverted lists: every posting joins the list of its nearest centroid, a sample of
+        # the postings themselves, by sketch distance
+        count = min(len(keys), lists or max(1, round(math.sqrt(len(keys)))))
+        centroids = random.Random(seed).sample(sketches, count) if count else []
+        assignment = [min(range(count), key=[(sketch ^ centroid).bit_count() for centroid in centroids].__getitem__)
+                      for sketch in sketches]
+        members = sorted(range(len(keys)), key=assignment.__getitem__)
+        sizes = Counter(assignment)
+        offsets = array("I", [0])
+        for centroid in range(count):
+            offsets.append(offsets[-1] + sizes.get(centroid, 0))
+        return cls(keys, projection, vectors, sketches, centroids, offsets, array("I", members))
+
+    def _candidates(self, sketch: int, count: int, probes: int) -> List[int]:
+        """Return about `count` postings from the `probes` nearest lists with the smallest sketch distance."""
+        centroid_distances = list(map(int.bit_count, map(sketch.__xor__, self._centroids)))
+        offsets, members = self._list_offsets, self._list_members
+        documents: List[int] = []
+        for centroid in heapq.nsmallest(probes, range(len(self._centroids)), key=centroid_distances.__getitem__):
+            documents.extend(members[offsets[centroid]:offsets[centroid + 1]])
+        if len(documents) <= count:
+            return documents
+        sketches = self._sketches
+        distances = list(map(int.bit_count, map(sketch.__xor__, map(sketches.__getitem__, documents))))
+        ranked = heapq.nsmallest(count, range(len(documents)), key=distances.__getitem__)
+        return [documents[position] for position in ranked]
+
+    def query(self, document: Union[str, Dict[str, Any]], top_n: int = 10, candidates: Optional[int] = None,
+              probes: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Find the postings most similar to a resume.
+
+        Args:
+            document (Union[str, Dict[str, Any]]): Resume text or parsed resume
+            top_n (int): Number of postings to return
+            candidates (int, optional): Postings re-ranked by exact similarity (default:
+                                        max(10 * top_n, 100)); more is slower and more accurate
+            probes (int, optional): Inverted lists searched (default: a quarter of them, at least 8);
+                                    more is slower and more accurate
+
+        Returns:
+            List[Tuple[str, float]]: (key, cosine similarity) pairs, most similar first
+        """
+        if not self.keys:
+            return []
+        dim = self.dim
+        query = vectorize(document, dim)
+        probes = probes or max(8, len(self._centroids) // 4)
+        docs = self._candidates(self.projection.sketch(query), candidates or max(10 * top_n, 100), probes)
+        vectors = self._vectors
+        scored = ((sum(map(mul, query, vectors[doc * dim:(doc + 1) * dim])), doc) for doc in docs)
+        return [(self.keys[doc], round(score, 4)) for score, doc in heapq.nlargest(top_n, scored)]
+
+    def save(self, path: str) -> None:
+        """Write the index to a file that load() can memory-map."""
+        projection = self.projection
+        key_table = json.dumps(self.keys).encode("utf-8")
+        sketch_bytes = projection.bits // 8
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, 0 if sys.byteorder == "little" else 1, projection.dim,
+                                 projection.bits, projection.seed, len(self.keys), len(self._centroids),
+                                 len(key_table)))
+            # Arrays are written in native byte order so load() can use them in place
+            f.write(self._vectors.tobytes())
+            f.write(self._list_offsets.tobytes())
+            f.write(self._list_members.tobytes())
+            for sketches in (self._centroids, self._sketches):
+                f.write(b"".join(sketch.to_bytes(sketch_bytes, "little") for sketch in sketches))
+            f.write(key_table)
+
+    @classmethod
+    def load(cls, path: str) -> "JDIndex":
+        """
+        Open a saved index without reading its vectors into memory.
+
+        Raises:
+            ValueError: If the file is not an index or was written on a machine with another byte order
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, dim, bits, seed, documents, lists, key_bytes = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            mapped.close()
+            raise ValueError(f"{path} is not a job description index (format {_FORMAT_VERSION})")
+        if byte_order != (0 if sys.byteorder == "little" else 1):
+            mapped.close()
+            raise ValueError(f"{path} was written with another byte order; rebuild it on this machine")
+
+        view = memoryview(mapped)
+        position = _HEADER.size
+
+        def take(size: int) -> memoryview:
+            nonlocal position
+            section = view[position:position + size]
+            position += size
+            return section
+
+        def read_sketches(count: int) -> List[int]:
+            section = take(count * sketch_bytes)
+            return [int.from_bytes(section[start:start + sketch_bytes], "little")
+                    for start in range(0, len(section), sketch_bytes)]
+
+        sketch_bytes = bits // 8
+        vectors = take(4 * documents * dim).cast("f")
+        list_offsets = take(4 * (lists + 1)).cast("I")
+        list_members = take(4 * documents).cast("I")
+        centroids = read_sketches(lists)
+        sketches = read_sketches(documents)
+        keys = json.loads(bytes(take(key_bytes)).decode("utf-8"))
+        index = cls(keys, RandomProjection(dim, bits, seed), vectors, sketches, centroids,
+                    list_offsets, list_members, mapped)
+        index._views = [vectors, list_offsets, list_members, view]
+        return index
+
+    def close(self) -> None:
+        """Release the file mapping of a loaded index."""
+        if self._mapped is not None:
+            self._vectors = self._list_offsets = self._list_members = None
+            # The mapping can only be closed once no view of it remains
+            for view in self._views:
+                view.release()
+            self._mapped.close()
+            self._mapped = None
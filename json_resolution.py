@@ -0,0 +1,69 @@
+"""
+Telemetry for turning model replies into JSON.
+
+Every reply is decoded through the same ladder of increasingly expensive
+fallbacks, and the first one that yields a JSON object resolves it:
+
+- clean_parse: the reply is valid JSON as is
+- clean_string: valid after _clean_json_string (code fences, quotes, literals)
+- repair: valid after _attempt_json_repair (quotes, trailing commas, braces)
+- regex: a JSON object found inside the reply by _extract_json_with_regex
+- fallback: nothing worked; the stage's fallback result is used
+
+Replies that fall through to "fallback" are re-asked with corrective
+instructions (see ResumeJDMatcher.max_reasks). JsonResolutionStats counts the
+path that resolved each reply per stage, the CPU time spent on each path, and
+how many re-asks were sent and how many of them produced JSON.
+"""
+import threading
+from typing import Dict, Any
+
+RESOLUTION_PATHS = ("clean_parse", "clean_string", "repair", "regex", "fallback")
+
+
+class JsonResolutionStats:
+    """Thread-safe per-stage counters of how replies were resolved into JSON."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def _stage(self, stage: str) -> Dict[str, Any]:
+        return self._stages.setdefault(stage, {
+            "responses": 0,
+            "paths": dict.fromkeys(RESOLUTION_PATHS, 0),
+            "cpu_ms": dict.fromkeys(RESOLUTION_PATHS, 0.0),
+            "reasks": 0,
+            "reasks_resolved": 0
+        })
+
+    def record(self, stage: str, path: str, cpu_seconds: float) -> None:
+        """
+        Record one decoded reply.
+
+        Args:
+            stage (str): Pipeline stage, e.g. "match_resume_to_jd"
+            path (str): Resolution path, one of RESOLUTION_PATHS
+            cpu_seconds (float): CPU time spent decoding the reply
+        """
+        with self._lock:
+            stats = self._stage(stage)
+            stats["responses"] += 1
+            stats["paths"][path] += 1
+            stats["cpu_ms"][path] += 1000 * cpu_seconds
+
+    def record_reask(self, stage: str, resolved: bool) -> None:
+        """Record one re-ask and whether its reply could be decoded."""
+        with self._lock:
+            stats = self._stage(stage)
+            stats["reasks"] += 1
+            if resolved:
+                stats["reasks_resolved"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return a copy of the counters per stage, CPU times rounded to microseconds."""
+        with self._lock:
+            return {stage: {**stats,
+                            "paths": dict(stats["paths"]),
+                            "cpu_ms": {path: round(ms, 3) for path, ms in stats["cpu_ms"].items()}}
+                    for stage, stats in self._stages.items()}
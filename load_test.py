@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+"""
+Load-testing harness for the web_app.py endpoints.
+
+Fires a configurable mix of concurrent requests at /match, /parse_resume and
+/parse_jd, stepping up the number of concurrent users, and reports throughput,
+latency percentiles and error rates per step plus the saturation point: the
+first step where adding users no longer adds throughput, or where p95 latency
+or the error rate crosses its limit.
+
+By default the Flask app is started in-process with the LLM replaced by the
+local fake server from fake_openai_server.py:
+
+    python load_test.py --concurrency 1,2,4,8,16,32 --duration 10 --llm-latency lognormal:0.8,0.4
+
+To test a deployed server instead (pointed at its own stub or the real API,
+and started with MATCHER_RESPONSE_CACHE_SIZE=0, since every request repeats
+the same texts):
+
+    python load_test.py --url http://localhost:5000 --mix match=1
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, Any, List, Optional, Tuple
+
+from benchmark import summarize
+
+ROUTES = ("match", "parse_resume", "parse_jd")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse a request mix such as "match=6,parse_resume=2,parse_jd=2".
+
+    Args:
+        spec (str): Comma-separated route=weight pairs
+
+    Returns:
+        Dict[str, float]: Route -> relative weight
+    """
+    mix = {}
+    for part in spec.split(","):
+        if not part:
+            continue
+        route, _, weight = part.partition("=")
+        route = route.strip().lstrip("/")
+        if route not in ROUTES:
+            raise ValueError(f"Unknown route '{route}'. Expected one of: {', '.join(ROUTES)}")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, mix: Dict[str, float], resume_text: str, jd_text: str,
+                 timeout: float = 60.0, seed: Optional[int] = None):
+        """
+        Initialize the load generator.
+
+        Args:
+            base_url (str): Base URL of the web app, e.g. http://127.0.0.1:5000
+            mix (Dict[str, float]): Route -> relative weight
+            resume_text (str): Resume text sent with /match and /parse_resume
+            jd_text (str): Job description text sent with /match and /parse_jd
+            timeout (float): Per-request timeout in seconds
+            seed (int, optional): Seed for the request mix
+        """
+        self.base_url = base_url.rstrip("/")
+        self.routes = list(mix)
+        self.weights = [mix[route] for route in self.routes]
+        self.timeout = timeout
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._bodies = {
+            "match": urllib.parse.urlencode({"resume": resume_text, "jd": jd_text}).encode("utf-8"),
+            "parse_resume": urllib.parse.urlencode({"resume": resume_text}).encode("utf-8"),
+            "parse_jd": urllib.parse.urlencode({"jd": jd_text}).encode("utf-8"),
+        }
+
+    def _pick_route(self) -> str:
+        with self._rng_lock:
+            return self._rng.choices(self.routes, weights=self.weights)[0]
+
+    def send(self, route: str) -> Tuple[int, float]:
+        """
+        Send one request.
+
+        Returns:
+            Tuple[int, float]: (HTTP status, or 0 for connection errors/timeouts; latency in seconds)
+        """
+        request = urllib.request.Request(
+            f"{self.base_url}/{route}", data=self._bodies[route], method="POST",
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except Exception:
+            status = 0
+        return status, time.perf_counter() - start
+
+    def run_step(self, users: int, duration: float) -> Dict[str, Any]:
+        """
+        Run a closed-loop step: each user sends requests back to back for the duration.
+
+        Args:
+            users (int): Number of concurrent users
+            duration (float): Step length in seconds
+
+        Returns:
+            Dict[str, Any]: Throughput, latency percentiles and error rate, overall and per route
+        """
+        samples: List[Tuple[str, int, float]] = []
+        samples_lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def user_loop():
+            local = []
+            while time.perf_counter() < deadline:
+                route = self._pick_route()
+                status, latency = self.send(route)
+                local.append((route, status, latency))
+            with samples_lock:
+                samples.extend(local)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=user_loop, daemon=True) for _ in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        return self._report(users, elapsed, samples)
+
+    def _report(self, users: int, elapsed: float, samples: List[Tuple[str, int, float]]) -> Dict[str, Any]:
+        """Aggregate raw samples into a step report."""
+        def aggregate(rows):
+            ok = [latency for _, status, latency in rows if 200 <= status < 300]
+            errors = len(rows) - len(ok)
+            return {
+                "requests": len(rows),
+                "successes": len(ok),
+                "errors": errors,
+                "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+                "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+                "latency": summarize(ok),
+            }
+
+        report = {"users": users, "elapsed_s": round(elapsed, 3), **aggregate(samples)}
+        report["status_codes"] = {}
+        for _, status, _ in samples:
+            report["status_codes"][str(status)] = report["status_codes"].get(str(status), 0) + 1
+        report["routes"] = {route: aggregate([s for s in samples if s[0] == route])
+                            for route in self.routes}
+        return report
+
+
+def find_saturation_point(steps: List[Dict[str, Any]], slo_p95_ms: float, max_error_rate: float,
+                          min_gain: float = 0.1) -> Optional[Dict[str, Any]]:
+    """
+    Find the first step where the server stops scaling.
+
+    A step is saturated when its p95 latency exceeds the SLO, its error rate
+    exceeds the limit, or its throughput is less than (1 + min_gain) times the
+    best throughput seen at lower concurrency.
+
+    Args:
+        steps (List[Dict[str, Any]]): Step reports in increasing order of users
+        slo_p95_ms (float): p95 latency limit in milliseconds
+        max_error_rate (float): Error rate limit (0-1)
+        min_gain (float): Minimum relative throughput gain for a step to count as scaling
+
+    Returns:
+        Optional[Dict[str, Any]]: Saturation step, the last healthy step and the reason, or None
+    """
+    best = None
+    for step in steps:
+        reason = None
+        if step["error_rate"] > max_error_rate:
+            reason = f"error rate {step['error_rate']:.1%} > {max_error_rate:.1%}"
+        elif step["latency"]["p95_ms"] > slo_p95_ms:
+            reason = f"p95 {step['latency']['p95_ms']:.0f} ms > SLO {slo_p95_ms:.0f} ms"
+        elif best and step["throughput_rps"] < best["throughput_rps"] * (1 + min_gain):
+            reason = (f"throughput {step['throughput_rps']:.2f} rps did not grow over "
+                      f"{best['throughput_rps']:.2f} rps at {best['users']} users")
+
+        if reason:
+            return {
+                "users": step["users"],
+                "last_healthy_users": best["users"] if best else None,
+                "max_throughput_rps": best["throughput_rps"] if best else step["throughput_rps"],
+                "reason": reason
+            }
+        best = step
+    return None
+
+
+def _start_local_app(llm_latency: str, seed: Optional[int]):
+    """Start the fake LLM server and the Flask app in-process, returning (base_url, stop)."""
+    from werkzeug.serving import make_server
+    from fake_openai_server import FakeOpenAIServer
+    from response_cache import ResponseCache
+    from resume_jd_matcher import ResumeJDMatcher
+    import web_app
+
+    stub = FakeOpenAIServer(latency=llm_latency, seed=seed).start()
+    # Every request repeats the same texts; measure the pipeline, not the response cache
+    # or identical model calls merged into one
+    web_app.matcher = ResumeJDMatcher(api_key="load-test", base_url=stub.base_url, coalesce=False)
+    web_app.response_cache = ResponseCache(max_entries=0)
+
+    server = make_server("127.0.0.1", 0, web_app.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        stub.stop()
+
+    return f"http://127.0.0.1:{server.server_port}", stop
+
+
+def run_load_test(concurrency_levels: List[int], duration: float, mix: Dict[str, float],
+                  url: Optional[str] = None, llm_latency: str = "lognormal:0.5,0.4",
+                  slo_p95_ms: float = 10000.0, max_error_rate: float = 0.01,
+                  timeout: float = 60.0, resume_file: Optional[str] = None,
+                  jd_file: Optional[str] = None, seed: int = 42) -> Dict[str, Any]:
+    """
+    Step through concurrency levels and locate the saturation point.
+
+    Args:
+        concurrency_levels (List[int]): Concurrent users per step, in increasing order
+        duration (float): Seconds per step
+        mix (Dict[str, float]): Route -> relative weight
+        url (str, optional): Target server; if None the app is started in-process against a stub LLM
+        llm_latency (str): Stub LLM latency distribution (in-process mode only)
+        slo_p95_ms (float): p95 latency limit for the saturation check
+        max_error_rate (float): Error rate limit for the saturation check
+        timeout (float): Per-request client timeout in seconds
+        resume_file (str, optional): Resume text file (default: the bundled sample)
+        jd_file (str, optional): Job description text file (default: the bundled sample)
+        seed (int): Seed for the request mix and stub latency
+
+    Returns:
+        Dict[str, Any]: Machine-readable load test results
+    """
+    samples_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "comparison_of_the_samples")
+    with open(resume_file or os.path.join(samples_dir, "sample_resume.txt"), 'r', encoding='utf-8') as f:
+        resume_text = f.read()
+    with open(jd_file or os.path.join(samples_dir, "sample_jd_google.txt"), 'r', encoding='utf-8') as f:
+        jd_text = f.read()
+
+    # Per-request logging from the app, werkzeug and the HTTP client would skew the numbers
+    logging.getLogger().setLevel(logging.WARNING)
+    for name in ("resume_jd_matcher", "werkzeug"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    stop = None
+    if url is None:
+        url, stop = _start_local_app(llm_latency, seed)
+
+    results = {
+        "config": {
+            "url": url, "in_process": stop is not None, "mix": mix, "duration_s": duration,
+            "concurrency_levels": concurrency_levels, "llm_latency": llm_latency if stop else None,
+            "slo_p95_ms": slo_p95_ms, "max_error_rate": max_error_rate, "timeout_s": timeout
+        },
+        "steps": []
+    }
+
+    try:
+        generator = LoadGenerator(url, mix, resume_text, jd_text, timeout=timeout, seed=seed)
+        for users in concurrency_levels:
+            step = generator.run_step(users, duration)
+            results["steps"].append(step)
+            print(f"  {users:>4} users: {step['throughput_rps']:>8.2f} rps  "
+                  f"p50 {step['latency']['p50_ms']:>8.0f} ms  p95 {step['latency']['p95_ms']:>8.0f} ms  "
+                  f"p99 {step['latency']['p99_ms']:>8.0f} ms  errors {step['error_rate']:>6.1%}")
+    finally:
+        if stop:
+            stop()
+
+    results["saturation_point"] = find_saturation_point(results["steps"], slo_p95_ms, max_error_rate)
+    return results
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Load test the Resume-JD Matcher web app')
+    parser.add_argument('--url', type=str,
+                        help='Target server (default: start web_app in-process against a stub LLM)')
+    parser.add_argument('--concurrency', type=str, default='1,2,4,8,16,32',
+                        help='Comma-separated concurrent users per step (default: 1,2,4,8,16,32)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per step (default: 10)')
+    parser.add_argument('--mix', type=str, default='match=6,parse_resume=2,parse_jd=2',
+                        help='Request mix as route=weight pairs (default: match=6,parse_resume=2,parse_jd=2)')
+    parser.add_argument('--llm-latency', type=str, default='lognormal:0.5,0.4',
+                        help='Stub LLM latency distribution (default: lognormal:0.5,0.4)')
+    parser.add_argument('--slo-p95-ms', type=float, default=10000.0,
+                        help='p95 latency limit used to find the saturation point (default: 10000)')
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help='Error rate limit used to find the saturation point (default: 0.01)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds (default: 60)')
+    parser.add_argument('--resume', type=str, help='Resume text file (default: bundled sample)')
+    parser.add_argument('--jd', type=str, help='Job description text file (default: bundled sample)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--output', type=str, default='load_test_results.json',
+                        help='Where to save the JSON results (default: load_test_results.json)')
+    return parser.parse_args()
+
+
+def main():
+    """Run the load test from the command line."""
+    args = parse_args()
+    print("Running load test...")
+    results = run_load_test(
+        concurrency_levels=[int(level) for level in args.concurrency.split(',') if level],
+        duration=args.duration,
+        mix=parse_mix(args.mix),
+        url=args.url,
+        llm_latency=args.llm_latency,
+        slo_p95_ms=args.slo_p95_ms,
+        max_error_rate=args.max_error_rate,
+        timeout=args.timeout,
+        resume_file=args.resume,
+        jd_file=args.jd,
+        seed=args.seed
+    )
+
+    saturation = results["saturation_point"]
+    if saturation:
+        print(f"\nSaturation at {saturation['users']} users: {saturation['reason']}")
+        print(f"Last healthy level: {saturation['last_healthy_users']} users, "
+              f"max throughput {saturation['max_throughput_rps']:.2f} rps")
+    else:
+        print("\nNo saturation point reached; try higher concurrency levels.")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Load test results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Content-hash manifest for incremental re-matching.
+
+Works like a build system for resume/JD matrices: the manifest records the
+content hash of every resume and job description, the prompt version and model
+used for each parse and each match result. On the next run only pairs whose
+inputs, prompt version or model changed are recomputed, and unchanged documents
+reuse their cached parse. Editing one job description in an R x J matrix then
+costs one JD parse and R matches instead of R*J full pipelines.
+
+Used by `python test_matching.py`; pass --full to ignore the manifest.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+MANIFEST_FORMAT = 1
+
+
+def file_hash(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class MatchManifest:
+    def __init__(self, path: str, prompt_version: str, model: str):
+        """
+        Load (or start) a manifest.
+
+        Args:
+            path (str): Manifest JSON file; cached parses are stored next to it in parsed/
+            prompt_version (str): Version of the prompts the current matcher uses
+            model (str): Model the current matcher uses
+        """
+        self.path = path
+        self.prompt_version = prompt_version
+        self.model = model
+        self.parsed_dir = os.path.join(os.path.dirname(os.path.abspath(path)), "parsed")
+        self._lock = threading.Lock()
+
+        self.data = {"format": MANIFEST_FORMAT, "documents": {}, "parses": {}, "results": {}}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+            if loaded.get("format") == MANIFEST_FORMAT:
+                self.data = loaded
+
+    def _is_current(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return bool(entry) and entry.get("prompt_version") == self.prompt_version and entry.get("model") == self.model
+
+    def record_document(self, path: str, doc_hash: str) -> None:
+        """Remember the content hash last seen for a document path."""
+        with self._lock:
+            self.data["documents"][path] = doc_hash
+
+    def get_parsed(self, kind: str, doc_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a cached parse for a document, if one exists for the current prompt version and model.
+
+        Args:
+            kind (str): "resume" or "jd"
+            doc_hash (str): Content hash of the document
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached parse, or None if it must be recomputed
+        """
+        entry = self.data["parses"].get(f"{kind}:{doc_hash}")
+        if not self._is_current(entry) or not os.path.exists(entry["file"]):
+            return None
+        with open(entry["file"], 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def store_parsed(self, kind: str, doc_hash: str, parsed: Dict[str, Any]) -> None:
+        """Cache a successful parse under the document's content hash."""
+        if "error" in parsed:
+            return
+        os.makedirs(self.parsed_dir, exist_ok=True)
+        parsed_file = os.path.join(self.parsed_dir, f"{kind}_{doc_hash[:16]}.json")
+        with open(parsed_file, 'w', encoding='utf-8') as f:
+            json.dump(parsed, f, indent=2)
+        with self._lock:
+            self.data["parses"][f"{kind}:{doc_hash}"] = {
+                "file": parsed_file, "prompt_version": self.prompt_version, "model": self.model
+            }
+
+    def stale_reason(self, resume_path: str, jd_path: str, resume_hash: str, jd_hash: str) -> Optional[str]:
+        """
+        Explain why a pair's stored result is out of date.
+
+        Returns:
+            Optional[str]: Reason the pair must be recomputed, or None if its result is current
+        """
+        entry = self.data["results"].get(f"{resume_path}::{jd_path}")
+        if not entry:
+            return "new pair"
+        if entry["resume_hash"] != resume_hash:
+            return "resume changed"
+        if entry["jd_hash"] != jd_hash:
+            return "job description changed"
+        if entry.get("prompt_version") != self.prompt_version:
+            return "prompt version changed"
+        if entry.get("model") != self.model:
+            return "model changed"
+        if not os.path.exists(entry.get("result_file", "")):
+            return "result file missing"
+        return None
+
+    def plan(self, pairs: List[Tuple[str, str, str, str]]) -> List[Tuple[str, str, str]]:
+        """
+        Select the pairs that need recomputing.
+
+        Args:
+            pairs (List[Tuple[str, str, str, str]]): (resume_path, jd_path, resume_hash, jd_hash) for every pair
+
+        Returns:
+            List[Tuple[str, str, str]]: (resume_path, jd_path, reason) for each stale pair
+        """
+        stale = []
+        for resume_path, jd_path, resume_hash, jd_hash in pairs:
+            reason = self.stale_reason(resume_path, jd_path, resume_hash, jd_hash)
+            if reason:
+                stale.append((resume_path, jd_path, reason))
+        return stale
+
+    def record_result(self, resume_path: str, jd_path: str, resume_hash: str, jd_hash: str,
+                      result_file: str) -> None:
+        """Record that a pair's result was computed from the given inputs."""
+        with self._lock:
+            self.data["results"][f"{resume_path}::{jd_path}"] = {
+                "resume_hash": resume_hash,
+                "jd_hash": jd_hash,
+                "prompt_version": self.prompt_version,
+                "model": self.model,
+                "result_file": result_file,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,146 @@
+"""
+Stored match pairs and their cached explanations.
+
+In scores-only mode (ResumeJDMatcher(scores_only=True), `cli.py --scores-only`)
+the match stage returns levels and scores without the five reasoning
+paragraphs, which are most of its output tokens. Bulk ranking never reads
+them. When a recruiter opens a pair, ResumeJDMatcher.explain_match writes the
+reasoning for the scores already given.
+
+PairStore keeps what that needs: the parsed resume, the parsed job
+description and the scores of each pair, by pair id, plus each explanation
+once generated, so a pair is explained at most once per prompt version and
+model. It is one SQLite file that is safe to share between the threads of a
+web server; pairs of batch result files are loaded with import_results().
+
+Used by the /match and /explain routes of web_app.py.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+
+from result_sinks import read_results
+
+
+def pair_key(parsed_resume: Dict[str, Any], parsed_jd: Dict[str, Any]) -> str:
+    """Return a stable id for a pair of parsed documents."""
+    digest = hashlib.sha256()
+    for document in (parsed_resume, parsed_jd):
+        digest.update(json.dumps(document, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class PairStore:
+    def __init__(self, path: str = ":memory:"):
+        """
+        Open (or create) a pair store.
+
+        Args:
+            path (str): SQLite database file (default: in memory, for tests and one-off runs)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS pairs (pair_id TEXT PRIMARY KEY, parsed_resume TEXT, "
+                             "parsed_jd TEXT, matching_result TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS explanations (pair_id TEXT, version TEXT, "
+                             "explanation TEXT, PRIMARY KEY (pair_id, version))")
+
+    def put(self, pair_id: str, parsed_resume: Dict[str, Any], parsed_jd: Dict[str, Any],
+            matching_result: Dict[str, Any]) -> None:
+        """Store (or replace) a pair; cached explanations of a replaced pair with other scores are dropped."""
+        row = (pair_id, json.dumps(parsed_resume), json.dumps(parsed_jd), json.dumps(matching_result))
+        with self._lock, self._db:
+            stored = self._db.execute("SELECT matching_result FROM pairs WHERE pair_id = ?", (pair_id,)).fetchone()
+            if stored is not None and stored[0] != row[3]:
+                self._db.execute("DELETE FROM explanations WHERE pair_id = ?", (pair_id,))
+            self._db.execute("INSERT OR REPLACE INTO pairs VALUES (?, ?, ?, ?)", row)
+
+    def get(self, pair_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a stored pair.
+
+        Returns:
+            Dict[str, Any]: "parsed_resume", "parsed_job_description" and "matching_result",
+                            or None for an unknown pair id
+        """
+        with self._lock:
+            row = self._db.execute("SELECT parsed_resume, parsed_jd, matching_result FROM pairs WHERE pair_id = ?",
+                                   (pair_id,)).fetchone()
+        if row is None:
+            return None
+        return {"parsed_resume": json.loads(row[0]), "parsed_job_description": json.loads(row[1]),
+                "matching_result": json.loads(row[2])}
+
+    def import_results(self, path: str) -> int:
+        """
+        Store the successful pairs of a batch result file (see batch_runner.py), under their pair_id.
+
+        Returns:
+            int: Pairs stored
+        """
+        count = 0
+        for record in read_results(path):
+            result = record.get("result")
+            if record.get("status") != "ok" or not result or "pair_id" not in record:
+                continue
+            self.put(record["pair_id"], result["parsed_resume"], result["parsed_job_description"],
+                     result["matching_result"])
+            count += 1
+        return count
+
+    def get_explanation(self, pair_id: str, version: str) -> Optional[Dict[str, Any]]:
+        """Return the cached explanation of a pair for a prompt version and model, if any."""
+        with self._lock:
+            row = self._db.execute("SELECT explanation FROM explanations WHERE pair_id = ? AND version = ?",
+                                   (pair_id, version)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put_explanation(self, pair_id: str, version: str, explanation: Dict[str, Any]) -> None:
+        """Cache the explanation of a pair."""
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO explanations VALUES (?, ?, ?)",
+                             (pair_id, version, json.dumps(explanation)))
+
+    def explain(self, matcher, pair_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a pair's matching result with reasoning, generating and caching it on first request.
+
+        Args:
+            matcher (ResumeJDMatcher): Matcher that writes missing explanations
+            pair_id (str): Stored pair
+
+        Returns:
+            Dict[str, Any]: The explained matching result, or None for an unknown pair id
+        """
+        pair = self.get(pair_id)
+        if pair is None:
+            return None
+        if not pair["matching_result"].get("scores_only"):
+            # Matched with reasoning in the first place
+            return pair["matching_result"]
+        version = matcher.explanation_version
+        explanation = self.get_explanation(pair_id, version)
+        if explanation is None:
+            explanation = matcher.explain_match(pair["parsed_resume"], pair["parsed_job_description"],
+                                                pair["matching_result"])
+            self.put_explanation(pair_id, version, explanation)
+        return explanation
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pairs").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "PairStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,266 @@
+"""
+Record/replay transport for the OpenAI calls made by ResumeJDMatcher.
+
+The RecordReplayClient exposes the same `client.chat.completions.create(...)`
+surface the matcher uses, so it can be injected in place of the OpenAI client:
+
+    from record_replay import RecordReplayClient
+    client = RecordReplayClient("replay", "cassettes", latency=(0.2, 0.8), error_rate=0.05)
+    matcher = ResumeJDMatcher(client=client)
+
+In record mode every request is forwarded to a real client and the response is
+saved as a cassette keyed by a hash of the request. In replay mode cassettes are
+served back without touching the network, optionally with simulated latency and
+injected errors. This makes parsing, caching and concurrency work measurable
+offline and reproducibly.
+
+The matcher also picks the transport up from the environment, so existing
+scripts can run offline unchanged:
+
+    MATCHER_CASSETTE_MODE=replay MATCHER_CASSETTE_DIR=cassettes python test_matching.py
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Any, Callable, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay", "auto")
+
+# Latency can be a fixed number of seconds, a (low, high) uniform range, a callable,
+# or "recorded" to replay each cassette with the latency it was recorded with
+LatencySpec = Union[None, str, float, Tuple[float, float], Callable[[], float]]
+
+
+class CassetteNotFoundError(Exception):
+    """Raised in replay mode when no cassette exists for a request."""
+
+
+class InjectedAPIError(Exception):
+    """Raised by the replay transport to simulate a failing API call."""
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """
+    Compute the cassette key for a chat completion request.
+
+    Args:
+        request (Dict[str, Any]): Keyword arguments passed to chat.completions.create
+
+    Returns:
+        str: Hex SHA-256 of the canonical JSON form of the request
+    """
+    canonical = json.dumps(request, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _response_to_dict(response: Any) -> Dict[str, Any]:
+    """Extract the parts of an OpenAI response that the matcher relies on."""
+    usage = getattr(response, "usage", None)
+    return {
+        "id": getattr(response, "id", None),
+        "model": getattr(response, "model", None),
+        "choices": [
+            {
+                "index": getattr(choice, "index", i),
+                "finish_reason": getattr(choice, "finish_reason", None),
+                "message": {
+                    "role": getattr(choice.message, "role", "assistant"),
+                    "content": choice.message.content
+                }
+            }
+            for i, choice in enumerate(response.choices)
+        ],
+        "usage": {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+            "total_tokens": getattr(usage, "total_tokens", None)
+        } if usage is not None else None
+    }
+
+
+def _dict_to_response(data: Dict[str, Any]) -> SimpleNamespace:
+    """Turn a stored response back into an object with the OpenAI attribute layout."""
+    choices = [
+        SimpleNamespace(
+            index=choice.get("index", i),
+            finish_reason=choice.get("finish_reason"),
+            message=SimpleNamespace(**choice["message"])
+        )
+        for i, choice in enumerate(data.get("choices", []))
+    ]
+    usage = SimpleNamespace(**data["usage"]) if data.get("usage") else None
+    return SimpleNamespace(id=data.get("id"), model=data.get("model"), choices=choices, usage=usage)
+
+
+def parse_latency(value: Optional[str]) -> LatencySpec:
+    """
+    Parse a latency specification from a string such as "0.5" or "0.2-1.5".
+
+    Args:
+        value (str, optional): Fixed seconds, or a "low-high" range in seconds
+
+    Returns:
+        LatencySpec: Parsed latency specification, or None if empty
+    """
+    if not value:
+        return None
+    if "-" in value.strip().lstrip("-"):
+        low, high = value.split("-", 1)
+        return (float(low), float(high))
+    return float(value)
+
+
+class _Completions:
+    def __init__(self, transport: "RecordReplayClient"):
+        self._transport = transport
+
+    def create(self, **kwargs) -> Any:
+        return self._transport._create(kwargs)
+
+
+class RecordReplayClient:
+    def __init__(self, mode: str, cassette_dir: str, real_client: Any = None,
+                 latency: LatencySpec = None, error_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialize the record/replay transport.
+
+        Args:
+            mode (str): "record" to call the real client and save cassettes, "replay" to serve
+                        saved cassettes only, or "auto" to replay when a cassette exists and record otherwise
+            cassette_dir (str): Directory holding one JSON cassette per request hash
+            real_client (Any, optional): Client used in record/auto mode, e.g. an OpenAI instance
+            latency (LatencySpec): Simulated latency for replayed responses
+            error_rate (float): Probability (0-1) that a replayed call raises InjectedAPIError
+            seed (int, optional): Seed for latency and error injection, for reproducible runs
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}'. Expected one of: {', '.join(MODES)}")
+        if mode != "replay" and real_client is None:
+            raise ValueError(f"A real client is required in '{mode}' mode")
+
+        self.mode = mode
+        self.cassette_dir = cassette_dir
+        self.real_client = real_client
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"replayed": 0, "recorded": 0, "missing": 0, "injected_errors": 0}
+
+        os.makedirs(cassette_dir, exist_ok=True)
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def cassette_path(self, key: str) -> str:
+        """Return the file path of the cassette for a request key."""
+        return os.path.join(self.cassette_dir, f"{key}.json")
+
+    def _create(self, request: Dict[str, Any]) -> Any:
+        """Serve or record a chat completion request."""
+        key = request_key(request)
+        path = self.cassette_path(key)
+
+        if self.mode == "record" or (self.mode == "auto" and not os.path.exists(path)):
+            return self._record(key, path, request)
+        return self._replay(key, path)
+
+    def _record(self, key: str, path: str, request: Dict[str, Any]) -> Any:
+        """Forward a request to the real client and save the response as a cassette."""
+        start = time.time()
+        response = self.real_client.chat.completions.create(**request)
+        elapsed = time.time() - start
+
+        cassette = {
+            "key": key,
+            "request": request,
+            "response": _response_to_dict(response),
+            "recorded_latency": elapsed
+        }
+        # Write atomically so concurrent recorders never leave a half-written cassette
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cassette, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.stats["recorded"] += 1
+        logger.info(f"Recorded cassette {key[:12]} ({elapsed:.2f}s)")
+        return response
+
+    def _replay(self, key: str, path: str) -> Any:
+        """Serve a saved cassette, applying simulated latency and error injection."""
+        if not os.path.exists(path):
+            with self._lock:
+                self.stats["missing"] += 1
+            raise CassetteNotFoundError(f"No cassette for request {key[:12]} in {self.cassette_dir}")
+
+        with open(path, 'r', encoding='utf-8') as f:
+            cassette = json.load(f)
+
+        with self._lock:
+            delay = self._next_latency(cassette)
+            inject_error = self.error_rate > 0 and self._random.random() < self.error_rate
+
+        if delay:
+            time.sleep(delay)
+
+        if inject_error:
+            with self._lock:
+                self.stats["injected_errors"] += 1
+            raise InjectedAPIError(f"Injected error for cassette {key[:12]}")
+
+        with self._lock:
+            self.stats["replayed"] += 1
+        return _dict_to_response(cassette["response"])
+
+    def _next_latency(self, cassette: Dict[str, Any]) -> float:
+        """Pick the simulated latency for one replayed call."""
+        if self.latency is None:
+            return 0.0
+        if self.latency == "recorded":
+            return cassette.get("recorded_latency") or 0.0
+        if callable(self.latency):
+            return max(0.0, self.latency())
+        if isinstance(self.latency, tuple):
+            return self._random.uniform(*self.latency)
+        return float(self.latency)
+
+
+def client_from_env(real_client_factory: Callable[[], Any]) -> Optional[RecordReplayClient]:
+    """
+    Build a record/replay client from environment variables, if configured.
+
+    MATCHER_CASSETTE_MODE       record, replay or auto (unset disables the transport)
+    MATCHER_CASSETTE_DIR        cassette directory (default: cassettes)
+    MATCHER_REPLAY_LATENCY      "0.5", "0.2-1.5" or "recorded"
+    MATCHER_REPLAY_ERROR_RATE   probability of an injected error (default: 0)
+    MATCHER_REPLAY_SEED         seed for latency and error injection
+
+    Args:
+        real_client_factory (Callable[[], Any]): Builds the real client for record/auto mode
+
+    Returns:
+        Optional[RecordReplayClient]: The configured transport, or None if not enabled
+    """
+    mode = os.environ.get("MATCHER_CASSETTE_MODE")
+    if not mode:
+        return None
+
+    latency_value = os.environ.get("MATCHER_REPLAY_LATENCY")
+    latency = "recorded" if latency_value == "recorded" else parse_latency(latency_value)
+    seed = os.environ.get("MATCHER_REPLAY_SEED")
+
+    return RecordReplayClient(
+        mode=mode,
+        cassette_dir=os.environ.get("MATCHER_CASSETTE_DIR", "cassettes"),
+        real_client=real_client_factory() if mode != "replay" else None,
+        latency=latency,
+        error_rate=float(os.environ.get("MATCHER_REPLAY_ERROR_RATE", "0")),
+        seed=int(seed) if seed else None
+    )
@@ -0,0 +1,165 @@
+"""
+Response caching and idempotency keys for the web routes.
+
+Users double-click "Match" and ATS integrations retry on timeouts, and every
+repeat used to run the whole pipeline again. ResponseCache gives each request
+a content key: a hash of the route, the whitespace-normalized form fields and
+the prompt version and models. Then:
+
+- a request whose content key has a cached response gets it without any
+  model call (X-Cache: hit)
+- a request identical to one still being computed waits for that computation
+  and shares its response (X-Cache: shared; see singleflight.py)
+- the content key is also the response's ETag, so a client that sends it back
+  in If-None-Match gets 304 Not Modified
+- a request with an Idempotency-Key header gets the response of the first
+  request with that key, including a degraded one that is not otherwise
+  cached. Reusing the key for different content is rejected.
+
+Entries expire after ttl seconds, and the least recently used entries are
+evicted beyond max_entries. Responses of failed or degraded pipelines are not
+cached by content. The cache lives in one process; under a pre-forking server
+each worker has its own.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from singleflight import SingleFlight
+
+
+def content_key(route: str, fields: Dict[str, Any], version: str) -> str:
+    """
+    Return the content key of a request.
+
+    Args:
+        route (str): Route name, e.g. "match"
+        fields (Dict[str, Any]): Request fields that determine the response; strings are
+                                 whitespace-normalized, as for single-flight model calls
+        version (str): Prompt version and models behind the response
+    """
+    normalized = {name: " ".join(value.split()) if isinstance(value, str) else value for name, value in fields.items()}
+    payload = json.dumps([route, version, normalized], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Responses kept per table (by content and by idempotency key); 0 turns
+                               caching and in-flight sharing off
+            ttl (float): Seconds a response is served from the cache
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._responses: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._idempotent: "OrderedDict[Tuple[str, str], Tuple[float, str, Any]]" = OrderedDict()
+        self._single_flight = SingleFlight()
+        self._stats = {"hits": 0, "misses": 0, "shared": 0, "replayed": 0, "conflicts": 0}
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Build a cache sized by MATCHER_RESPONSE_CACHE_SIZE, expiring after MATCHER_RESPONSE_CACHE_TTL seconds."""
+        return cls(int(os.environ.get("MATCHER_RESPONSE_CACHE_SIZE", "1024")),
+                   float(os.environ.get("MATCHER_RESPONSE_CACHE_TTL", "3600")))
+
+    def _get(self, table: OrderedDict, key) -> Optional[tuple]:
+        entry = table.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del table[key]
+            return None
+        table.move_to_end(key)
+        return entry
+
+    def _put(self, table: OrderedDict, key, entry: tuple) -> None:
+        if self.max_entries <= 0:
+            return
+        table[key] = entry
+        table.move_to_end(key)
+        while len(table) > self.max_entries:
+            table.popitem(last=False)
+
+    def replay(self, scope: str, idempotency_key: str, key: str) -> Tuple[Any, bool]:
+        """
+        Look up the response recorded for an idempotency key.
+
+        Args:
+            scope (str): Owner of the key, e.g. the tenant; keys of different scopes never collide
+            idempotency_key (str): Client-chosen Idempotency-Key
+            key (str): Content key of the current request
+
+        Returns:
+            Tuple[Any, bool]: The recorded response (None if there is none), and whether the key was
+                              first used for different content (a conflict)
+        """
+        with self._lock:
+            entry = self._get(self._idempotent, (scope, idempotency_key))
+            if entry is None:
+                return None, False
+            if entry[1] != key:
+                self._stats["conflicts"] += 1
+                return None, True
+            self._stats["replayed"] += 1
+            return entry[2], False
+
+    def record(self, scope: str, idempotency_key: str, key: str, response: Any) -> None:
+        """Record the response for an idempotency key, unless one is recorded already."""
+        with self._lock:
+            if self._get(self._idempotent, (scope, idempotency_key)) is None:
+                self._put(self._idempotent, (scope, idempotency_key), (time.monotonic() + self.ttl, key, response))
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], cacheable: Callable[[Any], bool],
+                       label: str = "default") -> Tuple[Any, str]:
+        """
+        Return the cached response for a content key, or compute it, attaching to an identical computation in flight.
+
+        Args:
+            key (str): Content key
+            compute (Callable[[], Any]): Produces the response
+            cacheable (Callable[[Any], bool]): Whether a computed response may be served to later requests
+            label (str): Counter group for in-flight coalescing, e.g. the route
+
+        Returns:
+            Tuple[Any, str]: The response and how it was obtained: "hit", "shared" or "miss"
+
+        Raises:
+            Exception: Whatever compute raised, in the request that ran it and in every request attached to it
+        """
+        if self.max_entries <= 0:
+            response = compute()
+            with self._lock:
+                self._stats["misses"] += 1
+            return response, "miss"
+
+        with self._lock:
+            entry = self._get(self._responses, key)
+            if entry is not None:
+                self._stats["hits"] += 1
+                return entry[1], "hit"
+
+        def run() -> Any:
+            response = compute()
+            if cacheable(response):
+                with self._lock:
+                    self._put(self._responses, key, (time.monotonic() + self.ttl, response))
+            return response
+
+        response, shared = self._single_flight.do(key, run, label)
+        with self._lock:
+            self._stats["shared" if shared else "misses"] += 1
+        return response, "shared" if shared else "miss"
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss, shared, replay and conflict counts, and the number of cached responses."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._responses), "idempotency_keys": len(self._idempotent)}
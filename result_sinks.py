@@ -0,0 +1,280 @@
+"""
+Append-only result sinks.
+
+Writing each result to its own indented JSON file leaves millions of tiny files
+behind at scale: inode pressure, slow directory listings and slow copies. A
+sink appends records to one file instead, choosing the format by extension:
+
+- .jsonl: one JSON object per line
+- .jsonl.gz: JSON lines in gzip members
+- .jsonl.zst: JSON lines in zstd frames (needs the zstandard package)
+- .msgpack: concatenated MessagePack records (needs the msgpack package)
+
+Writes are buffered. A sink flushes when its buffer is full, when the oldest
+buffered record has waited flush_interval seconds, and on close. Each flush of a
+compressed sink appends one self-contained, checksummed gzip member or zstd
+frame. Files can be appended to by later runs, and a crash loses at most the
+buffered records.
+
+read_results() streams records back lazily, whatever the format, so readers
+never hold a whole result file in memory. A record or block cut short by a
+crash is skipped with a warning, and reading resumes with the records a later
+run appended (MessagePack files have no markers to resume at).
+
+Compressed blocks are skipped whole. Damage is found when a block fails to
+decompress or its checksum fails at the block's end (for gzip, the CRC-32 and
+length trailer). By then the block's output is lost, since one flush
+compresses to less than a 64 KiB read. So a block that is torn or has a
+damaged trailer drops all of its records, not just the last one. The
+exception is a block torn at the very end of the file: it keeps the records
+decompressed before the cut.
+"""
+import gzip
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "jsonl.gz", "jsonl.zst", "msgpack")
+
+
+def format_for(path: str) -> str:
+    """
+    Return the sink format of a path from its extension.
+
+    Raises:
+        ValueError: If the extension is not a sink format
+    """
+    name = path.lower()
+    for extension, format in ((".jsonl.gz", "jsonl.gz"), (".jsonl.zst", "jsonl.zst"), (".jsonl", "jsonl"),
+                              (".msgpack", "msgpack"), (".mpk", "msgpack")):
+        if name.endswith(extension):
+            return format
+    raise ValueError(f"Unsupported result file '{path}'. Use one of: .jsonl, .jsonl.gz, .jsonl.zst, .msgpack")
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd result files require the zstandard package. Install it with: pip install zstandard")
+    return zstandard
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("MessagePack result files require the msgpack package. Install it with: pip install msgpack")
+    return msgpack
+
+
+class ResultSink:
+    def __init__(self, path: str, buffer_size: int = 64 * 1024, flush_interval: float = 1.0):
+        """
+        Open a result file for appending; the format follows the extension (see format_for).
+
+        Args:
+            path (str): Result file
+            buffer_size (int): Buffered bytes that trigger a flush
+            flush_interval (float): Seconds a buffered record may wait before a write flushes it
+        """
+        self.path = path
+        self.format = format_for(path)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        if self.format == "jsonl.zst":
+            # The checksum lets readers tell a frame cut short by a crash from the frame appended after it
+            self._compressor = _zstandard().ZstdCompressor(write_checksum=True)
+        elif self.format == "msgpack":
+            self._packer = _msgpack().Packer()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab")
+        if self.format == "jsonl" and self._file.tell():
+            # Start on a new line if a crash cut the last record short
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+        self._buffer: List[bytes] = []
+        self._buffered_bytes = 0
+        self._oldest = 0.0
+        self.records = 0
+
+    def _encode(self, record: Dict[str, Any]) -> bytes:
+        if self.format == "msgpack":
+            return self._packer.pack(record)
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def _frame(self, data: bytes) -> bytes:
+        if self.format == "jsonl.gz":
+            return gzip.compress(data)
+        if self.format == "jsonl.zst":
+            return self._compressor.compress(data)
+        return data
+
+    @property
+    def pending(self) -> int:
+        """Records written but not yet flushed to the file."""
+        return len(self._buffer)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Append a record, flushing the buffer if it is full or has waited flush_interval seconds."""
+        encoded = self._encode(record)
+        if not self._buffer:
+            self._oldest = time.monotonic()
+        self._buffer.append(encoded)
+        self._buffered_bytes += len(encoded)
+        self.records += 1
+        if self._buffered_bytes >= self.buffer_size or time.monotonic() - self._oldest >= self.flush_interval:
+            self.flush()
+
+    @traced("sink_flush")
+    def flush(self) -> None:
+        """Write the buffered records to the file, as one gzip member or zstd frame when compressed."""
+        if not self._buffer:
+            return
+        self._file.write(self._frame(b"".join(self._buffer)))
+        self._file.flush()
+        self._buffer.clear()
+        self._buffered_bytes = 0
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        if self._file.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_sink(path: str, **kwargs) -> ResultSink:
+    """Open a result sink for a .jsonl, .jsonl.gz, .jsonl.zst or .msgpack file (see ResultSink)."""
+    return ResultSink(path, **kwargs)
+
+
+def read_results(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the records of a result file, decoding one at a time.
+
+    Records and compressed blocks that cannot be decoded, such as those cut short by a crash
+    while writing, are skipped with a warning; reading goes on with the records after them.
+
+    Args:
+        path (str): Result file written by a sink (or any JSONL file)
+
+    Yields:
+        Dict[str, Any]: Records in the order they were written
+    """
+    format = format_for(path)
+    if format == "msgpack":
+        with open(path, "rb") as f:
+            yield from _msgpack().Unpacker(f, raw=False)
+        return
+
+    with open(path, "rb") as raw:
+        if format == "jsonl":
+            chunks = iter(lambda: raw.read(_CHUNK_SIZE), b"")
+        else:
+            chunks = _decompressed_chunks(raw, format, path)
+        for number, line in enumerate(_lines(chunks), 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping undecodable record on line {number} of {path}")
+
+
+_CHUNK_SIZE = 1 << 16
+
+
+def _decompressed_chunks(raw, format: str, path: str) -> Iterator[bytes]:
+    """
+    Decompress the gzip members or zstd frames of a file one after another.
+
+    A block that fails to decompress or whose checksum does not match is skipped by
+    resuming at the next block header. Output of the failing read is lost, so such a
+    block usually loses all of its records. Output it yielded before is ended with a
+    newline, so a record cut short there is not joined to the first record of the next block.
+    """
+    if format == "jsonl.gz":
+        magic, errors = b"\x1f\x8b\x08", (zlib.error,)
+        new_decompressor = lambda: zlib.decompressobj(wbits=31)
+    else:
+        zstandard = _zstandard()
+        magic, errors = b"\x28\xb5\x2f\xfd", (zstandard.ZstdError,)
+        new_decompressor = lambda: zstandard.ZstdDecompressor().decompressobj()
+
+    start = 0  # File offset of the current block
+    data = raw.read(_CHUNK_SIZE)
+    while data:
+        decompressor = new_decompressor()
+        fed = 0
+        try:
+            while True:
+                output = decompressor.decompress(data)
+                fed += len(data)
+                if output:
+                    yield output
+                if decompressor.eof:
+                    data = decompressor.unused_data
+                    start += fed - len(data)
+                    break
+                data = raw.read(_CHUNK_SIZE)
+                if not data:
+                    logger.warning(f"Skipping a truncated last block in {path}")
+                    yield b"\n"
+                    return
+        except errors:
+            logger.warning(f"Skipping a damaged block at byte {start} of {path}")
+            yield b"\n"
+            start = _find(raw, magic, start + 1)
+            if start is None:
+                return
+            raw.seek(start)
+            data = b""
+        if not data:
+            data = raw.read(_CHUNK_SIZE)
+
+
+def _find(raw, magic: bytes, offset: int) -> Optional[int]:
+    """Return the offset of the next occurrence of magic at or after offset, or None."""
+    raw.seek(offset)
+    tail = b""
+    while True:
+        chunk = raw.read(_CHUNK_SIZE)
+        if not chunk:
+            return None
+        window = tail + chunk
+        index = window.find(magic)
+        if index >= 0:
+            return offset - len(tail) + index
+        tail = window[-(len(magic) - 1):]
+        offset += len(chunk)
+
+
+def _lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a stream of byte chunks into lines."""
+    rest = b""
+    for chunk in chunks:
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
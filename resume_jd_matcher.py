@@ -1,128 +1,29 @@
+import hashlib
 import json
 import logging
 import os
-from typing import Dict, Any, List, Tuple
-from openai import OpenAI
+import re
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional, Tuple
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from json_resolution import JsonResolutionStats
+from scheduler import FairScheduler
+from singleflight import SingleFlight
+from token_budget import TokenBudget, TokenBudgetExceeded, TokenCounter, TokenStats, shrink_json, truncate_document, water_fill
+from tracing import span, traced
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class ResumeJDMatcher:
-    def __init__(self, api_key=None):
-        """
-        Initialize the ResumeJDMatcher with OpenAI API key.
-        
-        Args:
-            api_key (str, optional): OpenAI API key. If None, it will try to get from environment variable.
-        """
-        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
-        if not self.api_key:
-            logger.warning("OpenAI API key not provided. Please set the OPENAI_API_KEY environment variable or provide it during initialization.")
-        
-        self.client = OpenAI(api_key=self.api_key)
-        # Set the model to use for all API calls
-        self.model = "gpt-4o-mini"
-        logger.info(f"Using OpenAI model: {self.model}")
-    
-    def parse_resume(self, resume_text: str) -> Dict[str, Any]:
-        """
-        Parse resume text to extract relevant information using OpenAI API.
-        
-        Args:
-            resume_text (str): The text content of the resume
-            
-        Returns:
-            Dict[str, Any]: Parsed resume data containing education, work experience, 
-                           projects, skills, and total years of experience
-        """
-        system_prompt = "Extract the following details from the resume: Education, Work Experience, Projects, Skills, and Total Years of Experience."
-        user_prompt = resume_text
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,  # Using GPT-4o mini for better efficiency
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3  # Lower temperature for more consistent extraction
-            )
-            
-            parsed_resume = response.choices[0].message.content
-            logger.info("Resume parsed successfully")
-            
-            # Try to convert the response to a structured format if it's not already
-            try:
-                structured_data = json.loads(self._clean_json_string(parsed_resume))
-                return structured_data
-            except json.JSONDecodeError:
-                # If the response is not JSON, create a structured format manually
-                logger.warning("Resume parsing response was not valid JSON, creating structured format manually")
-                return {
-                    "parsed_resume_text": parsed_resume,
-                    "raw_resume": resume_text
-                }
-                
-        except Exception as e:
-            logger.error(f"Error parsing resume: {e}")
-            return {"error": str(e), "raw_resume": resume_text}
-    
-    def parse_job_description(self, jd_text: str) -> Dict[str, Any]:
-        """
-        Parse job description text to extract relevant information using OpenAI API.
-        
-        Args:
-            jd_text (str): The text content of the job description
-            
-        Returns:
-            Dict[str, Any]: Parsed job description data containing required qualifications,
-                           skills, and experience
-        """
-        system_prompt = "Identify and extract the required qualifications, skills, and experience from the job description."
-        user_prompt = jd_text
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3
-            )
-            
-            parsed_jd = response.choices[0].message.content
-            logger.info("Job description parsed successfully")
-            
-            # Try to convert the response to a structured format if it's not already
-            try:
-                structured_data = json.loads(self._clean_json_string(parsed_jd))
-                return structured_data
-            except json.JSONDecodeError:
-                # If the response is not JSON, create a structured format manually
-                logger.warning("Job description parsing response was not valid JSON, creating structured format manually")
-                return {
-                    "parsed_jd_text": parsed_jd,
-                    "raw_jd": jd_text
-                }
-                
-        except Exception as e:
-            logger.error(f"Error parsing job description: {e}")
-            return {"error": str(e), "raw_jd": jd_text}
-    
-    def match_resume_to_jd(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Match the parsed resume against the parsed job description using OpenAI API.
-        
-        Args:
-            resume_data (Dict[str, Any]): Parsed resume data
-            jd_data (Dict[str, Any]): Parsed job description data
-            
-        Returns:
-            Dict[str, Any]: Matching results with match levels and scores for each category
-        """
-        system_prompt = """
+# Prompts used for the three model calls. PROMPT_VERSION changes whenever any of
+# them does, so stored results can tell whether they are stale.
+RESUME_PARSE_PROMPT = "Extract the following details from the resume: Education, Work Experience, Projects, Skills, and Total Years of Experience."
+
+JD_PARSE_PROMPT = "Identify and extract the required qualifications, skills, and experience from the job description."
+
+MATCH_SYSTEM_PROMPT = """
         Compare the candidate's resume with the job description and evaluate the match level and score for Education, Work and Project Experience, Skills, and Experience Years. Provide reasoning for each category.
         
         IMPORTANT EVALUATION GUIDELINES:
@@ -182,13 +83,14 @@ class ResumeJDMatcher:
         
         CRITICAL: Your output MUST be ONLY a valid JSON object with no additional text, comments, or explanations before or after the JSON. Do not wrap the JSON in markdown code blocks or any other formatting.
         """
-        
-        user_prompt = f"""
+
+# Filled in with str.format: resume_json, jd_json and skills_note
+MATCH_USER_PROMPT_TEMPLATE = """
         PARSED RESUME:
-        {json.dumps(resume_data, indent=2)}
+        {resume_json}
         
         PARSED JOB DESCRIPTION:
-        {json.dumps(jd_data, indent=2)}
+        {jd_json}
         
         Please evaluate the match level (1-7, where 1 is lowest and 7 is highest) and match score (as a percentage) for each of the following categories:
         
@@ -228,6 +130,7 @@ class ResumeJDMatcher:
         5. Do NOT include any code block markers like ``` or ```json
         6. Do NOT include any extra explanation outside the reasoning fields
         
+        {skills_note}
         Format your response as a JSON object with the following structure:
         {{
           "education": {{"match_level": 1-7, "match_score": "xx%", "reasoning": ""}},
@@ -237,51 +140,734 @@ class ResumeJDMatcher:
           "Final_match": {{"match_level": 1-7, "Final_match_score": "xx%", "reasoning": ""}}
         }}
         """
+
+# Appended to the match prompt in scores-only mode; the reasoning is generated later, on demand
+SCORES_ONLY_NOTE = 'NOTE: Scores only. Return every "reasoning" as an empty string; do not explain the scores.'
+
+# Appended to the match prompt by explain_match, filled in with the scores as JSON
+EXPLAIN_NOTE = ("NOTE: The match levels and scores below were already given. Keep exactly these values and "
+                "write the reasoning for each category.\n        {scores_json}")
+
+# Follow-up sent after a reply that could not be decoded as JSON; the classified errors are appended
+REASK_PROMPT = "Your previous reply could not be parsed as JSON. Reply again with only one valid JSON object and no other text."
+
+PROMPT_VERSION = hashlib.sha256(
+    "\n".join([RESUME_PARSE_PROMPT, JD_PARSE_PROMPT, MATCH_SYSTEM_PROMPT, MATCH_USER_PROMPT_TEMPLATE]).encode("utf-8")
+).hexdigest()[:12]
+
+# Categories of a match result
+MATCH_KEYS = ("education", "work_and_project_experience", "skills", "experience_year", "Final_match")
+
+# Model calls of the pipeline, in order; used as keys for per-stage settings and statistics
+STAGES = ("parse_resume", "parse_job_description", "match_resume_to_jd")
+
+def parse_score(value) -> Optional[float]:
+    """
+    Read a match score such as "70%", "70" or 70 as a number.
+    
+    Returns:
+        Optional[float]: The score in percent, or None if it cannot be read
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d+(?:\.\d+)?", value) if isinstance(value, str) else None
+    return float(match.group()) if match else None
+
+def final_match_score(match_result: Dict[str, Any]) -> Optional[float]:
+    """Return the Final_match score of a matching result, or None if it is missing or malformed."""
+    final = match_result.get("Final_match")
+    return parse_score(final.get("Final_match_score")) if isinstance(final, dict) else None
+
+def configure_logging(level=logging.INFO):
+    """
+    Set up logging for command-line entry points.
+    
+    Kept out of module import so that importing the matcher stays cheap and
+    free of side effects; scripts call this once they know they will run.
+    
+    Args:
+        level (int): Logging level for the root logger
+    """
+    logging.basicConfig(level=level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+class ResumeJDMatcher:
+    def __init__(self, api_key=None, skills_engine=None, local_skills=False, skills_prefilter_threshold=None,
+                 client=None, base_url=None, token_budget=None, stage_models=None, escalation_model=None,
+                 escalation_band=(50, 75), hedger=None, circuit_breaker=None, coalesce=True,
+                 scheduler=None, max_reasks=1, scores_only=False):
+        """
+        Initialize the ResumeJDMatcher with OpenAI API key.
+        
+        Args:
+            api_key (str, optional): OpenAI API key. If None, it will try to get from environment variable.
+            skills_engine (SkillsEngine, optional): Local skills engine. A default one is created
+                                                    when local skills matching is enabled.
+            local_skills (bool): Low-cost mode. Score the skills category locally instead of
+                                 asking the model for it.
+            skills_prefilter_threshold (int, optional): Skip all model calls for pairs whose local
+                                                        skills score (0-100) is below this value.
+            client (Any, optional): Client to send chat completions through, e.g. a
+                                    record_replay.RecordReplayClient. Defaults to an OpenAI client,
+                                    wrapped in a record/replay transport if MATCHER_CASSETTE_MODE is set.
+            base_url (str, optional): OpenAI-compatible API base URL, e.g. a local fake server
+                                      for benchmarks. Defaults to OPENAI_BASE_URL or the OpenAI API.
+            token_budget (TokenBudget, optional): Per-call prompt budgets; oversized inputs are trimmed
+                                                  section by section before the call. Defaults to TokenBudget().
+            stage_models (Dict[str, str], optional): Model per stage ("parse_resume", "parse_job_description",
+                                                     "match_resume_to_jd"); stages not listed use self.model.
+            escalation_model (str, optional): Stronger model that re-matches pairs whose first-pass
+                                              Final_match score falls in escalation_band.
+            escalation_band (Tuple[float, float]): Borderline Final_match scores (percent, inclusive)
+                                                   that are escalated.
+            hedger (hedging.Hedger, optional): Re-issues calls slower than a latency percentile to cut
+                                               tail latency. Defaults to one configured by
+                                               MATCHER_HEDGE_PERCENTILE, if set.
+            circuit_breaker (circuit_breaker.CircuitBreaker, optional): Stops calling the model after
+                                               repeated failures or slow calls; matches are then
+                                               estimated locally and marked "degraded". Defaults to one
+                                               configured by the MATCHER_BREAKER_* variables (pass
+                                               False to disable).
+            coalesce (bool): Let concurrent identical calls (same model, parameters and
+                             whitespace-normalized input) share one in-flight model call.
+            scheduler (scheduler.FairScheduler, optional): Caps model calls in flight and serves waiting
+                                                           calls by priority class and tenant (see
+                                                           scheduler.request_context). Defaults to one
+                                                           sized by MATCHER_MAX_CONCURRENT_CALLS, if set.
+            max_reasks (int): Times a stage whose reply cannot be decoded as JSON is asked again,
+                              with instructions based on the errors found (0 to disable).
+            scores_only (bool): Ask the match stage for levels and scores only, without the reasoning
+                                paragraphs that make up most of its output; see explain_match.
+        """
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not self.api_key:
+            logger.warning("OpenAI API key not provided. Please set the OPENAI_API_KEY environment variable or provide it during initialization.")
+        
+        # The client (and the openai import behind it) is built on first use, see the client property
+        self.base_url = base_url
+        self._client = client
+        self._client_lock = threading.Lock()
+        # Set the model to use for all API calls
+        self.model = "gpt-4o-mini"
+        logger.info(f"Using OpenAI model: {self.model}")
+        
+        # Model cascade: per-stage overrides of self.model, and escalation of borderline matches
+        unknown_stages = set(stage_models or {}) - set(STAGES)
+        if unknown_stages:
+            raise ValueError(f"Unknown stage(s) in stage_models: {', '.join(sorted(unknown_stages))}")
+        self.stage_models = dict(stage_models or {})
+        self.escalation_model = escalation_model
+        self.escalation_band = tuple(escalation_band)
+        self.cascade_stats = {"matches": 0, "escalated": 0}
+        self._cascade_lock = threading.Lock()
+        
+        # Optional hedging of slow calls
+        if hedger is None:
+            from hedging import Hedger
+            hedger = Hedger.from_env()
+        self.hedger = hedger
+        
+        # Fail fast while the API is down, and fall back to the local heuristic scorer
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker.from_env()
+        self.circuit_breaker = circuit_breaker or None
+        self._heuristic_scorer = None
+        
+        # Concurrent identical calls share one model call; see coalescing_report
+        self.single_flight = SingleFlight() if coalesce else None
+        
+        # Interactive calls go ahead of batch and background work
+        self.scheduler = scheduler if scheduler is not None else FairScheduler.from_env()
+        
+        # Prompt tokens are counted locally before every call and trimmed to these budgets
+        self.token_budget = token_budget or TokenBudget()
+        self.token_stats = TokenStats()
+        self._token_counter = None
+        
+        # Undecodable replies are re-asked; see json_resolution_report
+        self.max_reasks = max(0, max_reasks)
+        self.json_stats = JsonResolutionStats()
+        
+        # Bulk ranking only reads the numbers; reasoning is generated per pair with explain_match
+        self.scores_only = scores_only
+        
+        # Local skills matching (prefilter and/or low-cost skills category)
+        self.local_skills = local_skills
+        self.skills_prefilter_threshold = skills_prefilter_threshold
+        self.skills_engine = skills_engine
+        if self.skills_engine is None and (local_skills or skills_prefilter_threshold is not None):
+            from skills_engine import SkillsEngine
+            self.skills_engine = SkillsEngine()
+    
+    @property
+    def client(self):
+        """
+        Client used for chat completions, constructed lazily on first access.
+        
+        Importing openai and building the client is the most expensive part of
+        startup, so it only happens when a model call is actually needed.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    def _create_client(self):
+        """
+        Build the default client: an OpenAI client, wrapped in a record/replay
+        transport if MATCHER_CASSETTE_MODE is set.
+        """
+        from openai import OpenAI
+        from record_replay import client_from_env
+        
+        client = client_from_env(lambda: OpenAI(api_key=self.api_key, base_url=self.base_url))
+        return client if client is not None else OpenAI(api_key=self.api_key, base_url=self.base_url)
+    
+    def model_for(self, stage: str) -> str:
+        """Return the model used for a pipeline stage."""
+        return self.stage_models.get(stage, self.model)
+    
+    @property
+    def model_signature(self) -> str:
+        """
+        Identify the models and scoring settings behind a result, for cache and checkpoint keys.
+        
+        Equal to self.model unless stages use other models, escalation is enabled,
+        results are scores-only, skills are scored locally or pairs are prefiltered.
+        """
+        overrides = {stage: model for stage, model in self.stage_models.items() if model != self.model}
+        if not overrides and not self.escalation_model and not self.scores_only and not self.local_skills \
+                and self.skills_prefilter_threshold is None:
+            return self.model
+        parts = [self.model] + [f"{stage}={model}" for stage, model in sorted(overrides.items())]
+        if self.escalation_model:
+            parts.append(f"escalate={self.escalation_model}@{self.escalation_band[0]}-{self.escalation_band[1]}")
+        if self.scores_only:
+            parts.append("scores-only")
+        if self.local_skills:
+            parts.append("local-skills")
+        if self.skills_prefilter_threshold is not None:
+            parts.append(f"skills-prefilter={self.skills_prefilter_threshold}")
+        return ",".join(parts)
+    
+    @property
+    def token_counter(self) -> TokenCounter:
+        """Token counter for the current model, created on first use (tiktoken is slow to import)."""
+        if self._token_counter is None or self._token_counter.model != self.model:
+            self._token_counter = TokenCounter(self.model)
+        return self._token_counter
+    
+    def _chat_completion(self, stage: str, messages: List[Dict[str, str]], model: str = None,
+                         trimmed_tokens: int = 0, **kwargs) -> str:
+        """
+        Send one chat completion for a pipeline stage and return the reply text.
+        
+        All model calls go through here, so per-call settings and accounting live in one place.
+        A call identical to one already in flight waits for that one and shares its reply.
+        
+        Args:
+            stage (str): Pipeline stage, used for token statistics and latency tracking
+            messages (List[Dict[str, str]]): Chat messages
+            model (str, optional): Model to call (default: the stage's model, see model_for)
+            trimmed_tokens (int): Tokens removed from the prompt to meet the budget
+            **kwargs: Extra arguments for chat.completions.create, e.g. response_format
+            
+        Returns:
+            str: Content of the first choice
+        
+        Raises:
+            CircuitOpenError: If the circuit breaker is open and the call was not made
+        """
+        model = model or self.model_for(stage)
+        if self.token_budget.max_output_tokens is not None:
+            kwargs.setdefault("max_tokens", self.token_budget.max_output_tokens)
+        
+        def send():
+            breaker = self.circuit_breaker
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(f"{stage}: model calls suspended after repeated failures")
+            
+            prompt_tokens = self.token_counter.count_messages(messages)
+            
+            def create():
+                return self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.3,  # Lower temperature for more consistent extraction
+                    **kwargs
+                )
+            
+            # Wait for a slot behind higher-priority work; latency is measured from the send
+            queued = time.perf_counter()
+            with self.scheduler.slot() if self.scheduler is not None else nullcontext():
+                start = time.perf_counter()
+                try:
+                    with span("network", wait_ms=round(1000 * (start - queued), 3), hedged=self.hedger is not None):
+                        if self.hedger is not None:
+                            # A hedge takes a slot of its own, if one is free
+                            response = self.hedger.call(stage, create, self.scheduler)
+                        else:
+                            response = create()
+                except Exception as e:
+                    if breaker is not None:
+                        breaker.record_failure(e)
+                    raise
+                if breaker is not None:
+                    breaker.record_success(time.perf_counter() - start)
+            
+            usage = getattr(response, "usage", None)
+            self.token_stats.record(stage, prompt_tokens, trimmed_tokens, getattr(usage, "prompt_tokens", None))
+            return response.choices[0].message.content
+        
+        with span("model_call", stage=stage, model=model) as call_span:
+            if self.single_flight is None:
+                return send()
+            # Identical calls already in flight are joined rather than repeated; inputs that
+            # differ only in whitespace count as identical
+            key = (model, json.dumps(kwargs, sort_keys=True),
+                   tuple((message["role"], " ".join((message.get("content") or "").split())) for message in messages))
+            content, shared = self.single_flight.do(key, send, stage)
+            call_span.set(shared=shared)
+            if shared:
+                logger.info(f"{stage}: shared the result of an identical call in flight")
+            return content
+    
+    @traced("decode_json")
+    def _decode_json(self, stage: str, text: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Decode a model reply into a JSON object, trying the cheapest way first.
+        
+        The path that resolved the reply, and the CPU time spent, are recorded
+        in self.json_stats (see json_resolution.py).
+        
+        Returns:
+            Tuple[Optional[Dict[str, Any]], str]: The object (None if no path worked) and the
+                                                  resolution path
+        """
+        start = time.thread_time()
+        decoded, path = None, "fallback"
+        try:
+            decoded, path = json.loads(text), "clean_parse"
+        except (json.JSONDecodeError, TypeError):
+            cleaned = self._clean_json_string(text)
+            try:
+                decoded, path = json.loads(cleaned), "clean_string"
+            except json.JSONDecodeError:
+                try:
+                    decoded, path = json.loads(self._attempt_json_repair(cleaned)), "repair"
+                except json.JSONDecodeError:
+                    extracted = self._extract_json_with_regex(text)
+                    if extracted:
+                        decoded, path = extracted, "regex"
+        if not isinstance(decoded, dict):
+            decoded, path = None, "fallback"
+        self.json_stats.record(stage, path, time.thread_time() - start)
+        return decoded, path
+    
+    def _complete_json(self, stage: str, messages: List[Dict[str, str]], required_keys: Tuple[str, ...] = (),
+                       **kwargs) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Call a stage and decode its reply, re-asking up to max_reasks times when the reply is not usable JSON.
+        
+        A re-ask repeats only this stage's call, with the bad reply and instructions for the
+        errors _classify_json_error found in it (or the keys it lacks) appended to the
+        conversation. Replies without any '{' are prose rather than broken JSON and are not
+        re-asked.
+        
+        Args:
+            stage (str): Pipeline stage
+            messages (List[Dict[str, str]]): Chat messages of the first call
+            required_keys (Tuple[str, ...]): Top-level keys a usable reply has, e.g. a match
+                                             reply cut short has lost "Final_match"
+            **kwargs: Passed to _chat_completion
+            
+        Returns:
+            Tuple[str, Optional[Dict[str, Any]]]: The reply and its decoded object (None if no reply
+                                                  could be decoded); a re-ask that did no better
+                                                  than the reply before it is discarded
+        """
+        text = self._chat_completion(stage, messages, **kwargs)
+        decoded, _ = self._decode_json(stage, text)
+        # Trimming was already accounted for on the first call
+        kwargs["trimmed_tokens"] = 0
+        for attempt in range(1, self.max_reasks + 1):
+            missing = [key for key in required_keys if key not in decoded] if decoded is not None else []
+            if decoded is not None and not missing:
+                break
+            if decoded is None and "{" not in (text or ""):
+                break
+            if missing:
+                instructions = f"Include all of these keys: {', '.join(missing)}."
+            else:
+                instructions = self._update_prompt_based_on_errors(self._classify_json_error(self._clean_json_string(text)))
+            messages = messages + [
+                {"role": "assistant", "content": text},
+                {"role": "user", "content": "\n".join(filter(None, [REASK_PROMPT, instructions]))}
+            ]
+            logger.warning(f"{stage}: reply was not usable JSON; asking again ({attempt}/{self.max_reasks})")
+            try:
+                with span("reask", stage=stage, attempt=attempt):
+                    retry_text = self._chat_completion(stage, messages, **kwargs)
+            except Exception as e:
+                # Keep the reply we have and let the stage fall back
+                logger.warning(f"{stage}: re-ask failed: {e}")
+                break
+            retry_decoded, _ = self._decode_json(stage, retry_text)
+            resolved = retry_decoded is not None and all(key in retry_decoded for key in required_keys)
+            self.json_stats.record_reask(stage, resolved)
+            if retry_decoded is not None or decoded is None:
+                text, decoded = retry_text, retry_decoded
+        return text, decoded
+    
+    def json_resolution_report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Report, per stage, which path resolved each reply into JSON, the CPU time per path, and the re-asks.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: {"responses", "paths", "cpu_ms", "reasks", "reasks_resolved"} per stage
+        """
+        return self.json_stats.snapshot()
+    
+    @traced("fit_document")
+    def _fit_document(self, stage: str, text: str) -> Tuple[str, int]:
+        """
+        Trim a resume or job description to the parse budget.
+        
+        Returns:
+            Tuple[str, int]: The text to send and the number of tokens trimmed
+        """
+        limit = self.token_budget.parse_input_tokens
+        if limit is None or self.token_counter.fits(text, limit):
+            return text, 0
+        fitted = truncate_document(text, limit, self.token_counter)
+        trimmed = self.token_counter.count(text) - self.token_counter.count(fitted)
+        logger.warning(f"{stage}: input trimmed by {trimmed} tokens to fit the {limit}-token budget")
+        return fitted, trimmed
+    
+    @traced("build_match_prompt")
+    def _fit_match_prompt(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any], skills_note: str) -> Tuple[str, int]:
+        """
+        Build the match user prompt within the match budget.
+        
+        Oversized prompts embed the parsed documents without indentation, and
+        if that is not enough, with their longest fields shortened.
+        
+        Returns:
+            Tuple[str, int]: The user prompt and the number of tokens trimmed
+        
+        Raises:
+            TokenBudgetExceeded: If the prompt cannot be made to fit
+        """
+        user_prompt = MATCH_USER_PROMPT_TEMPLATE.format(
+            resume_json=json.dumps(resume_data, indent=2),
+            jd_json=json.dumps(jd_data, indent=2),
+            skills_note=skills_note
+        )
+        limit = self.token_budget.match_prompt_tokens
+        if limit is None:
+            return user_prompt, 0
+        
+        counter = self.token_counter
+        messages = [{"role": "system", "content": MATCH_SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}]
+        original = counter.count_messages(messages)
+        if original <= limit:
+            return user_prompt, 0
+        
+        # Share what the fixed instructions leave between the two documents
+        overhead = counter.count_messages([
+            {"role": "system", "content": MATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": MATCH_USER_PROMPT_TEMPLATE.format(resume_json="", jd_json="", skills_note=skills_note)}
+        ])
+        compact = {"separators": (",", ":")}
+        sizes = [counter.count(json.dumps(resume_data, **compact)), counter.count(json.dumps(jd_data, **compact))]
+        resume_cap, jd_cap = water_fill(sizes, limit - overhead)
+        user_prompt = MATCH_USER_PROMPT_TEMPLATE.format(
+            resume_json=json.dumps(shrink_json(resume_data, resume_cap, counter), **compact),
+            jd_json=json.dumps(shrink_json(jd_data, jd_cap, counter), **compact),
+            skills_note=skills_note
+        )
+        
+        sent = counter.count_messages([{"role": "system", "content": MATCH_SYSTEM_PROMPT},
+                                       {"role": "user", "content": user_prompt}])
+        if sent > limit:
+            raise TokenBudgetExceeded(f"Match prompt needs {sent} tokens, over the {limit}-token budget")
+        logger.warning(f"match_resume_to_jd: prompt trimmed by {original - sent} tokens to fit the {limit}-token budget")
+        return user_prompt, original - sent
+    
+    @traced()
+    def parse_resume(self, resume_text: str) -> Dict[str, Any]:
+        """
+        Parse resume text to extract relevant information using OpenAI API.
+        
+        Args:
+            resume_text (str): The text content of the resume
+            
+        Returns:
+            Dict[str, Any]: Parsed resume data containing education, work experience, 
+                           projects, skills, and total years of experience
+        """
+        system_prompt = RESUME_PARSE_PROMPT
+        user_prompt, trimmed_tokens = self._fit_document("parse_resume", resume_text)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            parsed_resume, structured_data = self._complete_json(
+                "parse_resume",
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                temperature=0.3,
-                response_format={"type": "json_object"}  # Request JSON format explicitly if using LLMs that support this
+                trimmed_tokens=trimmed_tokens
             )
+            logger.info("Resume parsed successfully")
             
-            match_result_text = response.choices[0].message.content
-            logger.info("Resume-JD matching completed successfully")
+            if structured_data is not None:
+                return structured_data
+            # If the response is not JSON, create a structured format manually
+            logger.warning("Resume parsing response was not valid JSON, creating structured format manually")
+            return {
+                "parsed_resume_text": parsed_resume,
+                "raw_resume": resume_text
+            }
+                
+        except Exception as e:
+            logger.error(f"Error parsing resume: {e}")
+            return {"error": str(e), "raw_resume": resume_text}
+    
+    @traced()
+    def parse_job_description(self, jd_text: str) -> Dict[str, Any]:
+        """
+        Parse job description text to extract relevant information using OpenAI API.
+        
+        Args:
+            jd_text (str): The text content of the job description
             
-            try:
-                match_result = json.loads(self._clean_json_string(match_result_text))
-                expected_keys = ["education", "work_and_project_experience", "skills", "experience_year", "Final_match"]
-                for key in expected_keys:
-                    if key not in match_result:
-                        logger.warning(f"Missing expected key '{key}' in match result. Adding default value.")
-                        if key == "Final_match":
-                            match_result[key] = {"match_level": 1, "Final_match_score": "0%", "reasoning": "Missing data"}
-                        else:
-                            match_result[key] = {"match_level": 1, "match_score": "0%", "reasoning": "Missing data"}
+        Returns:
+            Dict[str, Any]: Parsed job description data containing required qualifications,
+                           skills, and experience
+        """
+        system_prompt = JD_PARSE_PROMPT
+        user_prompt, trimmed_tokens = self._fit_document("parse_job_description", jd_text)
+        
+        try:
+            parsed_jd, structured_data = self._complete_json(
+                "parse_job_description",
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                trimmed_tokens=trimmed_tokens
+            )
+            logger.info("Job description parsed successfully")
+            
+            if structured_data is not None:
+                return structured_data
+            # If the response is not JSON, create a structured format manually
+            logger.warning("Job description parsing response was not valid JSON, creating structured format manually")
+            return {
+                "parsed_jd_text": parsed_jd,
+                "raw_jd": jd_text
+            }
                 
-                return match_result
-            except json.JSONDecodeError as e:
-                logger.error(f"Error parsing match result JSON: {e}")
+        except Exception as e:
+            logger.error(f"Error parsing job description: {e}")
+            return {"error": str(e), "raw_jd": jd_text}
+    
+    @traced()
+    def match_resume_to_jd(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any],
+                           scores_only: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Match the parsed resume against the parsed job description using OpenAI API.
+        
+        With an escalation model configured, the match stage model gives a first
+        pass, and only pairs whose Final_match score falls in the escalation band
+        are matched again with the escalation model. The result then carries a
+        "cascade" entry saying which model produced it.
+        
+        Args:
+            resume_data (Dict[str, Any]): Parsed resume data
+            jd_data (Dict[str, Any]): Parsed job description data
+            scores_only (bool, optional): Return levels and scores with empty reasoning, marked
+                                          "scores_only": True (default: self.scores_only)
+            
+        Returns:
+            Dict[str, Any]: Matching results with match levels and scores for each category
+        """
+        if scores_only is None:
+            scores_only = self.scores_only
+        first_model = self.model_for("match_resume_to_jd")
+        match_result, ok = self._match_with_model(resume_data, jd_data, first_model, scores_only)
+        if not self.escalation_model:
+            return match_result
+        
+        first_score = final_match_score(match_result)
+        low, high = self.escalation_band
+        escalate = ok and first_score is not None and low <= first_score <= high
+        with self._cascade_lock:
+            self.cascade_stats["matches"] += 1
+            if escalate:
+                self.cascade_stats["escalated"] += 1
+        
+        cascade = {"first_pass_model": first_model, "first_pass_score": first_score,
+                   "model": first_model, "escalated": False}
+        if escalate:
+            logger.info(f"Borderline first-pass score {first_score}% in [{low}, {high}]; escalating to {self.escalation_model}")
+            escalated_result, escalated_ok = self._match_with_model(resume_data, jd_data, self.escalation_model, scores_only)
+            # Keep the first pass if the stronger model failed
+            if escalated_ok:
+                match_result = escalated_result
+                cascade.update(model=self.escalation_model, escalated=True)
+        match_result["cascade"] = cascade
+        return match_result
+    
+    @traced()
+    def explain_match(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any],
+                      match_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Write the reasoning for a scores-only matching result, e.g. when a recruiter opens the pair.
+        
+        The model is given the scores and asked to explain them, so the reasoning
+        agrees with the numbers already used for ranking. Categories that already
+        have reasoning (such as a locally scored skills category) are kept as they are.
+        
+        Args:
+            resume_data (Dict[str, Any]): Parsed resume data
+            jd_data (Dict[str, Any]): Parsed job description data
+            match_result (Dict[str, Any]): Matching result returned with scores_only
+            
+        Returns:
+            Dict[str, Any]: The matching result with the reasoning filled in; levels and scores unchanged
+        
+        Raises:
+            ValueError: If the model's reply could not be decoded
+        """
+        scores = {key: {name: value for name, value in match_result[key].items() if name != "reasoning"}
+                  for key in MATCH_KEYS if isinstance(match_result.get(key), dict)}
+        explain_note = EXPLAIN_NOTE.format(scores_json=json.dumps(scores))
+        user_prompt, trimmed_tokens = self._fit_match_prompt(resume_data, jd_data, explain_note)
+        _, explained = self._complete_json(
+            "explain_match",
+            [
+                {"role": "system", "content": MATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            required_keys=MATCH_KEYS,
+            model=self.model_for("match_resume_to_jd"),
+            trimmed_tokens=trimmed_tokens,
+            response_format={"type": "json_object"}
+        )
+        if explained is None:
+            raise ValueError("Could not parse the explanation returned by the model")
+        
+        result = {key: dict(value) if isinstance(value, dict) else value
+                  for key, value in match_result.items() if key != "scores_only"}
+        for key in MATCH_KEYS:
+            category = result.get(key)
+            if isinstance(category, dict) and not category.get("reasoning"):
+                reasoning = explained.get(key, {})
+                category["reasoning"] = reasoning.get("reasoning", "") if isinstance(reasoning, dict) else ""
+        return result
+    
+    @property
+    def explanation_version(self) -> str:
+        """Identify the prompts and model behind an explanation, for caching it."""
+        return f"{PROMPT_VERSION}:{self.model_for('match_resume_to_jd')}"
+    
+    def cascade_report(self) -> Dict[str, Any]:
+        """
+        Report the per-stage models and how often matches were escalated.
+        
+        Returns:
+            Dict[str, Any]: Stage models, escalation settings and counters
+        """
+        with self._cascade_lock:
+            matches, escalated = self.cascade_stats["matches"], self.cascade_stats["escalated"]
+        return {
+            "stage_models": {stage: self.model_for(stage) for stage in STAGES},
+            "escalation_model": self.escalation_model,
+            "escalation_band": list(self.escalation_band),
+            "matches": matches,
+            "escalated": escalated,
+            "escalation_rate": round(escalated / matches, 4) if matches else 0.0
+        }
+    
+    def coalescing_report(self) -> Dict[str, Dict[str, int]]:
+        """
+        Report, per stage, how many model calls were made and how many requests shared an in-flight call.
+        
+        Returns:
+            Dict[str, Dict[str, int]]: {"calls": ..., "coalesced": ...} per stage (empty when coalescing is off)
+        """
+        return self.single_flight.stats() if self.single_flight is not None else {}
+    
+    def _match_with_model(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any], model: str,
+                          scores_only: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """
+        Run one match call with the given model.
+        
+        Returns:
+            Tuple[Dict[str, Any], bool]: The matching result, and whether the model produced
+                                         a usable one (False for the all-zeros error results,
+                                         which are marked with an "error" entry)
+        """
+        system_prompt = MATCH_SYSTEM_PROMPT
+        
+        # In low-cost mode the skills category is scored locally, so don't pay for its reasoning
+        skills_note = ""
+        if self.local_skills:
+            skills_note = 'NOTE: Skills are scored separately. For "skills", return match_level 1, match_score "0%" and an empty reasoning string.'
+        if scores_only:
+            skills_note = "\n        ".join(filter(None, [skills_note, SCORES_ONLY_NOTE]))
+        
+        try:
+            user_prompt, trimmed_tokens = self._fit_match_prompt(resume_data, jd_data, skills_note)
+            match_result_text, match_result = self._complete_json(
+                "match_resume_to_jd",
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                required_keys=MATCH_KEYS,
+                model=model,
+                trimmed_tokens=trimmed_tokens,
+                response_format={"type": "json_object"}  # Request JSON format explicitly if using LLMs that support this
+            )
+            logger.info("Resume-JD matching completed successfully")
+            
+            if match_result is None:
+                logger.error("Could not parse the match result JSON, even after asking again")
                 logger.error(f"Received text: {match_result_text}")
+                # Salvage what we can into a valid result with default values
+                salvaged = self._extract_json_from_text(match_result_text)
+                salvaged["error"] = "Could not parse the match result"
+                return salvaged, False
+            
+            for key in MATCH_KEYS:
+                if not isinstance(match_result.get(key), dict):
+                    if key in match_result:
+                        logger.warning(f"Malformed '{key}' in match result: {match_result[key]!r}. Using default value.")
+                    else:
+                        logger.warning(f"Missing expected key '{key}' in match result. Adding default value.")
+                    if key == "Final_match":
+                        match_result[key] = {"match_level": 1, "Final_match_score": "0%", "reasoning": "Missing data"}
+                    else:
+                        match_result[key] = {"match_level": 1, "match_score": "0%", "reasoning": "Missing data"}
+            
+            if scores_only:
+                # Drop whatever reasoning the model wrote anyway; explain_match fills it in consistently
+                for key in MATCH_KEYS:
+                    if isinstance(match_result[key], dict):
+                        match_result[key]["reasoning"] = ""
+                match_result["scores_only"] = True
+            
+            return self._apply_local_skills(match_result, resume_data, jd_data), True
                 
-                # Try to extract JSON from the text if possible
-                match_result = self._extract_json_from_text(match_result_text)
-                if match_result:
-                    return match_result
-                
-                # If everything fails, return a valid JSON with default values
-                return {
-                    "education": {"match_level": 1, "match_score": "0%", "reasoning": f"Failed to parse response: {str(e)}"},
-                    "work_and_project_experience": {"match_level": 1, "match_score": "0%", "reasoning": "JSON parsing error"},
-                    "skills": {"match_level": 1, "match_score": "0%", "reasoning": "JSON parsing error"},
-                    "experience_year": {"match_level": 1, "match_score": "0%", "reasoning": "JSON parsing error"},
-                    "Final_match": {"match_level": 1, "Final_match_score": "0%", "reasoning": "JSON parsing error"}
-                }
-                
+        except CircuitOpenError as e:
+            logger.warning(f"{e}; estimating the match locally")
+            return self.heuristic_match(resume_data, jd_data), False
         except Exception as e:
             logger.error(f"Error matching resume to job description: {e}")
             # Return a valid JSON with error information instead of an error object
@@ -290,9 +876,67 @@ class ResumeJDMatcher:
                 "work_and_project_experience": {"match_level": 1, "match_score": "0%", "reasoning": "Processing error"},
                 "skills": {"match_level": 1, "match_score": "0%", "reasoning": "Processing error"},
                 "experience_year": {"match_level": 1, "match_score": "0%", "reasoning": "Processing error"},
-                "Final_match": {"match_level": 1, "Final_match_score": "0%", "reasoning": "Processing error"}
-            }
+                "Final_match": {"match_level": 1, "Final_match_score": "0%", "reasoning": "Processing error"},
+                "error": str(e)
+            }, False
     
+    @traced()
+    def heuristic_match(self, resume_data: Dict[str, Any], jd_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Estimate a match locally, without any API call; used while the circuit breaker is open.
+        
+        Args:
+            resume_data (Dict[str, Any]): Parsed resume data (or the error result of a failed parse)
+            jd_data (Dict[str, Any]): Parsed job description data (or the error result of a failed parse)
+            
+        Returns:
+            Dict[str, Any]: Matching result marked "degraded": True
+        """
+        if self._heuristic_scorer is None:
+            from heuristic_scorer import HeuristicScorer
+            if self.skills_engine is None:
+                from skills_engine import SkillsEngine
+                self.skills_engine = SkillsEngine()
+            self._heuristic_scorer = HeuristicScorer(self.skills_engine)
+        # Prefer the raw text when parsing failed, as in _apply_local_skills
+        return self._heuristic_scorer.match(resume_data.get("raw_resume", resume_data), jd_data.get("raw_jd", jd_data))
+    
+    def local_skills_match(self, resume, jd) -> Dict[str, Any]:
+        """
+        Score the skills overlap locally, without any API call.
+        
+        Args:
+            resume (Union[str, Dict[str, Any]]): Resume text or parsed resume data
+            jd (Union[str, Dict[str, Any]]): Job description text or parsed job description data
+            
+        Returns:
+            Dict[str, Any]: A "skills" category result with matched/missing skills and a score
+        """
+        if self.skills_engine is None:
+            from skills_engine import SkillsEngine
+            self.skills_engine = SkillsEngine()
+        return self.skills_engine.match(resume, jd)
+    
+    def _apply_local_skills(self, match_result: Dict[str, Any], resume_data: Dict[str, Any], jd_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace the model's skills category with the local skills match in low-cost mode.
+        
+        Args:
+            match_result (Dict[str, Any]): Matching result returned by the model
+            resume_data (Dict[str, Any]): Parsed resume data
+            jd_data (Dict[str, Any]): Parsed job description data
+            
+        Returns:
+            Dict[str, Any]: The matching result, with the skills category scored locally if enabled
+        """
+        if self.local_skills:
+            # Prefer the raw text when parsing failed; it has the section headings
+            resume_source = resume_data.get("raw_resume", resume_data)
+            jd_source = jd_data.get("raw_jd", jd_data)
+            match_result["skills"] = self.local_skills_match(resume_source, jd_source)
+        return match_result
+    
+    @traced("clean_json_string")
     def _clean_json_string(self, json_string: str) -> str:
         """
         Clean a JSON string to make it more likely to parse correctly.
@@ -339,6 +983,7 @@ class ResumeJDMatcher:
             
         return json_string
     
+    @traced("extract_json_from_text")
     def _extract_json_from_text(self, text: str) -> Dict[str, Any]:
         """
         Try to extract a JSON object from text using various methods.
@@ -414,6 +1059,7 @@ class ResumeJDMatcher:
                 "Final_match": {"match_level": 1, "Final_match_score": "0%", "reasoning": "JSON parsing error"}
             }
             
+    @traced("extract_json_with_regex")
     def _extract_json_with_regex(self, text: str) -> Dict[str, Any]:
         """
         Extract JSON from text using regular expressions for more precision.
@@ -448,6 +1094,7 @@ class ResumeJDMatcher:
         # Return empty dict if no valid JSON found
         return {}
         
+    @traced("classify_json_error")
     def _classify_json_error(self, json_string: str) -> Dict[str, bool]:
         """
         Classify the type of JSON error for better diagnostics.
@@ -489,6 +1136,7 @@ class ResumeJDMatcher:
         
         return error_types
         
+    @traced("attempt_json_repair")
     def _attempt_json_repair(self, json_string: str) -> str:
         """
         Attempt to repair common JSON formatting issues.
@@ -556,6 +1204,7 @@ class ResumeJDMatcher:
         # Add these instructions to the prompt
         return "\n".join(additional_instructions)
         
+    @traced()
     def validate_json_output(self, json_str: str) -> Dict[str, Any]:
         """
         Validate and parse a JSON string, with thorough error handling.
@@ -605,17 +1254,64 @@ class ResumeJDMatcher:
                 "received_text": json_str[:100] + "..." if len(json_str) > 100 else json_str
             }
     
-    def process_resume_and_jd(self, resume_text: str, jd_text: str) -> Dict[str, Any]:
+    @traced()
+    def skills_prefilter(self, resume_text: str, jd_text: str) -> Dict[str, Any]:
+        """
+        Reject a pair locally if its skills score is below the prefilter threshold.
+        
+        Args:
+            resume_text (str): The text content of the resume
+            jd_text (str): The text content of the job description
+            
+        Returns:
+            Dict[str, Any]: A complete low-score result marked "prefiltered" if the pair is
+                            rejected, or None if it should go to the model (including when the
+                            job description names no skills from the taxonomy)
+        """
+        if self.skills_prefilter_threshold is None:
+            return None
+        
+        skills_result = self.local_skills_match(resume_text, jd_text)
+        # A job description without taxonomy skills (nursing, sales, teaching) scores 0 but says nothing about fit
+        if not any(skills_result[key] for key in ("matched_skills", "missing_skills",
+                                                   "matched_preferred_skills", "missing_preferred_skills")):
+            return None
+        if skills_result["score"] >= self.skills_prefilter_threshold:
+            return None
+        
+        logger.info(f"Pair rejected by skills prefilter ({skills_result['match_score']} < {self.skills_prefilter_threshold}%)")
+        reasoning = f"Skipped by local skills prefilter: skills score {skills_result['match_score']} is below {self.skills_prefilter_threshold}%"
+        return {
+            "parsed_resume": {"raw_resume": resume_text},
+            "parsed_job_description": {"raw_jd": jd_text},
+            "matching_result": {
+                "education": {"match_level": 1, "match_score": "0%", "reasoning": reasoning},
+                "work_and_project_experience": {"match_level": 1, "match_score": "0%", "reasoning": reasoning},
+                "skills": skills_result,
+                "experience_year": {"match_level": 1, "match_score": "0%", "reasoning": reasoning},
+                "Final_match": {"match_level": 1, "Final_match_score": "0%", "reasoning": reasoning}
+            },
+            "prefiltered": True
+        }
+    
+    @traced()
+    def process_resume_and_jd(self, resume_text: str, jd_text: str, scores_only: Optional[bool] = None) -> Dict[str, Any]:
         """
         Process a resume and job description pair to get matching results.
         
         Args:
             resume_text (str): The text content of the resume
             jd_text (str): The text content of the job description
+            scores_only (bool, optional): Match without reasoning (default: self.scores_only)
             
         Returns:
             Dict[str, Any]: Complete processing results including parsed data and matching
         """
+        # Skip the model calls entirely for pairs with too little skills overlap
+        prefiltered = self.skills_prefilter(resume_text, jd_text)
+        if prefiltered is not None:
+            return prefiltered
+        
         # Parse the resume
         parsed_resume = self.parse_resume(resume_text)
         
@@ -623,24 +1319,70 @@ class ResumeJDMatcher:
         parsed_jd = self.parse_job_description(jd_text)
         
         # Match the resume to the job description
-        match_result = self.match_resume_to_jd(parsed_resume, parsed_jd)
+        match_result = self.match_resume_to_jd(parsed_resume, parsed_jd, scores_only=scores_only)
         
         # Return the complete results
-        return {
+        result = {
             "parsed_resume": parsed_resume,
             "parsed_job_description": parsed_jd,
             "matching_result": match_result
         }
+        if match_result.get("degraded"):
+            # Estimated locally while the model was unavailable
+            result["degraded"] = True
+        return result
+
+    def match_top_jds(self, resume_text: str, index, top_n: int = 5, load_jd=None) -> List[Dict[str, Any]]:
+        """
+        Retrieve the postings closest to a resume from a job description index and match only those.
+
+        Args:
+            resume_text (str): The text content of the resume
+            index (JDIndex): Index of the posting corpus (see jd_index.py)
+            top_n (int): Postings to retrieve and match
+            load_jd (Callable[[str], str], optional): Returns a posting's text for its index key
+                                                      (default: read the key as a document path)
+
+        Returns:
+            List[Dict[str, Any]]: One result per retrieved posting with its "jd" key and retrieval
+                                  "similarity", best final match first
+        """
+        if load_jd is None:
+            from ingestion import extract_text as load_jd
+        hits = index.query(resume_text, top_n)
+        if not hits:
+            return []
+
+        # The resume is parsed once and shared by every match
+        parsed_resume = self.parse_resume(resume_text)
+        results = []
+        for key, similarity in hits:
+            parsed_jd = self.parse_job_description(load_jd(key))
+            match_result = self.match_resume_to_jd(parsed_resume, parsed_jd)
+            result = {
+                "jd": key,
+                "similarity": similarity,
+                "parsed_job_description": parsed_jd,
+                "matching_result": match_result
+            }
+            if match_result.get("degraded"):
+                result["degraded"] = True
+            results.append(result)
+        results.sort(key=lambda r: final_match_score(r["matching_result"]) or 0.0, reverse=True)
+        return results
 
 
 # Example usage and testing function
-def test_with_sample_data(position_index=None):
+def test_with_sample_data(position_index=None, output="matching_results.jsonl"):
     """Test the ResumeJDMatcher with sample data
     
     Args:
         position_index (int, optional): Index of the job description to use (0-3).
                                       If None, will test all job descriptions.
+        output (str): Result file the matching results are appended to (see result_sinks.py)
     """
+    from result_sinks import open_sink
+    
     matcher = ResumeJDMatcher()
     
     # Sample job descriptions for testing
@@ -771,6 +1513,7 @@ def test_with_sample_data(position_index=None):
         indices_to_test = range(len(job_descriptions))
     
     results = {}
+    sink = open_sink(output)
     
     # Process each job description
     for idx in indices_to_test:
@@ -791,17 +1534,17 @@ def test_with_sample_data(position_index=None):
             print(json.dumps(matching_json, indent=2))
             print(f"{'='*80}\n")
             
-            # Save the JSON to a file for easy access
-            filename = f"matching_result_{company_names[idx]}.json"
-            with open(filename, "w") as f:
-                json.dump(matching_json, f, indent=2)
-            print(f"The JSON result has been saved to '{filename}'")
+            # Append the JSON to the result file for easy access
+            sink.write({"position": company_names[idx], "matching_result": matching_json})
+            print(f"The JSON result has been appended to '{output}'")
         else:
             print("Error in matching:", result.get("matching_result", {}).get("error", "Unknown error"))
     
+    sink.close()
     return results
 
 
 if __name__ == "__main__":
+    configure_logging()
     # This will run a test for all job descriptions
     test_with_sample_data(None) 
\ No newline at end of file
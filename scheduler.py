@@ -0,0 +1,173 @@
+"""
+Priority-aware fair scheduling of model calls.
+
+The web UI and bulk rescoring jobs share one API key and one rate limit. If
+calls are sent as soon as they are made, a large batch run queues thousands of
+calls ahead of an interactive /match request. FairScheduler caps the number of
+model calls in flight and decides which waiting call goes next:
+
+- Priority classes are served strictly in order: interactive, then batch, then
+  background. Batch work only gets capacity that interactive traffic leaves
+  unused.
+- Within a class, tenants take turns (round robin), so one tenant's large
+  job cannot starve another tenant of the same class.
+
+Callers label their work with request_context(); the label is kept in a context
+variable, so it follows the request through the matcher in the current thread
+without being passed down explicitly. Calls made outside any context count as
+interactive calls of the "default" tenant.
+
+The scheduler works inside one process. Share one instance between the matchers
+of a process (ResumeJDMatcher(scheduler=...)), or set MATCHER_MAX_CONCURRENT_CALLS
+to give every matcher one.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Any, Deque, Iterator, Optional, Tuple
+
+# Priority classes, highest first
+PRIORITIES = ("interactive", "batch", "background")
+
+DEFAULT_TENANT = "default"
+
+_request_context: contextvars.ContextVar = contextvars.ContextVar(
+    "matcher_request_context", default=(PRIORITIES[0], DEFAULT_TENANT)
+)
+
+
+@contextmanager
+def request_context(priority: str = "interactive", tenant: str = DEFAULT_TENANT) -> Iterator[None]:
+    """
+    Label the model calls made inside the block with a priority class and a tenant.
+
+    Args:
+        priority (str): "interactive", "batch" or "background"
+        tenant (str): Who the work is for, e.g. a user, API client or batch job name
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}; expected one of {', '.join(PRIORITIES)}")
+    token = _request_context.set((priority, tenant))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def current_request_context() -> Tuple[str, str]:
+    """Return the (priority, tenant) of the calling code."""
+    return _request_context.get()
+
+
+class _Ticket:
+    __slots__ = ("granted", "enqueued")
+
+    def __init__(self):
+        self.granted = threading.Event()
+        self.enqueued = time.perf_counter()
+
+
+class FairScheduler:
+    def __init__(self, max_concurrent: int = 8):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrent (int): Model calls allowed in flight at once; set it to what the
+                                  API key's rate limit sustains
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._running = 0
+        # Per priority class: tenant -> waiting tickets, in round-robin order
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Ticket]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._stats = {p: {"calls": 0, "queued": 0, "wait_s": 0.0, "max_wait_s": 0.0} for p in PRIORITIES}
+
+    @classmethod
+    def from_env(cls) -> Optional["FairScheduler"]:
+        """
+        Build a scheduler from MATCHER_MAX_CONCURRENT_CALLS.
+
+        Returns:
+            Optional[FairScheduler]: A scheduler, or None if the variable is not set
+        """
+        max_concurrent = os.environ.get("MATCHER_MAX_CONCURRENT_CALLS")
+        return cls(int(max_concurrent)) if max_concurrent else None
+
+    def _waiting(self) -> bool:
+        return any(self._queues[p] for p in PRIORITIES)
+
+    def acquire(self) -> None:
+        """Wait until the calling code's request may send a model call."""
+        priority, tenant = current_request_context()
+        with self._lock:
+            self._stats[priority]["calls"] += 1
+            if self._running < self.max_concurrent and not self._waiting():
+                self._running += 1
+                return
+            ticket = _Ticket()
+            self._queues[priority].setdefault(tenant, deque()).append(ticket)
+            self._stats[priority]["queued"] += 1
+        ticket.granted.wait()
+        waited = time.perf_counter() - ticket.enqueued
+        with self._lock:
+            stats = self._stats[priority]
+            stats["wait_s"] += waited
+            stats["max_wait_s"] = max(stats["max_wait_s"], waited)
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free and no call is waiting; never waits."""
+        priority, _ = current_request_context()
+        with self._lock:
+            if self._running >= self.max_concurrent or self._waiting():
+                return False
+            self._running += 1
+            self._stats[priority]["calls"] += 1
+            return True
+
+    def release(self) -> None:
+        """Free a slot and hand it to the next waiting call."""
+        with self._lock:
+            for priority in PRIORITIES:
+                tenants = self._queues[priority]
+                if not tenants:
+                    continue
+                # Take the first tenant's oldest call and move the tenant to the back of the line
+                tenant, tickets = next(iter(tenants.items()))
+                ticket = tickets.popleft()
+                if tickets:
+                    tenants.move_to_end(tenant)
+                else:
+                    del tenants[tenant]
+                # The slot passes straight to the waiter, so self._running is unchanged
+                ticket.granted.set()
+                return
+            self._running -= 1
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold a model-call slot for the duration of the block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return calls, queued calls and waiting times per priority class, plus current load."""
+        with self._lock:
+            by_class = {}
+            for priority, stats in self._stats.items():
+                by_class[priority] = {
+                    "calls": stats["calls"],
+                    "queued": stats["queued"],
+                    "waiting": sum(len(tickets) for tickets in self._queues[priority].values()),
+                    "avg_wait_ms": round(1000 * stats["wait_s"] / stats["queued"], 2) if stats["queued"] else 0.0,
+                    "max_wait_ms": round(1000 * stats["max_wait_s"], 2),
+                }
+            return {"max_concurrent": self.max_concurrent, "running": self._running, "priorities": by_class}
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+"""
+Production server for the web app: pre-forked workers, warm-up and graceful drain.
+
+`python web_app.py` runs Flask's single-process debug server. serve.py binds
+the listening socket once and forks worker processes that share it. Each
+worker handles requests on a fixed pool of threads, enough to keep several
+slow model calls in flight per process:
+
+    python serve.py --port 5000 --workers 4 --threads 16
+
+Before a worker accepts its first connection, it warms up everything that
+would otherwise slow the first requests:
+- importing the app
+- building the OpenAI client
+- loading the tokenizer and the page template
+- opening a connection to the API, with one cheap models request
+
+Until then, connections wait in the socket backlog and go to workers that
+are ready. A worker only accepts a connection when one of its threads is
+free, so a busy worker leaves new connections to idle ones.
+
+--threads is how many requests of each route group (matching, parsing) a
+worker runs at once. It sets the defaults of the worker's admission control
+(admission.py): each group runs --threads requests, queues twice as many and
+sheds the rest with 503 or 429. The worker has a thread for every request its
+controllers can hold, plus --threads for requests that skip admission
+(cached responses, /stats), so a burst is queued or shed instead of waiting
+unseen in the socket backlog. MATCHER_MATCH_MAX_CONCURRENT and the other
+admission variables override these defaults, and the thread pool follows
+them; with an unlimited queue, excess requests wait in the backlog.
+
+On SIGTERM or SIGINT, workers stop accepting new connections, finish the
+requests in flight (including their model calls) and exit. The master
+waits up to --graceful-timeout seconds before killing stragglers. A worker
+that dies unexpectedly is replaced. A worker that dies before it is ready
+(bad configuration, an unwritable pair store) is retried with a doubling
+delay, and after MAX_EARLY_FAILURES such failures in a row the master stops
+the other workers and exits with an error instead of retrying forever.
+
+Workers are forked before the app is imported, so each has its own matcher,
+HTTP connections, response cache and pair store connection. POSIX only.
+"""
+import argparse
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, Set
+
+logger = logging.getLogger("serve")
+
+# Seconds an idle keep-alive connection may hold a request thread
+KEEPALIVE_TIMEOUT = 5
+
+# Seconds before a dead worker is replaced; doubled for each consecutive failure before a
+# worker was ready, up to RESPAWN_MAX_DELAY
+RESPAWN_DELAY = 1.0
+RESPAWN_MAX_DELAY = 30.0
+
+# Consecutive failures before a worker was ready after which the master gives up
+MAX_EARLY_FAILURES = 5
+
+
+def warm_up(web_app, connect: bool = True) -> Dict[str, float]:
+    """
+    Prepare a worker's app for traffic.
+
+    Args:
+        web_app (module): The imported web_app module
+        connect (bool): Also open a connection to the API with a models request
+
+    Returns:
+        Dict[str, float]: Seconds spent on each warm-up step
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    client = web_app.matcher.client
+    timings["client"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    web_app.matcher.token_counter.count("warm up")
+    template = os.path.join(web_app.app.root_path, web_app.app.template_folder, "index.html")
+    if not os.path.exists(template):
+        web_app.create_templates()
+    web_app.app.jinja_env.get_template("index.html")
+    timings["tokenizer_and_template"] = time.perf_counter() - start
+
+    # Record/replay and other custom clients have no models endpoint
+    models = getattr(client, "models", None)
+    if connect and models is not None:
+        start = time.perf_counter()
+        try:
+            models.list()
+        except Exception as e:
+            logger.warning(f"Could not open a connection to the API during warm-up: {e}")
+        timings["connection"] = time.perf_counter() - start
+    return timings
+
+
+def size_admission(web_app, threads: int) -> int:
+    """
+    Fit the app's admission control to a worker with --threads request threads.
+
+    Args:
+        web_app (module): The imported web_app module
+        threads (int): Requests each route group runs at once
+
+    Returns:
+        int: Connections the worker must handle at once to queue or shed every request itself
+    """
+    from admission import AdmissionController
+
+    # Cached responses, /stats and the page do not go through admission control
+    connections = threads
+    for group in list(web_app.admission):
+        controller = AdmissionController.from_env(group, defaults=(threads, 2 * threads))
+        web_app.admission[group] = controller
+        connections += controller.capacity or controller.max_concurrent or threads
+    return connections
+
+
+def _server_class():
+    """Build the pooled server class; werkzeug is imported in the workers only."""
+    from concurrent.futures import ThreadPoolExecutor
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    class RequestHandler(WSGIRequestHandler):
+        timeout = KEEPALIVE_TIMEOUT
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """Werkzeug WSGI server that handles connections on a fixed pool of threads."""
+
+        multithread = True
+
+        def __init__(self, host: str, port: int, app, connections: int, fd: int):
+            super().__init__(host, port, app, handler=RequestHandler, fd=fd)
+            self._free = threading.Semaphore(connections)
+            self._pool = ThreadPoolExecutor(max_workers=connections, thread_name_prefix="request")
+
+        def process_request(self, request, client_address) -> None:
+            # Accept no further connections until a thread is free
+            self._free.acquire()
+            self._pool.submit(self._process, request, client_address)
+
+        def _process(self, request, client_address) -> None:
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                self._free.release()
+
+        def drain(self) -> None:
+            """Wait for the requests in flight to finish."""
+            self._pool.shutdown(wait=True)
+
+    return PooledWSGIServer
+
+
+def run_worker(listener: socket.socket, number: int, threads: int, connect: bool,
+               on_ready: Optional[Callable[[], None]] = None) -> int:
+    """
+    Warm up the app and serve requests from the shared listener until told to drain.
+
+    Args:
+        on_ready (Callable[[], None], optional): Called once the worker is about to accept connections
+
+    Returns:
+        int: Exit code
+    """
+    start = time.perf_counter()
+    import web_app
+    from tracing import set_exporter
+    connections = size_admission(web_app, threads)
+    timings = warm_up(web_app, connect)
+
+    host, port = listener.getsockname()[:2]
+    server = _server_class()(host, port, web_app.app, connections, fd=listener.fileno())
+    listener.close()
+
+    def drain(signum, frame):
+        # shutdown() waits for serve_forever, which runs in this (the main) thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, drain)
+    signal.signal(signal.SIGINT, drain)
+    steps = ", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in timings.items())
+    logger.info(f"Worker {number} (pid {os.getpid()}) ready in {time.perf_counter() - start:.2f}s ({steps}), "
+                f"{connections} request threads")
+    if on_ready is not None:
+        on_ready()
+
+    # Returns after drain(), with the worker's listening socket closed
+    server.serve_forever()
+    logger.info(f"Worker {number} (pid {os.getpid()}) draining")
+    server.drain()
+    if web_app.matcher.hedger is not None:
+        web_app.matcher.hedger.close()
+    web_app.pair_store.close()
+    set_exporter(None)
+    logger.info(f"Worker {number} (pid {os.getpid()}) stopped")
+    return 0
+
+
+def _signal(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 5000, workers: int = 2, threads: int = 8,
+          graceful_timeout: float = 30.0, connect: bool = True) -> int:
+    """
+    Bind the listening socket, fork the workers and supervise them until SIGTERM or SIGINT.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind
+        workers (int): Worker processes
+        threads (int): Requests of each route group a worker runs at once (see size_admission)
+        graceful_timeout (float): Seconds workers get to finish in-flight requests on shutdown
+        connect (bool): Open a connection to the API while warming up
+
+    Returns:
+        int: Exit code: 0 after a shutdown signal, 1 if workers kept failing before they were ready
+    """
+    listener = socket.create_server((host, port), backlog=2048)
+    listener.set_inheritable(True)
+    logger.info(f"Listening on http://{host}:{listener.getsockname()[1]} with {workers} worker(s) x {threads} thread(s)")
+
+    children: Dict[int, int] = {}
+    # Starting workers report ready on a pipe: pid -> its read end
+    starting: Dict[int, int] = {}
+    ready: Set[int] = set()
+    # Worker number -> time at which to start its replacement
+    respawns: Dict[int, float] = {}
+    state = {"stopping": False, "early_failures": 0, "exit_code": 0}
+
+    def spawn(number: int) -> None:
+        ready_fd, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                os.close(ready_fd)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                code = run_worker(listener, number, threads, connect,
+                                  on_ready=lambda: os.write(ready_write, b"1"))
+            except Exception:
+                logger.exception(f"Worker {number} failed")
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        os.close(ready_write)
+        children[pid] = number
+        starting[pid] = ready_fd
+
+    def check_ready(pid: int) -> None:
+        """Read a starting worker's pipe, once it is readable or the worker has exited."""
+        ready_fd = starting.pop(pid)
+        try:
+            # b"" (end of file) if the worker exited before it was ready
+            if os.read(ready_fd, 1):
+                ready.add(pid)
+                state["early_failures"] = 0
+        finally:
+            os.close(ready_fd)
+
+    def stop(signum, frame):
+        state["stopping"] = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for number in range(workers):
+        spawn(number)
+
+    deadline = None
+    while children or (respawns and not state["stopping"]):
+        if state["stopping"] and deadline is None:
+            logger.info(f"Shutting down; waiting up to {graceful_timeout:g}s for in-flight requests")
+            deadline = time.monotonic() + graceful_timeout
+            for pid in children:
+                _signal(pid, signal.SIGTERM)
+        if deadline is not None and time.monotonic() > deadline:
+            for pid in children:
+                logger.warning(f"Killing worker {children[pid]} (pid {pid}) after the graceful timeout")
+                _signal(pid, signal.SIGKILL)
+            deadline = float("inf")
+        if not state["stopping"]:
+            for number, due in list(respawns.items()):
+                if time.monotonic() >= due:
+                    del respawns[number]
+                    spawn(number)
+
+        pid, status = os.waitpid(-1, os.WNOHANG) if children else (0, 0)
+        if pid == 0:
+            # Doubles as the loop's pause
+            readable, _, _ = select.select(list(starting.values()), [], [], 0.1)
+            for pid, ready_fd in list(starting.items()):
+                if ready_fd in readable:
+                    check_ready(pid)
+            continue
+        number = children.pop(pid)
+        if pid in starting:
+            check_ready(pid)
+        was_ready = pid in ready
+        ready.discard(pid)
+        if state["stopping"]:
+            continue
+        if was_ready:
+            delay = RESPAWN_DELAY
+            logger.warning(f"Worker {number} (pid {pid}) exited with status {status}; starting a new one")
+        else:
+            state["early_failures"] += 1
+            if state["early_failures"] >= MAX_EARLY_FAILURES:
+                logger.error(f"Workers failed {state['early_failures']} times in a row before they were ready; "
+                             f"giving up")
+                state["stopping"] = True
+                state["exit_code"] = 1
+                continue
+            delay = min(RESPAWN_DELAY * 2 ** (state["early_failures"] - 1), RESPAWN_MAX_DELAY)
+            logger.warning(f"Worker {number} (pid {pid}) exited with status {status} before it was ready; "
+                           f"retrying in {delay:g}s")
+        respawns[number] = time.monotonic() + delay
+    listener.close()
+    return state["exit_code"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the Resume-JD Matcher web app with pre-forked workers')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=5000, help='Port to bind (default: 5000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: one per CPU)')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='Requests of each route group (match, parse) a worker runs at once; '
+                             'twice as many are queued and the rest shed (default: 8)')
+    parser.add_argument('--graceful-timeout', type=float, default=30.0,
+                        help='Seconds to let in-flight requests finish on shutdown (default: 30)')
+    parser.add_argument('--no-warm-connection', action='store_true',
+                        help='Do not open a connection to the API while warming up workers')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(serve(args.host, args.port, max(1, args.workers), max(1, args.threads), args.graceful_timeout,
+                   connect=not args.no_warm_connection))
+
+
+if __name__ == "__main__":
+    main()
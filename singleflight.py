@@ -0,0 +1,77 @@
+"""
+Single-flight coalescing of identical in-flight model calls.
+
+When a job description goes live, many /match requests for the same posting
+arrive within seconds and each would parse the identical text. With
+single-flight, the first caller for a key makes the call and concurrent callers
+with the same key wait for it and share its result (or its exception). Nothing
+is cached: once the call returns, the next caller starts a new one.
+
+ResumeJDMatcher keys every chat completion by model, parameters and
+whitespace-normalized messages, so coalescing applies to the parse calls and
+to the match call alike.
+"""
+import threading
+from typing import Dict, Any, Callable, Hashable, Tuple
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], label: str = "default") -> Tuple[Any, bool]:
+        """
+        Run fn, or wait for the identical call already in flight.
+
+        Args:
+            key (Hashable): Identity of the call; equal keys must mean interchangeable results
+            fn (Callable[[], Any]): The call
+            label (str): Counter group, e.g. the pipeline stage
+
+        Returns:
+            Tuple[Any, bool]: The result, and whether it was shared from another caller's call
+
+        Raises:
+            Exception: Whatever the call raised, in the caller that made it and in every waiter
+        """
+        with self._lock:
+            stats = self._stats.setdefault(label, {"calls": 0, "coalesced": 0})
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                stats["calls"] += 1
+            else:
+                stats["coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return calls made and calls coalesced per label."""
+        with self._lock:
+            return {label: dict(stats) for label, stats in self._stats.items()}
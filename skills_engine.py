@@ -0,0 +1,418 @@
+"""
+Local skills-matching engine for the Resume-JD Matcher.
+
+Skill overlap is the most mechanical part of a match, so it does not need a
+model call. This module loads a skill taxonomy with synonyms, scans resume and
+job description text with an Aho-Corasick multi-pattern matcher, and scores
+how many of the required (and preferred) skills the candidate covers.
+
+The result has the same shape as the "skills" category returned by
+ResumeJDMatcher.match_resume_to_jd, so it can be used as a cheap prefilter or
+as a drop-in replacement for that category.
+"""
+import json
+from collections import deque
+from typing import Dict, Any, List, Iterable, Optional, Tuple, Union
+
+# Canonical skill name -> synonyms. Matching is case-insensitive and every
+# canonical name is implicitly its own synonym.
+DEFAULT_SKILL_TAXONOMY = {
+    # Programming languages
+    "Python": ["python3", "python 3"],
+    "Java": [],
+    "JavaScript": ["js", "ecmascript"],
+    "TypeScript": [],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["c sharp", "csharp"],
+    "Golang": ["go programming", "go language"],
+    "Rust": [],
+    "Scala": [],
+    "Kotlin": [],
+    "Swift": [],
+    "Ruby": [],
+    "PHP": [],
+    "R": ["r programming", "rstudio"],
+    "Matlab": [],
+    "SQL": ["t-sql", "pl/sql"],
+    # Web and backend
+    "React": ["react.js", "reactjs"],
+    "Angular": ["angularjs", "angular.js"],
+    "Node.js": ["nodejs", "node js"],
+    "Django": [],
+    "Flask": [],
+    "HTML/CSS": ["html", "css", "html5", "css3"],
+    "REST APIs": ["rest api", "restful", "rest apis"],
+    "GraphQL": [],
+    "Microservices": ["microservice", "microservices architecture"],
+    # Data stores
+    "MySQL": [],
+    "PostgreSQL": ["postgres"],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Relational Databases": ["relational database", "rdbms"],
+    # Cloud and infrastructure
+    "AWS": ["amazon web services"],
+    "Azure": ["microsoft azure"],
+    "GCP": ["google cloud", "google cloud platform"],
+    "Docker": ["containerization", "containers"],
+    "Kubernetes": ["k8s"],
+    "Jenkins": [],
+    "Git": ["github", "gitlab"],
+    "CI/CD": ["continuous integration", "continuous delivery", "continuous deployment"],
+    "Linux": ["unix"],
+    # Data and machine learning
+    "Machine Learning": ["ml", "machine-learning"],
+    "Deep Learning": ["deep-learning", "neural networks", "neural network"],
+    "NLP": ["natural language processing"],
+    "Computer Vision": ["image recognition", "image classification"],
+    "Conversational AI": ["chatbots", "chatbot", "voice assistant", "voice assistants"],
+    "Generative AI": ["gen-ai", "genai", "llm", "llms", "large language models"],
+    "TensorFlow": ["tf", "keras"],
+    "PyTorch": ["torch"],
+    "Scikit-learn": ["sklearn", "scikit learn"],
+    "Pandas": [],
+    "NumPy": [],
+    "Spark": ["apache spark", "pyspark"],
+    "Hadoop": [],
+    "Kafka": ["apache kafka"],
+    "Tableau": [],
+    "Data Analysis": ["data analytics", "data manipulation"],
+    "Statistics": ["statistical methods", "hypothesis testing", "regression analysis",
+                   "linear regression", "logistic regression"],
+    "A/B Testing": ["ab testing", "a/b tests", "experimentation"],
+    "MLOps": ["deploying ml models", "ml models to production", "model deployment"],
+    # Games and graphics
+    "Unreal Engine": ["unreal", "ue4", "ue5"],
+    "Unity": ["unity3d"],
+    "3D Math": ["3d math", "linear algebra"],
+    "Physics Simulation": ["physics simulation"],
+    # Methodologies and tools
+    "Agile": ["scrum", "kanban"],
+    "TDD": ["test-driven development", "test driven development"],
+    "JIRA": [],
+    "Axure": [],
+    # Product and leadership
+    "Product Management": ["product manager", "product owner"],
+    "Project Management": ["program management", "technical program management"],
+    "Leadership": ["team leadership", "cross-functional team leadership", "led a team", "lead a team",
+                   "executive leadership", "managing people"],
+    "Monetization": ["pricing strategies", "pricing models", "in-app purchases", "subscription models"],
+    "Communication": ["communication skills", "presentation skills"],
+    # Design and research
+    "UX Research": ["user research", "ux researcher", "qualitative research", "usability studies"],
+    "UX Design": ["user experience design", "ux designer", "interaction design"],
+    "Human-Computer Interaction": ["hci", "human computer interaction"],
+}
+
+# Headings/phrases that switch the job description into a "preferred" section.
+_PREFERRED_MARKERS = ("preferred", "nice to have", "nice-to-have", "bonus", "a plus", "is a plus", "desired")
+
+# Headings that switch the job description back into a "required" section.
+_REQUIRED_MARKERS = ("requirement", "required", "qualification", "must have", "must-have",
+                     "responsibilit", "what you", "about the", "the role")
+
+# Neighbouring characters that count as a word boundary for very short
+# patterns such as "R" or "Go", which otherwise match inside "R&D" or "go-to".
+_STRICT_BOUNDARY = set(" \t\r\n,;:/|()[]")
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton for scanning text for many patterns in one pass.
+
+    Patterns are matched case-insensitively and only count when they start
+    and end on a word boundary.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]] = ()):
+        """
+        Build the automaton.
+
+        Args:
+            patterns (Iterable[Tuple[str, Any]]): (pattern, value) pairs. The value
+                                                  is reported whenever the pattern matches.
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+        for pattern, value in patterns:
+            self._add(pattern.lower(), value)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, value: Any) -> None:
+        """Insert a pattern into the trie."""
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(pattern), value))
+
+    def _build_failure_links(self) -> None:
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fallback = self._goto[fail].get(char, 0)
+                self._fail[child] = fallback if fallback != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter_matches(self, text: str):
+        """
+        Yield every pattern occurrence in the text.
+
+        Args:
+            text (str): Text to scan
+
+        Yields:
+            Tuple[int, int, Any]: (start, end, value) for each match on a word boundary
+        """
+        lowered = text.lower()
+        node = 0
+        for index, char in enumerate(lowered):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, value in self._output[node]:
+                start = index - length + 1
+                end = index + 1
+                if _is_word_boundary(lowered, start, end):
+                    yield start, end, value
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    """Check that text[start:end] is not glued to neighbouring word characters."""
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    if end - start <= 2:
+        # Short tokens need real separators around them; a trailing period is
+        # allowed only when it ends a sentence.
+        if after == "." and (end + 1 >= len(text) or text[end + 1].isspace()):
+            after = " "
+        return before in _STRICT_BOUNDARY and after in _STRICT_BOUNDARY
+    return not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_")
+
+
+def load_taxonomy(path: str) -> Dict[str, List[str]]:
+    """
+    Load a skill taxonomy from a JSON file.
+
+    The file maps canonical skill names either to a list of synonyms or to an
+    object with a "synonyms" list, e.g. {"PyTorch": ["torch"]}.
+
+    Args:
+        path (str): Path to the taxonomy JSON file
+
+    Returns:
+        Dict[str, List[str]]: Canonical skill name -> synonyms
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+
+    taxonomy = {}
+    for skill, entry in raw.items():
+        if isinstance(entry, dict):
+            taxonomy[skill] = list(entry.get("synonyms", []))
+        else:
+            taxonomy[skill] = list(entry or [])
+    return taxonomy
+
+
+def _flatten_text(data: Any, path: str = "") -> Iterable[Tuple[str, str]]:
+    """Yield (key_path, text) pairs for every string in a nested parse result."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten_text(value, f"{path}.{key}".lower())
+    elif isinstance(data, (list, tuple)):
+        for item in data:
+            yield from _flatten_text(item, path)
+    elif data is not None:
+        yield path, str(data)
+
+
+def _score_to_level(score: int) -> int:
+    """Map a 0-100 skills score onto the 1-7 match level scale used by the matcher."""
+    thresholds = [(90, 7), (78, 6), (65, 5), (50, 4), (35, 3), (20, 2)]
+    for minimum, level in thresholds:
+        if score >= minimum:
+            return level
+    return 1
+
+
+class SkillsEngine:
+    def __init__(self, taxonomy: Optional[Dict[str, List[str]]] = None,
+                 required_weight: float = 0.8):
+        """
+        Initialize the skills engine.
+
+        Args:
+            taxonomy (Dict[str, List[str]], optional): Canonical skill name -> synonyms.
+                                                      Defaults to DEFAULT_SKILL_TAXONOMY.
+            required_weight (float): Share of the score given to required skills when
+                                     the job description also lists preferred skills
+        """
+        self.taxonomy = taxonomy if taxonomy is not None else DEFAULT_SKILL_TAXONOMY
+        self.required_weight = required_weight
+
+        patterns = []
+        for skill, synonyms in self.taxonomy.items():
+            for term in {skill.lower(), *(s.lower() for s in synonyms)}:
+                patterns.append((term, skill))
+        self._matcher = AhoCorasick(patterns)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "SkillsEngine":
+        """Create a skills engine from a taxonomy JSON file."""
+        return cls(taxonomy=load_taxonomy(path), **kwargs)
+
+    def extract_skills(self, source: Union[str, Dict[str, Any]]) -> List[str]:
+        """
+        Find every taxonomy skill mentioned in a text or parse result.
+
+        Args:
+            source (Union[str, Dict[str, Any]]): Raw text or a parsed resume/JD dict
+
+        Returns:
+            List[str]: Canonical skill names in order of first appearance
+        """
+        if not isinstance(source, str):
+            source = "\n".join(text for _, text in _flatten_text(source))
+
+        found = {}
+        for _, _, skill in self._matcher.iter_matches(source):
+            found.setdefault(skill, True)
+        return list(found)
+
+    def extract_requirements(self, jd: Union[str, Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+        """
+        Split the skills in a job description into required and preferred ones.
+
+        Raw text is read line by line: headings such as "Preferred Qualifications"
+        or lines ending in "is a plus" mark preferred skills, everything else is
+        treated as required. For parsed dicts, the key path decides.
+
+        Args:
+            jd (Union[str, Dict[str, Any]]): Raw job description text or a parsed JD dict
+
+        Returns:
+            Tuple[List[str], List[str]]: (required skills, preferred skills)
+        """
+        required, preferred = {}, {}
+
+        if isinstance(jd, str):
+            in_preferred = False
+            for line in jd.splitlines():
+                stripped = line.strip().lower()
+                if not stripped:
+                    continue
+                is_heading = stripped.endswith(":") or len(stripped.split()) <= 4
+                if is_heading and any(m in stripped for m in _PREFERRED_MARKERS):
+                    in_preferred = True
+                elif is_heading and any(m in stripped for m in _REQUIRED_MARKERS):
+                    in_preferred = False
+                line_preferred = in_preferred or stripped.rstrip(".").endswith(("a plus", "preferred", "nice to have"))
+                target = preferred if line_preferred else required
+                for skill in self.extract_skills(line):
+                    target.setdefault(skill, True)
+        else:
+            for path, text in _flatten_text(jd):
+                target = preferred if any(m in path for m in ("prefer", "nice", "bonus", "plus")) else required
+                for skill in self.extract_skills(text):
+                    target.setdefault(skill, True)
+
+        # A skill that is required anywhere is required.
+        preferred = [skill for skill in preferred if skill not in required]
+        return list(required), preferred
+
+    def match(self, resume: Union[str, Dict[str, Any]], jd: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Compare the skills in a resume against the skills a job description asks for.
+
+        Args:
+            resume (Union[str, Dict[str, Any]]): Raw resume text or parsed resume dict
+            jd (Union[str, Dict[str, Any]]): Raw job description text or parsed JD dict
+
+        Returns:
+            Dict[str, Any]: A "skills" category result with match_level, match_score and
+                            reasoning, plus matched/missing skill lists and a numeric score
+        """
+        resume_skills = set(self.extract_skills(resume))
+        required, preferred = self.extract_requirements(jd)
+
+        matched_required = [s for s in required if s in resume_skills]
+        missing_required = [s for s in required if s not in resume_skills]
+        matched_preferred = [s for s in preferred if s in resume_skills]
+        missing_preferred = [s for s in preferred if s not in resume_skills]
+
+        if not required and not preferred:
+            score = 0
+        else:
+            required_ratio = len(matched_required) / len(required) if required else 1.0
+            if preferred:
+                preferred_ratio = len(matched_preferred) / len(preferred)
+                weight = self.required_weight if required else 0.0
+                ratio = weight * required_ratio + (1 - weight) * preferred_ratio
+            else:
+                ratio = required_ratio
+            score = int(round(ratio * 100))
+
+        reasoning = self._build_reasoning(matched_required, missing_required,
+                                          matched_preferred, missing_preferred)
+
+        return {
+            "match_level": _score_to_level(score),
+            "match_score": f"{score}%",
+            "reasoning": reasoning,
+            "score": score,
+            "matched_skills": matched_required,
+            "missing_skills": missing_required,
+            "matched_preferred_skills": matched_preferred,
+            "missing_preferred_skills": missing_preferred,
+            "source": "local_skills_engine"
+        }
+
+    def _build_reasoning(self, matched_required: List[str], missing_required: List[str],
+                         matched_preferred: List[str], missing_preferred: List[str]) -> str:
+        """Summarize the skill overlap in one or two sentences."""
+        total_required = len(matched_required) + len(missing_required)
+        if not total_required and not (matched_preferred or missing_preferred):
+            return "No skills from the taxonomy were found in the job description."
+
+        parts = [f"Matched {len(matched_required)} of {total_required} required skills"
+                 + (f" ({', '.join(matched_required)})." if matched_required else ".")]
+        if missing_required:
+            parts.append(f"Missing required skills: {', '.join(missing_required)}.")
+        if matched_preferred or missing_preferred:
+            total_preferred = len(matched_preferred) + len(missing_preferred)
+            parts.append(f"Matched {len(matched_preferred)} of {total_preferred} preferred skills.")
+        return " ".join(parts)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local skills match between a resume and a job description')
+    parser.add_argument('--resume', type=str, required=True, help='Path to resume text file')
+    parser.add_argument('--jd', type=str, required=True, help='Path to job description text file')
+    parser.add_argument('--taxonomy', type=str, help='Path to a skill taxonomy JSON file (optional)')
+    args = parser.parse_args()
+
+    engine = SkillsEngine.from_file(args.taxonomy) if args.taxonomy else SkillsEngine()
+    with open(args.resume, 'r', encoding='utf-8') as f:
+        resume_text = f.read()
+    with open(args.jd, 'r', encoding='utf-8') as f:
+        jd_text = f.read()
+
+    print(json.dumps(engine.match(resume_text, jd_text), indent=2))
@@ -0,0 +1,200 @@
+"""
+Streaming matching of large ATS exports.
+
+ATS exports arrive as one large JSONL or CSV file with a resume (and usually a
+job description) per row. Reading such an export into memory, or unpacking it
+into a directory of text files for `cli.py batch`, does not scale to
+multi-gigabyte files. StreamRunner reads the export row by row with
+iter_records(), hands rows to a pool of matching threads and appends each
+result to a result sink (see result_sinks.py) as soon as it completes.
+
+At most max_in_flight rows are read but not yet written at any time. When the
+model is slower than the reader, reading simply pauses, so memory stays
+constant however large the export is.
+
+Rows either carry their own job description (jd_field) or are all matched
+against one job description given to run(), which is then parsed only once.
+
+Used by `python cli.py stream ...`.
+"""
+import csv
+import gzip
+import io
+import json
+import logging
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from result_sinks import ResultSink
+from scheduler import request_context
+
+logger = logging.getLogger(__name__)
+
+INPUT_FORMATS = ("jsonl", "csv")
+
+
+def _open_text(path: str):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def input_format(path: str) -> str:
+    """Return the input format of a path: "csv" for .csv(.gz) files, "jsonl" otherwise (including "-" for stdin)."""
+    name = path.lower()
+    return "csv" if name.endswith(".csv") or name.endswith(".csv.gz") else "jsonl"
+
+
+def iter_records(path: str, format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Read an export one row at a time.
+
+    Args:
+        path (str): JSONL or CSV file, optionally gzip-compressed (.gz), or "-" for JSONL on stdin
+        format (str, optional): "jsonl" or "csv" (default: from the extension)
+
+    Yields:
+        Dict[str, Any]: One record per JSON line or CSV row (keyed by the CSV header)
+
+    Raises:
+        ValueError: For a line that is not a JSON object
+    """
+    format = format or input_format(path)
+    if format not in INPUT_FORMATS:
+        raise ValueError(f"Unknown input format {format!r}; expected one of {', '.join(INPUT_FORMATS)}")
+    with _open_text(path) as f:
+        if format == "csv":
+            # Resume text easily exceeds the csv module's default 128 KB field limit
+            csv.field_size_limit(sys.maxsize)
+            yield from csv.DictReader(f)
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{line_number}: expected a JSON object per line")
+            yield record
+
+
+class StreamRunner:
+    def __init__(self, matcher, workers: int = 4, max_in_flight: Optional[int] = None,
+                 resume_field: str = "resume", jd_field: str = "jd", id_field: str = "id",
+                 priority: str = "batch", tenant: str = "stream"):
+        """
+        Initialize the stream runner.
+
+        Args:
+            matcher (ResumeJDMatcher): Matcher used for parsing and matching
+            workers (int): Number of rows processed concurrently
+            max_in_flight (int, optional): Rows read but not yet written (default: 2 * workers)
+            resume_field (str): Field holding the resume text
+            jd_field (str): Field holding the job description text
+            id_field (str): Field identifying the row in the output (default: the row number)
+            priority (str): Scheduling class of the model calls (see scheduler.py)
+            tenant (str): Tenant the model calls are queued under
+        """
+        self.matcher = matcher
+        self.workers = max(1, workers)
+        self.max_in_flight = max(self.workers, max_in_flight or 2 * self.workers)
+        self.resume_field = resume_field
+        self.jd_field = jd_field
+        self.id_field = id_field
+        self.priority = priority
+        self.tenant = tenant
+
+    def _match(self, record: Dict[str, Any], parsed_jd: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        resume_text = record.get(self.resume_field)
+        if not resume_text:
+            raise ValueError(f"Missing resume field '{self.resume_field}'")
+        if parsed_jd is None:
+            jd_text = record.get(self.jd_field)
+            if not jd_text:
+                raise ValueError(f"Missing job description field '{self.jd_field}'")
+            return self.matcher.process_resume_and_jd(resume_text, jd_text)
+
+        parsed_resume = self.matcher.parse_resume(resume_text)
+        match_result = self.matcher.match_resume_to_jd(parsed_resume, parsed_jd)
+        result = {
+            "parsed_resume": parsed_resume,
+            "parsed_job_description": parsed_jd,
+            "matching_result": match_result
+        }
+        if match_result.get("degraded"):
+            result["degraded"] = True
+        return result
+
+    def run(self, records: Iterable[Dict[str, Any]], sink: ResultSink, jd_text: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Match a stream of records, appending one result record per row to the sink as rows complete.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Rows, e.g. from iter_records(); consumed lazily
+            sink (ResultSink): Where results are written, in completion order
+            jd_text (str, optional): Job description every row is matched against, instead of each
+                                     row's jd_field
+
+        Returns:
+            Dict[str, Any]: Run summary with counts of processed, degraded and failed rows
+        """
+        start = time.time()
+        summary = {"read": 0, "processed": 0, "degraded": 0, "failed": 0}
+        parsed_jd = None
+        if jd_text is not None:
+            with request_context(self.priority, self.tenant):
+                parsed_jd = self.matcher.parse_job_description(jd_text)
+            if "error" in parsed_jd:
+                raise RuntimeError(f"Could not parse the job description: {parsed_jd['error']}")
+
+        def process(number: int, record: Dict[str, Any]) -> Dict[str, Any]:
+            row_start = time.time()
+            row_id = record.get(self.id_field, number)
+            with request_context(self.priority, self.tenant):
+                try:
+                    result = self._match(record, parsed_jd)
+                    failed = any("error" in result[key]
+                                 for key in ("parsed_resume", "parsed_job_description", "matching_result"))
+                    status = "degraded" if result.get("degraded") else "error" if failed else "ok"
+                    output = {"id": row_id, "status": status, "result": result}
+                except Exception as e:
+                    logger.error(f"Error processing row {row_id}: {e}")
+                    output = {"id": row_id, "status": "error", "error": str(e)}
+            output["elapsed_s"] = round(time.time() - row_start, 3)
+            return output
+
+        completed = queue.Queue()
+        state = {"in_flight": 0, "done": 0}
+
+        def collect() -> None:
+            output = completed.get().result()
+            state["in_flight"] -= 1
+            sink.write(output)
+            status = output["status"]
+            summary["processed" if status == "ok" else "degraded" if status == "degraded" else "failed"] += 1
+            state["done"] += 1
+            if state["done"] % 100 == 0:
+                print(f"[{state['done']}] {state['done'] / (time.time() - start):.2f} rows/s")
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            # The next row is read only when a slot is free, so a slow model pauses reading
+            for number, record in enumerate(records):
+                while state["in_flight"] >= self.max_in_flight:
+                    collect()
+                summary["read"] += 1
+                future = executor.submit(process, number, record)
+                future.add_done_callback(completed.put)
+                state["in_flight"] += 1
+            while state["in_flight"]:
+                collect()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            sink.flush()
+
+        summary["elapsed_s"] = round(time.time() - start, 3)
+        return summary
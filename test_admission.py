@@ -0,0 +1,158 @@
+"""
+Tests for admission control and load shedding (admission.py).
+
+The tests hold the slots themselves, so they decide exactly when the
+controller is full, and need no server or model calls.
+"""
+import os
+import threading
+import time
+
+from admission import AdmissionController, AdmissionRejected
+
+
+
+def _rejection(controller: AdmissionController, tenant: str = "default") -> AdmissionRejected:
+    try:
+        with controller.admit(tenant):
+            pass
+    except AdmissionRejected as e:
+        return e
+    raise AssertionError("the request was admitted")
+
+
+def _admit_once(controller: AdmissionController) -> bool:
+    with controller.admit():
+        return True
+
+
+def test_admits_up_to_max_concurrent():
+    controller = AdmissionController("match", max_concurrent=2, max_queue=0, queue_timeout=0.05)
+    with controller.admit(), controller.admit():
+        assert controller.stats()["running"] == 2
+    stats = controller.stats()
+    assert stats["running"] == 0 and stats["admitted"] == 2
+
+
+def test_full_queue_is_shed_with_503_and_retry_after():
+    controller = AdmissionController("match", max_concurrent=1, max_queue=0)
+    with controller.admit():
+        error = _rejection(controller)
+    assert error.status == 503
+    assert error.retry_after >= 1
+    assert controller.stats()["shed"]["queue_full"] == 1
+
+
+def test_queued_request_is_shed_after_queue_timeout():
+    controller = AdmissionController("match", max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    with controller.admit():
+        start = time.monotonic()
+        error = _rejection(controller)
+        assert time.monotonic() - start >= 0.05
+    assert error.status == 503
+    stats = controller.stats()
+    assert stats["shed"]["timeout"] == 1 and stats["queue_depth"] == 0 and stats["peak_queued"] == 1
+
+
+def test_queued_request_runs_when_a_slot_frees(wait_until):
+    controller = AdmissionController("match", max_concurrent=1, max_queue=1, queue_timeout=2)
+    ran = []
+
+    def queued():
+        with controller.admit():
+            ran.append(True)
+
+    with controller.admit():
+        thread = threading.Thread(target=queued)
+        thread.start()
+        wait_until(lambda: controller.stats()["queue_depth"] == 1)
+    thread.join(5)
+    assert ran == [True]
+    assert controller.stats()["admitted"] == 2
+
+
+def test_tenant_over_its_limit_gets_429():
+    """One tenant cannot take every slot; other tenants are still admitted."""
+    controller = AdmissionController("match", max_concurrent=4, max_queue=4, max_per_tenant=2)
+    with controller.admit("noisy"), controller.admit("noisy"):
+        error = _rejection(controller, "noisy")
+        assert error.status == 429 and error.retry_after >= 1
+        with controller.admit("quiet"):
+            pass
+    assert controller.stats()["shed"]["tenant"] == 1
+    # Finished requests no longer count against the tenant
+    with controller.admit("noisy"):
+        pass
+
+
+def test_slot_is_freed_when_the_request_raises():
+    controller = AdmissionController("match", max_concurrent=1, max_queue=0)
+    try:
+        with controller.admit():
+            raise RuntimeError("model call failed")
+    except RuntimeError:
+        pass
+    with controller.admit():
+        pass
+    assert controller.stats()["running"] == 0
+
+
+def test_retry_after_follows_service_time():
+    """Retry-After estimates when a slot frees from how long recent requests took."""
+    controller = AdmissionController("match", max_concurrent=1, max_queue=0)
+    with controller.admit():
+        time.sleep(1.1)
+    with controller.admit():
+        assert _rejection(controller).retry_after == 2
+
+
+def test_from_env_zero_means_unlimited(wait_until):
+    names = ("MATCHER_MATCH_MAX_CONCURRENT", "MATCHER_MATCH_MAX_QUEUE", "MATCHER_QUEUE_TIMEOUT")
+    saved = {name: os.environ.get(name) for name in names}
+    try:
+        os.environ.update({"MATCHER_MATCH_MAX_CONCURRENT": "1", "MATCHER_MATCH_MAX_QUEUE": "0",
+                           "MATCHER_QUEUE_TIMEOUT": "2"})
+        controller = AdmissionController.from_env("match")
+        assert controller.max_concurrent == 1 and controller.max_queue is None
+
+        # With an unbounded queue, requests wait for the slot instead of being shed
+        done = []
+        with controller.admit():
+            waiter = threading.Thread(target=lambda: done.append(_admit_once(controller)))
+            waiter.start()
+            wait_until(lambda: controller.stats()["queue_depth"] == 1)
+        waiter.join(5)
+        assert done == [True] and controller.stats()["shed"]["queue_full"] == 0
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def test_web_routes_shed_with_status_and_retry_after():
+    """A shed request gets its status, a Retry-After header and a JSON error, without running the pipeline."""
+    os.environ.setdefault("MATCHER_PAIR_STORE", ":memory:")
+    import web_app
+
+    saved = web_app.admission["parse"]
+    web_app.admission["parse"] = AdmissionController("parse", max_concurrent=1, max_queue=0, max_per_tenant=1)
+    try:
+        client = web_app.app.test_client()
+        with web_app.admission["parse"].admit("other"):
+            response = client.post("/parse_resume", data={"resume": "Busy resume"})
+            assert response.status_code == 503
+            assert int(response.headers["Retry-After"]) >= 1
+            assert "error" in response.get_json()
+        web_app.admission["parse"].max_concurrent = 2
+        with web_app.admission["parse"].admit("acme"):
+            response = client.post("/parse_resume", data={"resume": "Busy resume"}, headers={"X-Tenant-ID": "acme"})
+            assert response.status_code == 429
+            assert int(response.headers["Retry-After"]) >= 1
+
+        stats = client.get("/stats").get_json()
+        assert stats["admission"]["parse"]["shed"] == {"queue_full": 1, "timeout": 0, "tenant": 1}
+    finally:
+        web_app.admission["parse"] = saved
+
@@ -5,7 +5,7 @@ Test script to verify GPT-4o mini is working correctly with the resume-job descr
 import json
 import os
 from dotenv import load_dotenv
-from resume_jd_matcher import ResumeJDMatcher
+from resume_jd_matcher import ResumeJDMatcher, configure_logging
 
 # Load environment variables
 load_dotenv()
@@ -70,4 +70,5 @@ def test_gpt4o_mini():
     print(f"\nResults saved to gpt4o_mini_results.json")
 
 if __name__ == "__main__":
+    configure_logging()
     test_gpt4o_mini() 
\ No newline at end of file
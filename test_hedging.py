@@ -0,0 +1,144 @@
+"""
+Tests for hedged model calls (hedging.py).
+
+The calls under test are plain functions that block on events, so no server
+is needed and only the short hedge delay is timed.
+"""
+import threading
+import time
+
+from hedging import Hedger
+from scheduler import FairScheduler
+
+STAGE = "match_resume_to_jd"
+DELAY = 0.05
+
+
+def _hedger(**kwargs) -> Hedger:
+    """A hedger that hedges every call still running after DELAY seconds."""
+    options = {"percentile": 50, "max_hedge_rate": 1.0, "min_samples": 1, "min_delay": DELAY}
+    options.update(kwargs)
+    hedger = Hedger(**options)
+    hedger.latencies.record(STAGE, DELAY)
+    return hedger
+
+
+
+class _Attempts:
+    """A call whose first attempt blocks until released and whose later attempts return at once."""
+
+    def __init__(self):
+        self.release_first = threading.Event()
+        self.count = 0
+        self.finished = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.count += 1
+            attempt = self.count
+        if attempt == 1:
+            self.release_first.wait(5)
+        self.finished.append(attempt)
+        return f"attempt {attempt}"
+
+
+def test_no_history_runs_on_caller_thread():
+    """Without latency history a call is never hedged and runs on the calling thread."""
+    hedger = Hedger(min_samples=5)
+    threads = []
+    assert hedger.call(STAGE, lambda: threads.append(threading.current_thread()) or "ok") == "ok"
+    assert threads == [threading.current_thread()]
+    assert hedger.stats()["hedges_fired"] == 0
+
+
+def test_fast_call_is_not_hedged():
+    hedger = _hedger()
+    assert hedger.call(STAGE, lambda: "fast") == "fast"
+    stats = hedger.stats()
+    assert stats["calls"] == 1 and stats["hedges_fired"] == 0
+
+
+def test_hedge_fires_after_delay_and_loser_is_ignored(wait_until):
+    """A slow primary is hedged after the delay; the hedge's result wins and the primary's is dropped."""
+    hedger = _hedger()
+    attempts = _Attempts()
+    start = time.perf_counter()
+    result = hedger.call(STAGE, attempts)
+    elapsed = time.perf_counter() - start
+
+    assert result == "attempt 2"
+    assert elapsed >= DELAY
+    stats = hedger.stats()
+    assert stats["hedges_fired"] == 1 and stats["hedges_won"] == 1
+
+    # The abandoned primary finishes in the background without affecting the returned result
+    attempts.release_first.set()
+    wait_until(lambda: 1 in attempts.finished)
+    assert result == "attempt 2"
+    hedger.close()
+
+
+def test_primary_error_falls_back_to_hedge():
+    """A primary that fails after the hedge was sent does not fail the call."""
+    hedger = _hedger()
+    calls = {"n": 0}
+
+    def call():
+        calls["n"] += 1
+        if calls["n"] == 1:
+            time.sleep(2 * DELAY)
+            raise RuntimeError("primary failed")
+        time.sleep(4 * DELAY)
+        return "hedge"
+
+    assert hedger.call(STAGE, call) == "hedge"
+    hedger.close()
+
+
+def test_hedge_rate_cap():
+    """With max_hedge_rate 0 no call is hedged, however slow."""
+    hedger = _hedger(max_hedge_rate=0.0)
+    attempts = _Attempts()
+    threading.Timer(3 * DELAY, attempts.release_first.set).start()
+    assert hedger.call(STAGE, attempts) == "attempt 1"
+    stats = hedger.stats()
+    assert stats["hedges_fired"] == 0 and stats["hedges_capped"] == 1
+    assert attempts.count == 1
+
+
+def test_no_hedge_without_a_free_scheduler_slot():
+    """A saturated scheduler means the call is not hedged instead of adding load."""
+    scheduler = FairScheduler(max_concurrent=1)
+    hedger = _hedger()
+    attempts = _Attempts()
+    threading.Timer(3 * DELAY, attempts.release_first.set).start()
+    with scheduler.slot():
+        assert hedger.call(STAGE, attempts, scheduler) == "attempt 1"
+    assert hedger.stats()["hedges_skipped"] == 1
+    assert attempts.count == 1
+    assert scheduler.stats()["running"] == 0
+
+
+def test_hedge_holds_its_slot_until_both_attempts_finish(wait_until):
+    """The hedge takes a scheduler slot, kept while the abandoned primary is still running."""
+    scheduler = FairScheduler(max_concurrent=2)
+    hedger = _hedger()
+    attempts = _Attempts()
+    with scheduler.slot():
+        assert hedger.call(STAGE, attempts, scheduler) == "attempt 2"
+    # The caller's slot is released; the primary is still in flight on the hedge's slot
+    assert scheduler.stats()["running"] == 1
+    attempts.release_first.set()
+    wait_until(lambda: scheduler.stats()["running"] == 0)
+    hedger.close()
+
+
+def test_closed_hedger_stops_hedging():
+    hedger = _hedger()
+    hedger.close()
+    attempts = _Attempts()
+    threading.Timer(3 * DELAY, attempts.release_first.set).start()
+    assert hedger.call(STAGE, attempts) == "attempt 1"
+    assert attempts.count == 1
+
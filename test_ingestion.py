@@ -0,0 +1,52 @@
+"""
+Tests for document ingestion (ingestion.py).
+
+Documents are small text files in a temporary directory; extraction runs in a
+real process pool.
+"""
+import os
+import threading
+
+import ingestion
+from ingestion import iter_documents
+
+
+def _crash(path):
+    """Stands in for _extract_document: the worker process dies mid-task."""
+    os._exit(1)
+
+
+def _write_documents(directory, count):
+    paths = []
+    for index in range(count):
+        path = directory / f"doc{index}.txt"
+        path.write_text(f"Document  {index}\r\n")
+        paths.append(str(path))
+    return paths
+
+
+def _collect(paths, timeout=30, **kwargs):
+    """Run iter_documents on a thread so a hang fails the test instead of blocking the suite."""
+    records = []
+    thread = threading.Thread(target=lambda: records.extend(iter_documents(paths, **kwargs)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "iter_documents did not finish"
+    return records
+
+
+def test_every_document_is_yielded(tmp_path):
+    paths = _write_documents(tmp_path, 20)
+    records = _collect(paths, workers=2, queue_size=2)
+    assert sorted(record["path"] for record in records) == sorted(paths)
+    assert all(record["error"] is None for record in records)
+    assert {record["text"] for record in records} == {f"Document {index}" for index in range(20)}
+
+
+def test_crashed_worker_reports_errors_instead_of_hanging(tmp_path, monkeypatch):
+    """A dead worker breaks the pool; every document still gets a record, as an error."""
+    monkeypatch.setattr(ingestion, "_extract_document", _crash)
+    paths = _write_documents(tmp_path, 20)
+    records = _collect(paths, workers=2, queue_size=2)
+    assert sorted(record["path"] for record in records) == sorted(paths)
+    assert all(record["text"] is None and "BrokenProcessPool" in record["error"] for record in records)
@@ -3,14 +3,19 @@
 Test script for the Resume-JD Matcher.
 This script evaluates the system against sample resumes and job descriptions.
 """
-import json
+import argparse
 import os
-from resume_jd_matcher import ResumeJDMatcher
+from resume_jd_matcher import ResumeJDMatcher, configure_logging, PROMPT_VERSION
+from manifest import MatchManifest, file_hash
+from result_sinks import open_sink
+from ingestion import extract_text, SUPPORTED_EXTENSIONS
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+RESULTS_FILE = 'tests/results/results.jsonl'
+
 class TestMatching:
     def __init__(self):
         """Initialize the test matcher."""
@@ -172,42 +177,99 @@ Preferred Qualifications:
 - Published research in machine learning or data science
 """)
     
-    def run_tests(self):
-        """Run matching tests with sample files."""
+    def run_tests(self, full=False):
+        """
+        Run matching tests with sample files.
+        
+        Only pairs whose resume, job description, prompt version or model changed
+        since the last run are recomputed, using tests/results/manifest.json.
+        Results are appended to tests/results/results.jsonl.
+        
+        Args:
+            full (bool): Recompute every pair, ignoring the manifest
+        """
         print("Running Resume-JD Matching Tests")
         print("================================")
         
         # Get all resume files
-        resume_files = [f for f in os.listdir('tests/resumes') if f.endswith('.txt')]
+        resume_files = sorted(f for f in os.listdir('tests/resumes') if f.lower().endswith(SUPPORTED_EXTENSIONS))
         
         # Get all job description files
-        jd_files = [f for f in os.listdir('tests/jds') if f.endswith('.txt')]
+        jd_files = sorted(f for f in os.listdir('tests/jds') if f.lower().endswith(SUPPORTED_EXTENSIONS))
         
-        # Run tests for all combinations
+        self.manifest = MatchManifest('tests/results/manifest.json', PROMPT_VERSION, self.matcher.model_signature)
+        self.hashes = {}
         for resume_file in resume_files:
-            for jd_file in jd_files:
-                self._run_single_test(resume_file, jd_file)
+            self.hashes[f'tests/resumes/{resume_file}'] = file_hash(f'tests/resumes/{resume_file}')
+        for jd_file in jd_files:
+            self.hashes[f'tests/jds/{jd_file}'] = file_hash(f'tests/jds/{jd_file}')
+        for path, doc_hash in self.hashes.items():
+            self.manifest.record_document(path, doc_hash)
+        
+        pairs = [(resume_file, jd_file) for resume_file in resume_files for jd_file in jd_files]
+        if full:
+            stale = {pair: "full run" for pair in pairs}
+        else:
+            plan = self.manifest.plan([
+                (f'tests/resumes/{r}', f'tests/jds/{j}', self.hashes[f'tests/resumes/{r}'], self.hashes[f'tests/jds/{j}'])
+                for r, j in pairs
+            ])
+            stale = {(os.path.basename(r), os.path.basename(j)): reason for r, j, reason in plan}
+        
+        print(f"{len(stale)} of {len(pairs)} pairs need matching (prompt version {PROMPT_VERSION}, model {self.matcher.model_signature})")
+        
+        # Run tests for all combinations that are out of date
+        self.results = open_sink(RESULTS_FILE)
+        try:
+            for resume_file, jd_file in pairs:
+                if (resume_file, jd_file) in stale:
+                    self._run_single_test(resume_file, jd_file, reason=stale[(resume_file, jd_file)])
+                else:
+                    print(f"\nUp to date: {resume_file} against {jd_file}")
+        finally:
+            # Flush the results before the manifest points at them
+            self.results.close()
+            self.manifest.save()
+    
+    def _get_parsed(self, kind, path):
+        """Parse a document, reusing the manifest's cached parse if its content and prompt are unchanged."""
+        doc_hash = self.hashes[path]
+        parsed = self.manifest.get_parsed(kind, doc_hash)
+        if parsed is None:
+            content = extract_text(path)
+            if kind == "resume":
+                parsed = self.matcher.parse_resume(content)
+            else:
+                parsed = self.matcher.parse_job_description(content)
+            self.manifest.store_parsed(kind, doc_hash, parsed)
+        return parsed
     
-    def _run_single_test(self, resume_file, jd_file):
+    def _run_single_test(self, resume_file, jd_file, reason=None):
         """Run a single matching test."""
-        print(f"\nTesting: {resume_file} against {jd_file}")
+        print(f"\nTesting: {resume_file} against {jd_file}" + (f" ({reason})" if reason else ""))
         print("-" * 50)
         
-        # Read resume content
-        with open(f'tests/resumes/{resume_file}', 'r', encoding='utf-8') as f:
-            resume_content = f.read()
-        
-        # Read job description content
-        with open(f'tests/jds/{jd_file}', 'r', encoding='utf-8') as f:
-            jd_content = f.read()
+        resume_path = f'tests/resumes/{resume_file}'
+        jd_path = f'tests/jds/{jd_file}'
         
-        # Match resume to job description
-        result = self.matcher.process_resume_and_jd(resume_content, jd_content)
+        # Parse both documents (cached by content hash) and match them
+        parsed_resume = self._get_parsed("resume", resume_path)
+        parsed_jd = self._get_parsed("jd", jd_path)
+        result = {
+            "parsed_resume": parsed_resume,
+            "parsed_job_description": parsed_jd,
+            "matching_result": self.matcher.match_resume_to_jd(parsed_resume, parsed_jd)
+        }
         
         # Save the result
-        result_file = f"{os.path.splitext(resume_file)[0]}_vs_{os.path.splitext(jd_file)[0]}.json"
-        with open(f'tests/results/{result_file}', 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2)
+        self.results.write({"resume": resume_path, "jd": jd_path, **result})
+        
+        # Only record pairs matched by the model, so failures and degraded estimates are retried on the next run
+        match_result = result["matching_result"]
+        if "error" not in parsed_resume and "error" not in parsed_jd and "error" not in match_result \
+                and not match_result.get("degraded"):
+            self.manifest.record_result(resume_path, jd_path, self.hashes[resume_path], self.hashes[jd_path],
+                                        RESULTS_FILE)
         
         # Print the matching results
         if "matching_result" in result and "error" not in result["matching_result"]:
@@ -238,10 +300,15 @@ Preferred Qualifications:
                 final = match_result["Final_match"]
                 print(f"OVERALL MATCH: Level {final.get('match_level', 'N/A')}/7 - {final.get('Final_match_score', 'N/A')}")
             
-            print(f"Full results saved to: tests/results/{result_file}")
+            print(f"Full results appended to: {RESULTS_FILE}")
         else:
             print("Error in matching:", result.get("matching_result", {}).get("error", "Unknown error"))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run resume-JD matching tests over tests/resumes and tests/jds')
+    parser.add_argument('--full', action='store_true', help='Recompute every pair, ignoring the manifest')
+    args = parser.parse_args()
+    
+    configure_logging()
     tester = TestMatching()
-    tester.run_tests() 
\ No newline at end of file
+    tester.run_tests(full=args.full) 
\ No newline at end of file
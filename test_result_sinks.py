@@ -0,0 +1,81 @@
+"""
+Tests for reading back append-only result files (result_sinks.py).
+
+Each test writes a file the way a crashed run leaves it, lets a later run
+append to it, and checks which records read_results returns.
+"""
+import os
+
+import pytest
+
+from result_sinks import open_sink, read_results
+
+
+def _append(path, batches):
+    """Append each batch of record numbers in one flush, i.e. one gzip member or zstd frame; return the file sizes."""
+    sizes = []
+    with open_sink(path, buffer_size=1 << 20, flush_interval=1e9) as sink:
+        for batch in batches:
+            for number in batch:
+                sink.write({"number": number, "padding": "x" * 40})
+            sink.flush()
+            sizes.append(os.path.getsize(path))
+    return sizes
+
+
+def _tear(path, size):
+    """Cut the file at size bytes, as a crash in the middle of a write would."""
+    with open(path, "r+b") as f:
+        f.truncate(size)
+
+
+def _numbers(path):
+    return [record["number"] for record in read_results(path)]
+
+
+def test_torn_jsonl_record_is_skipped_and_appended_records_are_read(tmp_path, caplog):
+    path = str(tmp_path / "results.jsonl")
+    _append(path, [[0, 1, 2]])
+    _tear(path, os.path.getsize(path) - 10)
+    _append(path, [[3, 4]])
+
+    assert _numbers(path) == [0, 1, 3, 4]
+    assert "Skipping undecodable record on line 3" in caplog.text
+
+
+@pytest.mark.parametrize("extension", ["jsonl.gz", "jsonl.zst"])
+def test_torn_block_is_skipped_and_appended_blocks_are_read(tmp_path, caplog, extension):
+    if extension == "jsonl.zst":
+        pytest.importorskip("zstandard")
+    path = str(tmp_path / f"results.{extension}")
+    sizes = _append(path, [[0, 1], [2, 3]])
+    # The second block is cut short: both of its records are lost, none of the first
+    _tear(path, sizes[1] - 10)
+    _append(path, [[4, 5]])
+
+    assert _numbers(path) == [0, 1, 4, 5]
+    assert "Skipping a damaged block" in caplog.text
+
+
+def test_torn_last_block_keeps_its_complete_records(tmp_path, caplog):
+    """With nothing appended after it, a torn block is read up to the record that was cut."""
+    path = str(tmp_path / "results.jsonl.gz")
+    sizes = _append(path, [[0, 1], [2, 3]])
+    _tear(path, sizes[1] - 10)
+
+    assert _numbers(path) == [0, 1, 2]
+    assert "Skipping a truncated last block" in caplog.text
+
+
+def test_damaged_gzip_trailer_drops_the_whole_member(tmp_path):
+    """The member's checksum fails at its end, so none of its records are trusted, not just the last one."""
+    path = str(tmp_path / "results.jsonl.gz")
+    sizes = _append(path, [[0, 1], [2, 3], [4, 5]])
+    with open(path, "r+b") as f:
+        # Flip a byte of the second member's CRC-32
+        f.seek(sizes[1] - 6)
+        byte = f.read(1)
+        f.seek(sizes[1] - 6)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    assert _numbers(path) == [0, 1, 4, 5]
@@ -0,0 +1,97 @@
+"""
+Tests for the priority-aware fair scheduler (scheduler.py).
+
+Each ordering test holds the only slot while its calls queue up, then
+releases it and records the order the queued calls ran in.
+"""
+import threading
+
+from scheduler import FairScheduler, current_request_context, request_context
+
+
+
+def _waiting(scheduler: FairScheduler) -> int:
+    return sum(stats["waiting"] for stats in scheduler.stats()["priorities"].values())
+
+
+def _serve_order(calls, wait_until):
+    """
+    Queue calls behind a held slot one at a time, release the slot and return the order they ran in.
+
+    Args:
+        calls (list): (priority, tenant, label) per call, in the order they are queued
+        wait_until (Callable): The wait_until fixture
+    """
+    scheduler = FairScheduler(max_concurrent=1)
+    order = []
+    threads = []
+
+    def call(priority, tenant, label):
+        with request_context(priority, tenant), scheduler.slot():
+            order.append(label)
+
+    scheduler.acquire()
+    for priority, tenant, label in calls:
+        threads.append(threading.Thread(target=call, args=(priority, tenant, label)))
+        threads[-1].start()
+        # Queue the calls in a known order
+        wait_until(lambda: _waiting(scheduler) == len(threads))
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    assert scheduler.stats()["running"] == 0
+    return order
+
+
+def test_priorities_are_served_strictly_in_order(wait_until):
+    order = _serve_order([("background", "a", "background"), ("batch", "a", "batch 1"),
+                          ("interactive", "a", "interactive"), ("batch", "a", "batch 2")], wait_until)
+    assert order == ["interactive", "batch 1", "batch 2", "background"]
+
+
+def test_tenants_take_turns_within_a_class(wait_until):
+    """A tenant that queued first cannot starve another tenant of the same class."""
+    order = _serve_order([("batch", "big", "big 1"), ("batch", "big", "big 2"), ("batch", "big", "big 3"),
+                          ("batch", "small", "small 1"), ("batch", "small", "small 2")], wait_until)
+    assert order == ["big 1", "small 1", "big 2", "small 2", "big 3"]
+
+
+def test_calls_run_at_once_while_slots_are_free():
+    scheduler = FairScheduler(max_concurrent=2)
+    scheduler.acquire()
+    scheduler.acquire()
+    assert scheduler.stats()["running"] == 2
+    assert _waiting(scheduler) == 0
+    scheduler.release()
+    scheduler.release()
+    assert scheduler.stats()["running"] == 0
+
+
+def test_try_acquire_never_waits_or_jumps_the_queue(wait_until):
+    scheduler = FairScheduler(max_concurrent=1)
+    assert scheduler.try_acquire()
+    assert not scheduler.try_acquire()
+
+    waiter = threading.Thread(target=lambda: (scheduler.acquire(), scheduler.release()))
+    waiter.start()
+    wait_until(lambda: _waiting(scheduler) == 1)
+    scheduler.release()
+    waiter.join(5)
+    assert scheduler.try_acquire()
+    scheduler.release()
+    assert scheduler.stats()["running"] == 0
+
+
+def test_request_context_labels_and_restores():
+    assert current_request_context() == ("interactive", "default")
+    with request_context("batch", "nightly"):
+        assert current_request_context() == ("batch", "nightly")
+    assert current_request_context() == ("interactive", "default")
+    try:
+        with request_context("urgent"):
+            pass
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("request_context accepted an unknown priority")
+
@@ -0,0 +1,95 @@
+"""
+Tests for the pre-forking server (serve.py).
+
+serve.py runs as a subprocess with one worker, against a fake model server
+from fake_openai_server.py.
+"""
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import serve
+from fake_openai_server import FakeOpenAIServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _start_server(tmp_path, stub, threads):
+    """Start serve.py with one worker; return the process and its URL once the worker is ready."""
+    env = dict(os.environ, OPENAI_API_KEY="test", OPENAI_BASE_URL=stub.base_url,
+               MATCHER_PAIR_STORE=str(tmp_path / "pair_store.db"), MATCHER_QUEUE_TIMEOUT="30")
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "serve.py"), "--port", "0", "--workers", "1",
+         "--threads", str(threads), "--no-warm-connection"],
+        cwd=tmp_path, env=env, stderr=subprocess.PIPE, text=True)
+    url = None
+    for line in process.stderr:
+        match = re.search(r"Listening on (http://\S+)", line)
+        if match:
+            url = match.group(1)
+        if "ready in" in line:
+            break
+    assert url is not None and process.poll() is None, "serve.py did not start"
+    # Keep draining the log so the server never blocks on a full pipe
+    threading.Thread(target=process.stderr.read, daemon=True).start()
+    return process, url
+
+
+def _post(url, fields):
+    request = urllib.request.Request(url, data=urllib.parse.urlencode(fields).encode())
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status, response.headers, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, json.loads(e.read())
+
+
+def test_burst_is_queued_up_to_the_limit_and_the_rest_shed(tmp_path):
+    """With --threads 1 a worker runs one match, queues two and sheds the rest of a burst with 503."""
+    with FakeOpenAIServer(latency="fixed:0.2") as stub:
+        process, url = _start_server(tmp_path, stub, threads=1)
+        try:
+            results = [None] * 6
+
+            def send(index):
+                results[index] = _post(f"{url}/match", {"resume": f"Resume {index}\nPython developer",
+                                                        "jd": f"Job {index}\nPython developer wanted"})
+
+            threads = [threading.Thread(target=send, args=(index,)) for index in range(len(results))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(60)
+
+            statuses = sorted(status for status, _, _ in results)
+            assert statuses == [200, 200, 200, 503, 503, 503]
+            assert all(int(headers["Retry-After"]) >= 1 for status, headers, _ in results if status == 503)
+
+            with urllib.request.urlopen(f"{url}/stats", timeout=10) as response:
+                stats = json.loads(response.read())["admission"]["match"]
+            assert (stats["max_concurrent"], stats["max_queue"]) == (1, 2)
+            assert stats["shed"]["queue_full"] == 3
+        finally:
+            process.send_signal(signal.SIGTERM)
+            assert process.wait(30) == 0
+
+
+def test_master_gives_up_when_workers_fail_before_ready(tmp_path):
+    """Workers that cannot start are retried with backoff, then the master exits with an error."""
+    code = ("import sys, serve; serve.RESPAWN_DELAY = 0.05; "
+            "sys.argv[1:] = ['--port', '0', '--workers', '2', '--no-warm-connection']; serve.main()")
+    env = dict(os.environ, OPENAI_API_KEY="test",
+               MATCHER_PAIR_STORE=str(tmp_path / "missing" / "pair_store.db"))
+    result = subprocess.run([sys.executable, "-c", code], cwd=HERE, env=env, stderr=subprocess.PIPE,
+                            text=True, timeout=120)
+
+    assert result.returncode == 1
+    assert result.stderr.count("before it was ready; retrying in") == serve.MAX_EARLY_FAILURES - 1
+    assert "giving up" in result.stderr
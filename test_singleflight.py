@@ -0,0 +1,105 @@
+"""
+Tests for single-flight coalescing (singleflight.py).
+
+The leader's call blocks on an event until every waiter has attached, so
+coalescing is checked without relying on timing.
+"""
+import threading
+
+from singleflight import SingleFlight
+
+WAITERS = 4
+
+
+
+def _run_concurrently(flight: SingleFlight, fn, wait_until, key="key"):
+    """
+    Start a leader and WAITERS identical callers, and release the leader once all have attached.
+
+    Returns:
+        list: (result, shared) or the raised exception, per caller
+    """
+    release = threading.Event()
+    outcomes = [None] * (WAITERS + 1)
+
+    def leader_call():
+        release.wait(5)
+        return fn()
+
+    def run(index):
+        try:
+            outcomes[index] = flight.do(key, leader_call, "stage")
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=run, args=(0,))]
+    threads[0].start()
+    wait_until(lambda: flight.stats().get("stage", {}).get("calls") == 1)
+    for index in range(1, WAITERS + 1):
+        threads.append(threading.Thread(target=run, args=(index,)))
+        threads[-1].start()
+    wait_until(lambda: flight.stats()["stage"]["coalesced"] == WAITERS)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_identical_calls_share_one_call(wait_until):
+    flight = SingleFlight()
+    calls = []
+    outcomes = _run_concurrently(flight, lambda: calls.append(1) or {"parsed": True}, wait_until)
+
+    assert len(calls) == 1
+    assert outcomes[0] == ({"parsed": True}, False)
+    assert all(outcome == ({"parsed": True}, True) for outcome in outcomes[1:])
+    assert flight.stats() == {"stage": {"calls": 1, "coalesced": WAITERS}}
+
+
+def test_error_is_shared_with_waiters(wait_until):
+    """Every caller attached to a failing call gets its exception, and the call is made once."""
+    flight = SingleFlight()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise TimeoutError("model call timed out")
+
+    outcomes = _run_concurrently(flight, failing, wait_until)
+    assert len(calls) == 1
+    assert all(isinstance(outcome, TimeoutError) for outcome in outcomes)
+    assert all(str(outcome) == "model call timed out" for outcome in outcomes)
+
+
+def test_nothing_is_cached():
+    """Once a call has returned, the next caller with the same key makes a new call."""
+    flight = SingleFlight()
+    counter = iter(range(10))
+    assert flight.do("key", lambda: next(counter)) == (0, False)
+    assert flight.do("key", lambda: next(counter)) == (1, False)
+    # A failed call is not remembered either
+    try:
+        flight.do("key", lambda: 1 / 0)
+    except ZeroDivisionError:
+        pass
+    assert flight.do("key", lambda: next(counter)) == (2, False)
+
+
+def test_different_keys_do_not_coalesce(wait_until):
+    flight = SingleFlight()
+    release = threading.Event()
+    results = {}
+
+    def run(key):
+        results[key] = flight.do(key, lambda: release.wait(5) and key, "stage")
+
+    threads = [threading.Thread(target=run, args=(key,)) for key in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: flight.stats().get("stage", {}).get("calls") == 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == {"a": ("a", False), "b": ("b", False)}
+    assert flight.stats()["stage"]["coalesced"] == 0
+
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Startup-time budget test for the command-line interface.
+
+Runs the CLI in a fresh interpreter with `python -X importtime` and checks that
+`cli.py --help` stays within an import-time budget and never pulls in openai,
+dotenv or the matcher module, which are only needed once a model call is made.
+
+Run with: python test_startup.py   (or: python -m pytest test_startup.py)
+Override the budget with CLI_IMPORT_BUDGET_MS.
+"""
+import os
+import subprocess
+import sys
+
+# Importing openai alone costs several hundred milliseconds; the CLI's own
+# startup imports (argparse, json) take a few.
+IMPORT_BUDGET_MS = float(os.environ.get("CLI_IMPORT_BUDGET_MS", "100"))
+
+# Modules that must not be imported just to print help or reject arguments
+HEAVY_MODULES = ("openai", "dotenv", "httpx", "pydantic", "resume_jd_matcher")
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _import_times(args):
+    """
+    Run Python with -X importtime and collect cumulative import times.
+
+    Args:
+        args (list): Arguments after `python -X importtime`
+
+    Returns:
+        tuple: (dict of module -> cumulative microseconds, total microseconds of top-level imports)
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=REPO_DIR, capture_output=True, text=True, timeout=60
+    )
+    modules, total_us = {}, 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+        # Nested imports are indented; only top-level ones add to the total
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return modules, total_us
+
+
+def test_cli_help_skips_heavy_imports():
+    """`cli.py --help` must not import the model client stack."""
+    modules, _ = _import_times(["cli.py", "--help"])
+    loaded = [name for name in modules if name.split(".")[0] in HEAVY_MODULES]
+    assert not loaded, f"cli.py --help imported heavy modules: {', '.join(sorted(loaded))}"
+
+
+def test_cli_argument_error_skips_heavy_imports():
+    """Argument errors must be reported without importing the model client stack."""
+    modules, _ = _import_times(["cli.py", "--no-such-flag"])
+    loaded = [name for name in modules if name.split(".")[0] in HEAVY_MODULES]
+    assert not loaded, f"cli.py argument error imported heavy modules: {', '.join(sorted(loaded))}"
+
+
+def test_cli_help_import_budget():
+    """Total import time of `cli.py --help` stays within the budget."""
+    _, total_us = _import_times(["cli.py", "--help"])
+    total_ms = total_us / 1000
+    assert total_ms <= IMPORT_BUDGET_MS, f"cli.py --help spent {total_ms:.1f} ms importing (budget {IMPORT_BUDGET_MS:.0f} ms)"
+
+
+def test_matcher_import_does_not_load_openai():
+    """Importing resume_jd_matcher defers openai until the client is first used."""
+    modules, _ = _import_times(["-c", "import resume_jd_matcher"])
+    assert "openai" not in modules, "import resume_jd_matcher imported openai eagerly"
+
+
+if __name__ == "__main__":
+    _, total = _import_times(["cli.py", "--help"])
+    print(f"cli.py --help import time: {total / 1000:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    for test in (test_cli_help_skips_heavy_imports, test_cli_argument_error_skips_heavy_imports,
+                 test_cli_help_import_budget, test_matcher_import_does_not_load_openai):
+        test()
+        print(f"PASS {test.__name__}")
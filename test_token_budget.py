@@ -0,0 +1,75 @@
+"""
+Tests for token budgets and section-aware trimming (token_budget.py).
+
+Assertions are stated in terms of the counter's own counts, so they hold for
+the tiktoken encoding and for the approximation alike.
+"""
+import json
+
+from token_budget import TRUNCATION_MARKER, TokenCounter, shrink_json, truncate_document, water_fill
+
+COUNTER = TokenCounter()
+
+LONG_LINE = " ".join(f"Led migration {i} of the billing platform to event sourcing." for i in range(300))
+
+
+def test_water_fill_keeps_small_parts_whole():
+    assert water_fill([10, 20, 300], 100) == [10, 20, 70]
+    assert water_fill([10, 20, 30], 100) == [10, 20, 30]
+
+
+def test_water_fill_shares_evenly_between_large_parts():
+    caps = water_fill([500, 10, 400], 110)
+    assert caps == [50, 10, 50]
+    assert water_fill([5, 5], 0) == [0, 0]
+
+
+def test_document_that_fits_is_unchanged():
+    text = "Experience\nBuilt data pipelines.\n\nEducation\nBSc Computer Science"
+    assert truncate_document(text, 500, COUNTER) == text
+
+
+def test_long_line_after_a_heading_is_cut_not_dropped():
+    text = f"Experience\n{LONG_LINE}\nEducation\nBSc Computer Science"
+    assert COUNTER.count(LONG_LINE) > 2000
+
+    truncated = truncate_document(text, 500, COUNTER)
+    assert COUNTER.count(truncated) <= 500
+    assert COUNTER.count(truncated) >= 400
+    assert truncated.startswith("Experience\nLed migration 0 of the billing platform")
+    assert truncated.endswith(f"{TRUNCATION_MARKER}\nEducation\nBSc Computer Science")
+
+
+def test_short_sections_are_kept_and_long_ones_cut():
+    summary = "Summary\nBackend engineer with ten years of experience."
+    skills = "Skills\nPython, Go, PostgreSQL, Kafka"
+    experience = "Experience\n" + "\n".join(f"Led migration {i} of the billing platform." for i in range(200))
+    truncated = truncate_document("\n".join([summary, experience, skills]), 300, COUNTER)
+
+    assert COUNTER.count(truncated) <= 300
+    assert truncated.startswith(summary + "\nExperience\nLed migration 0")
+    assert truncated.endswith(f"{TRUNCATION_MARKER}\n{skills}")
+
+
+def test_shrink_json_leaves_a_value_that_fits_alone():
+    value = {"name": "Ada", "skills": ["Python", "SQL"]}
+    assert shrink_json(value, 100, COUNTER) is value
+
+
+def test_shrink_json_cuts_only_the_long_fields():
+    value = {"name": "Ada Lovelace", "title": "Engineer", "summary": LONG_LINE}
+    shrunk = shrink_json(value, 200, COUNTER)
+
+    assert COUNTER.count(json.dumps(shrunk, separators=(",", ":"))) <= 200
+    assert shrunk["name"] == "Ada Lovelace" and shrunk["title"] == "Engineer"
+    assert shrunk["summary"].endswith(TRUNCATION_MARKER)
+    assert LONG_LINE.startswith(shrunk["summary"][:-len(TRUNCATION_MARKER)])
+
+
+def test_shrink_json_drops_trailing_list_items():
+    items = [f"Responsibility number {i} in the platform team" for i in range(100)]
+    shrunk = shrink_json(items, 120, COUNTER)
+
+    assert shrunk[:-1] == items[:len(shrunk) - 1]
+    assert len(shrunk) > 2
+    assert shrunk[-1] == f"{TRUNCATION_MARKER} more items omitted"
@@ -0,0 +1,317 @@
+"""
+Local token accounting and pre-flight budgets for model calls.
+
+Resumes and job descriptions of any length are forwarded to the model, and the
+match prompt embeds both parsed documents. Oversized inputs make calls slow or
+fail with context-length errors. The matcher counts prompt tokens locally
+before each call and trims inputs that exceed the stage's budget, so per-call
+latency stays bounded.
+
+Trimming is section-aware. Documents are split at their headings (Education,
+Experience, Skills, ...) and the budget is shared out so that short sections are
+kept whole and only the longest ones are cut, instead of chopping off whatever
+comes last. Parsed JSON is first re-serialized without indentation, then long
+values are shortened the same way, key by key.
+
+Counts use tiktoken when it is installed (pip install tiktoken) and a
+conservative approximation otherwise.
+"""
+import json
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+# Per-message and reply-priming overhead of the chat format
+_TOKENS_PER_MESSAGE = 4
+_TOKENS_PER_REPLY = 3
+
+# Marker left where text was cut
+TRUNCATION_MARKER = "[...]"
+
+# A line that overflows its section's budget is cut only if at least this many tokens of it fit
+_MIN_CUT_LINE_TOKENS = 8
+
+# Approximate tokens: words in chunks of up to five letters, numbers in groups of
+# up to three digits, each punctuation mark, and runs of whitespace (a single
+# space merges into the following word)
+_APPROX_TOKEN = re.compile(r"[A-Za-z]{1,5}|\d{1,3}|[^\sA-Za-z\d]|\s{2,}")
+
+_HEADING_WORDS = {
+    "education", "experience", "work experience", "professional experience", "employment", "projects",
+    "skills", "summary", "profile", "objective", "certifications", "publications", "awards",
+    "interests", "languages", "requirements", "qualifications", "responsibilities", "about the role",
+    "about us", "benefits", "preferred qualifications", "minimum qualifications", "what you'll do",
+}
+
+
+class TokenBudgetExceeded(ValueError):
+    """Raised when a prompt cannot be brought within its token budget."""
+
+
+class TokenCounter:
+    def __init__(self, model: str = "gpt-4o-mini"):
+        """
+        Count tokens for a model.
+
+        Args:
+            model (str): Model name used to pick the tiktoken encoding
+        """
+        self.model = model
+        self._encoding = None
+        try:
+            import tiktoken
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            pass
+        # The same prompts are counted repeatedly: system prompts on every call and
+        # user prompts once when checking the budget and once when sending
+        self._count_cached = lru_cache(maxsize=128)(self._count)
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the model's tokenizer rather than the approximation."""
+        return self._encoding is not None
+
+    def _count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(_APPROX_TOKEN.findall(text))
+
+    def count(self, text: str) -> int:
+        """Return the number of tokens in a text."""
+        return self._count(text)
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        """Return the prompt tokens of a list of chat messages, including the chat format overhead."""
+        return _TOKENS_PER_REPLY + sum(_TOKENS_PER_MESSAGE + self._count_cached(message.get("content") or "")
+                                       for message in messages)
+
+    def fits(self, text: str, max_tokens: int) -> bool:
+        """Check a text against a budget, skipping the count when it is obviously short enough."""
+        # A token is at least one byte, so a text with fewer bytes than the budget always fits
+        return len(text) <= max_tokens // 4 or len(text.encode("utf-8")) <= max_tokens or self.count(text) <= max_tokens
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Return the longest prefix of a text with at most max_tokens tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self._encoding.decode(tokens[:max_tokens])
+        for used, match in enumerate(_APPROX_TOKEN.finditer(text)):
+            if used == max_tokens:
+                return text[:match.start()]
+        return text
+
+
+def water_fill(sizes: List[int], budget: int) -> List[int]:
+    """
+    Share a budget between parts so that small parts keep their full size.
+
+    Every part gets min(size, cap) for the largest cap that fits the budget, so
+    only the parts bigger than the cap are cut.
+
+    Args:
+        sizes (List[int]): Size of each part
+        budget (int): Total size available
+
+    Returns:
+        List[int]: Allowed size for each part
+    """
+    caps = list(sizes)
+    remaining = max(budget, 0)
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for position, i in enumerate(order):
+        share = remaining // (len(order) - position)
+        if sizes[i] <= share:
+            remaining -= sizes[i]
+            continue
+        for j in order[position:]:
+            caps[j] = share
+        break
+    return caps
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 40 or len(stripped.split()) > 5 or stripped.endswith("."):
+        return False
+    return (stripped.lower() in _HEADING_WORDS or line.strip().endswith(":")
+            or stripped.isupper() or stripped.istitle())
+
+
+def split_sections(text: str) -> List[List[str]]:
+    """
+    Split a document into sections at heading lines.
+
+    Returns:
+        List[List[str]]: Lines of each section; each section after the first starts with its heading
+    """
+    sections = [[]]
+    for line in text.split("\n"):
+        if _is_heading(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return sections
+
+
+def _truncate_lines(lines: List[str], max_tokens: int, counter: TokenCounter) -> List[str]:
+    """Keep whole lines from the start of a section while they fit, cut the line that overflows, and mark the cut."""
+    marker_tokens = counter.count("\n" + TRUNCATION_MARKER)
+    budget = max_tokens - marker_tokens
+    kept, used = [], 0
+    for line in lines:
+        line_tokens = counter.count(line + "\n")
+        if used + line_tokens > budget:
+            # A long line after the heading would otherwise take the whole section body with it
+            if not kept or budget - used >= _MIN_CUT_LINE_TOKENS:
+                kept.append(counter.truncate(line, budget - used).rstrip())
+            break
+        kept.append(line)
+        used += line_tokens
+    return kept + [TRUNCATION_MARKER]
+
+
+def truncate_document(text: str, max_tokens: int, counter: TokenCounter) -> str:
+    """
+    Trim a resume or job description to a token budget, section by section.
+
+    Args:
+        text (str): Document text
+        max_tokens (int): Token budget for the whole document
+        counter (TokenCounter): Token counter
+
+    Returns:
+        str: The document, unchanged if it fits, otherwise with its longest sections shortened
+    """
+    if counter.fits(text, max_tokens):
+        return text
+
+    sections = split_sections(text)
+    sizes = [counter.count("\n".join(section) + "\n") for section in sections]
+    caps = water_fill(sizes, max_tokens)
+
+    kept_lines = []
+    for section, size, cap in zip(sections, sizes, caps):
+        if size <= cap:
+            kept_lines.extend(section)
+        else:
+            # Keep the heading so the model still sees the document's structure
+            kept_lines.extend(_truncate_lines(section, cap, counter))
+    truncated = "\n".join(kept_lines)
+
+    # Markers and line joins can push an already tight budget slightly over
+    if not counter.fits(truncated, max_tokens):
+        truncated = counter.truncate(truncated, max_tokens - counter.count(TRUNCATION_MARKER)) + TRUNCATION_MARKER
+    return truncated
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def shrink_json(value: Any, max_tokens: int, counter: TokenCounter) -> Any:
+    """
+    Shorten a JSON-compatible value so its compact serialization fits a token budget.
+
+    Strings are cut (and marked), lists drop trailing items, and dicts share the
+    budget between their keys so that short fields are kept whole.
+
+    Args:
+        value (Any): Parsed document or any JSON-compatible value
+        max_tokens (int): Token budget for the compact serialization
+        counter (TokenCounter): Token counter
+
+    Returns:
+        Any: The value, or a shortened copy of it
+    """
+    if counter.fits(_dumps(value), max_tokens):
+        return value
+
+    if isinstance(value, str):
+        return counter.truncate(value, max_tokens - 2 - counter.count(TRUNCATION_MARKER)) + TRUNCATION_MARKER
+
+    if isinstance(value, list):
+        marker = f"{TRUNCATION_MARKER} more items omitted"
+        budget = max_tokens - 2 - counter.count(_dumps(marker))
+        kept, used = [], 0
+        for item in value:
+            item_tokens = counter.count(_dumps(item)) + 1
+            if used + item_tokens > budget:
+                if not kept and budget > 0:
+                    kept.append(shrink_json(item, budget, counter))
+                break
+            kept.append(item)
+            used += item_tokens
+        return kept + [marker]
+
+    if isinstance(value, dict):
+        keys = list(value)
+        overhead = counter.count(_dumps(dict.fromkeys(keys, 0)))
+        sizes = [counter.count(_dumps(value[key])) for key in keys]
+        caps = water_fill(sizes, max_tokens - overhead)
+        return {key: value[key] if size <= cap else shrink_json(value[key], cap, counter)
+                for key, size, cap in zip(keys, sizes, caps)}
+
+    return value
+
+
+class TokenBudget:
+    def __init__(self, parse_input_tokens: Optional[int] = 8000, match_prompt_tokens: Optional[int] = 16000,
+                 max_output_tokens: Optional[int] = None):
+        """
+        Per-call token budgets.
+
+        Args:
+            parse_input_tokens (int, optional): Budget for the resume or job description text sent to a
+                                                parse call; None disables trimming
+            match_prompt_tokens (int, optional): Budget for the whole match prompt, system prompt
+                                                 included; None disables trimming
+            max_output_tokens (int, optional): Completion token limit sent with every call (max_tokens);
+                                               None leaves it to the model
+        """
+        self.parse_input_tokens = parse_input_tokens
+        self.match_prompt_tokens = match_prompt_tokens
+        self.max_output_tokens = max_output_tokens
+
+
+class TokenStats:
+    """Thread-safe per-stage counters of prompt tokens and trimming."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, int]] = {}
+
+    def record(self, stage: str, prompt_tokens: int, trimmed_tokens: int = 0,
+               reported_prompt_tokens: Optional[int] = None) -> None:
+        """
+        Record one call.
+
+        Args:
+            stage (str): Pipeline stage, e.g. "parse_resume"
+            prompt_tokens (int): Locally counted prompt tokens that were sent
+            trimmed_tokens (int): Tokens removed to meet the budget
+            reported_prompt_tokens (int, optional): Prompt tokens reported by the API
+        """
+        with self._lock:
+            stats = self._stages.setdefault(stage, {
+                "calls": 0, "prompt_tokens": 0, "reported_prompt_tokens": 0,
+                "truncated_calls": 0, "trimmed_tokens": 0
+            })
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["reported_prompt_tokens"] += reported_prompt_tokens or 0
+            if trimmed_tokens:
+                stats["truncated_calls"] += 1
+                stats["trimmed_tokens"] += trimmed_tokens
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Return a copy of the counters per stage."""
+        with self._lock:
+            return {stage: dict(stats) for stage, stats in self._stages.items()}
@@ -0,0 +1,214 @@
+"""
+Lightweight tracing spans for the matching pipeline.
+
+When a match is slow, the question is where the time went: waiting for a
+scheduler slot, the network, JSON cleanup, repair attempts or serializing
+prompts. The matcher wraps each of these in a span. Spans nest per thread
+(through a context variable), carry a few attributes such as the stage and
+model, and are handed to an exporter when they end.
+
+Tracing is off until an exporter is installed. While it is off, span() and
+@traced cost one attribute check, so the spans stay in the code permanently.
+
+Exporters:
+
+- JsonLinesExporter: one JSON object per finished span, for ad hoc analysis
+- ChromeTraceExporter: Chrome trace event format; open the file in
+  chrome://tracing or https://ui.perfetto.dev to see one timeline per thread
+
+Install one with configure_tracing(path) (the format follows the extension:
+.json is a Chrome trace, anything else JSON lines), by setting MATCHER_TRACE
+to a path, or with `python cli.py --trace trace.json ...`.
+"""
+import atexit
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Optional
+
+_exporter = None
+_span_ids = itertools.count(1)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("matcher_current_span", default=None)
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "start", "end", "thread_id", "thread_name", "attributes")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.attributes = attributes
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.start = time.perf_counter()
+        self.end = None
+
+    def set(self, **attributes) -> None:
+        """Add attributes, e.g. results only known once the work is done."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class _NoSpan:
+    """Stand-in yielded while tracing is off."""
+
+    def set(self, **attributes) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class JsonLinesExporter:
+    def __init__(self, path: str):
+        """
+        Write each finished span as one JSON line.
+
+        Args:
+            path (str): Output file; spans are appended
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        record = {
+            "name": span.name,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "thread": span.thread_name,
+            "start": round(span.start, 6),
+            "duration_ms": round(1000 * span.duration, 3),
+            "attributes": span.attributes,
+        }
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class ChromeTraceExporter:
+    def __init__(self, path: str):
+        """
+        Collect finished spans as Chrome trace "complete" events, written on close().
+
+        Args:
+            path (str): Output file (overwritten)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._events = []
+        self._threads = {}
+        self._pid = os.getpid()
+
+    def export(self, span: Span) -> None:
+        event = {
+            "name": span.name,
+            "ph": "X",
+            "ts": round(1e6 * span.start, 1),
+            "dur": round(1e6 * span.duration, 1),
+            "pid": self._pid,
+            "tid": span.thread_id,
+            "args": {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                     for key, value in span.attributes.items()},
+        }
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(span.thread_id, span.thread_name)
+
+    def close(self) -> None:
+        with self._lock:
+            # Name each thread's track after the thread
+            metadata = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                        for tid, name in self._threads.items()]
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": metadata + self._events, "displayTimeUnit": "ms"}, f)
+
+
+def set_exporter(exporter) -> None:
+    """
+    Install an exporter (an object with export(span) and close()), or None to turn tracing off.
+
+    The previous exporter is closed.
+    """
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    if previous is not None:
+        previous.close()
+
+
+def configure_tracing(path: Optional[str] = None) -> bool:
+    """
+    Turn tracing on, writing to `path` or MATCHER_TRACE; .json paths get a Chrome trace, others JSON lines.
+
+    The exporter is closed (and a Chrome trace written) when the process exits.
+
+    Returns:
+        bool: Whether tracing was turned on
+    """
+    path = path or os.environ.get("MATCHER_TRACE")
+    if not path:
+        return False
+    set_exporter(ChromeTraceExporter(path) if path.lower().endswith(".json") else JsonLinesExporter(path))
+    atexit.register(set_exporter, None)
+    return True
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """
+    Time the enclosed block as a span, nested under the span active in this thread.
+
+    Yields:
+        Span: The span, whose set() adds attributes (a no-op stand-in while tracing is off)
+    """
+    if _exporter is None:
+        yield _NO_SPAN
+        return
+    current = Span(name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(current)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator that runs every call of the function in a span named `name` (default: the function name)."""
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
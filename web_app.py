@@ -8,13 +8,90 @@ import json
 import os
 from flask import Flask, request, render_template, jsonify
 from dotenv import load_dotenv
-from resume_jd_matcher import ResumeJDMatcher
+from admission import AdmissionController, AdmissionRejected
+from pair_store import PairStore, pair_key
+from response_cache import ResponseCache, content_key
+from resume_jd_matcher import PROMPT_VERSION, ResumeJDMatcher, configure_logging
+from scheduler import request_context
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 matcher = ResumeJDMatcher()
+# Matched pairs, so /explain can write the reasoning of scores-only matches on demand
+pair_store = PairStore(os.environ.get('MATCHER_PAIR_STORE', 'pair_store.db'))
+# Repeated and retried requests are answered from here instead of running the pipeline again
+response_cache = ResponseCache.from_env()
+# Requests beyond these limits are shed with 429/503 instead of queueing until clients time out
+admission = {'match': AdmissionController.from_env('match'), 'parse': AdmissionController.from_env('parse')}
+
+def request_tenant():
+    """Tenant of the request: the X-Tenant-ID header, or the client address."""
+    return request.headers.get('X-Tenant-ID') or request.remote_addr or 'web'
+
+def interactive_context():
+    """Schedule the request's model calls as interactive work of its tenant (X-Tenant-ID or client address)."""
+    return request_context('interactive', request_tenant())
+
+def shed_response(error):
+    """Response for a request shed by admission control, telling the client when to retry."""
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.status_code = error.status
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def cached_json(route, fields, compute, cacheable, controller):
+    """
+    Answer a request through the response cache (see response_cache.py).
+    
+    The response's ETag is the request's content key; a matching If-None-Match gets 304.
+    A request with an Idempotency-Key gets the response recorded for that key. Only
+    requests that run the pipeline go through admission control.
+    
+    Args:
+        route (str): Route name, part of the content key
+        fields (dict): Request fields the response depends on
+        compute (Callable[[], dict]): Produces the response body; must not be modified afterwards,
+                                      since it is shared with other requests
+        cacheable (Callable[[dict], bool]): Whether a body may be served to later identical requests
+        controller (AdmissionController): Admission control of the route group
+    """
+    key = content_key(route, fields, f"{PROMPT_VERSION}:{matcher.model_signature}")
+    if key in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(key)
+        return response
+    
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key:
+        body, conflict = response_cache.replay(request_tenant(), idempotency_key, key)
+        if conflict:
+            return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+        if body is not None:
+            response = jsonify(body)
+            response.headers['X-Cache'] = 'replay'
+            return response
+    
+    tenant = request_tenant()
+    
+    def admitted():
+        with controller.admit(tenant):
+            return compute()
+    
+    try:
+        with interactive_context():
+            body, source = response_cache.get_or_compute(key, admitted, cacheable, route)
+    except AdmissionRejected as e:
+        # Also raised in identical requests that attached to the shed one
+        return shed_response(e)
+    if idempotency_key:
+        response_cache.record(request_tenant(), idempotency_key, key, body)
+    response = jsonify(body)
+    response.headers['X-Cache'] = source
+    if cacheable(body):
+        response.set_etag(key)
+    return response
 
 @app.route('/')
 def index():
@@ -30,9 +107,43 @@ def match():
     if not resume_text or not jd_text:
         return jsonify({'error': 'Both resume and job description are required'}), 400
     
+    scores_only = request.form.get('scores_only', '').lower() in ('1', 'true', 'yes', 'on')
+    
+    def cacheable(result):
+        # Degraded estimates and failed parses or matches are recomputed on the next request
+        return not result.get('degraded') and not any(
+            'error' in result[key] for key in ('parsed_resume', 'parsed_job_description', 'matching_result'))
+    
+    def compute():
+        result = matcher.process_resume_and_jd(resume_text, jd_text, scores_only=scores_only or None)
+        if not result.get('prefiltered') and cacheable(result):
+            pid = pair_key(result['parsed_resume'], result['parsed_job_description'])
+            pair_store.put(pid, result['parsed_resume'], result['parsed_job_description'], result['matching_result'])
+            result['pair_id'] = pid
+        return result
+    
+    try:
+        return cached_json('match', {'resume': resume_text, 'jd': jd_text, 'scores_only': scores_only},
+                           compute, cacheable, admission['match'])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/explain', methods=['GET', 'POST'])
+def explain():
+    """Return the matching result of a stored pair with reasoning, generated on first request and cached."""
+    pid = request.values.get('pair_id', '')
+    
+    if not pid:
+        return jsonify({'error': 'pair_id is required'}), 400
+    
     try:
-        result = matcher.process_resume_and_jd(resume_text, jd_text)
-        return jsonify(result)
+        with interactive_context(), admission['match'].admit(request_tenant()):
+            result = pair_store.explain(matcher, pid)
+        if result is None:
+            return jsonify({'error': f'Unknown pair_id {pid}'}), 404
+        return jsonify({'pair_id': pid, 'matching_result': result})
+    except AdmissionRejected as e:
+        return shed_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -45,8 +156,8 @@ def parse_resume():
         return jsonify({'error': 'Resume text is required'}), 400
     
     try:
-        result = matcher.parse_resume(resume_text)
-        return jsonify(result)
+        return cached_json('parse_resume', {'resume': resume_text}, lambda: matcher.parse_resume(resume_text),
+                           lambda result: 'error' not in result, admission['parse'])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -59,15 +170,29 @@ def parse_jd():
         return jsonify({'error': 'Job description text is required'}), 400
     
     try:
-        result = matcher.parse_job_description(jd_text)
-        return jsonify(result)
+        return cached_json('parse_jd', {'jd': jd_text}, lambda: matcher.parse_job_description(jd_text),
+                           lambda result: 'error' not in result, admission['parse'])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Report admission control (queue depth, shed requests), the response cache and the model call statistics."""
+    return jsonify({
+        'admission': {group: controller.stats() for group, controller in admission.items()},
+        'response_cache': response_cache.stats(),
+        'scheduler': matcher.scheduler.stats() if matcher.scheduler is not None else None,
+        'circuit_breaker': matcher.circuit_breaker.stats() if matcher.circuit_breaker is not None else None,
+        'coalescing': matcher.coalescing_report(),
+        'json_resolution': matcher.json_resolution_report(),
+        'tokens': matcher.token_stats.snapshot()
+    })
+
 # Create the templates directory and HTML template
 def create_templates():
-    """Create the templates directory and index.html file."""
-    os.makedirs('templates', exist_ok=True)
+    """Create the templates directory and index.html file next to this module."""
+    templates_dir = os.path.join(app.root_path, 'templates')
+    os.makedirs(templates_dir, exist_ok=True)
     
     html_content = """<!DOCTYPE html>
 <html>
@@ -395,10 +520,15 @@ def create_templates():
 </html>
 """
     
-    with open('templates/index.html', 'w', encoding='utf-8') as f:
+    # Write and rename, so a server process never loads a half-written template
+    path = os.path.join(templates_dir, 'index.html')
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
         f.write(html_content)
+    os.replace(temp_path, path)
 
 if __name__ == '__main__':
+    configure_logging()
     create_templates()
     print("Web app is starting...")
     print("Access the application at http://localhost:5000")